@@ -0,0 +1,80 @@
+# -*- coding: utf-8 -*-
+##############################################################################
+#
+# Copyright (c) 2016, 2degrees Limited.
+# All Rights Reserved.
+#
+# This file is part of django-pastedeploy-settings
+# <https://github.com/2degrees/django-pastedeploy-settings>, which is subject
+# to the provisions of the BSD at
+# <http://dev.2degreesnetwork.com/p/2degrees-license.html>. A copy of the
+# license should accompany this distribution. THIS SOFTWARE IS PROVIDED "AS IS"
+# AND ANY AND ALL EXPRESS OR IMPLIED WARRANTIES ARE DISCLAIMED, INCLUDING, BUT
+# NOT LIMITED TO, THE IMPLIED WARRANTIES OF TITLE, MERCHANTABILITY, AGAINST
+# INFRINGEMENT, AND FITNESS FOR A PARTICULAR PURPOSE.
+#
+##############################################################################
+"""
+Utilities shared by the benchmarks to write their JSON reports.
+
+"""
+from json import dump as write_json
+import platform
+import sys
+
+
+__all__ = [
+    'get_environment',
+    'parse_integers',
+    'summarize_timings',
+    'write_report',
+    ]
+
+
+def get_environment(**extra_items):
+    """
+    Return the description of the interpreter and platform in use, along
+    with ``extra_items``.
+
+    """
+    environment = {
+        'python_implementation': platform.python_implementation(),
+        'python_version': platform.python_version(),
+        'platform': platform.platform(),
+        }
+    environment.update(extra_items)
+    return environment
+
+
+def summarize_timings(timings, **parameters):
+    """
+    Return the best and mean of ``timings``, along with the timings
+    themselves and the ``parameters`` of the measurement.
+
+    """
+    summary = dict(
+        parameters,
+        best=min(timings),
+        mean=sum(timings) / len(timings),
+        timings=timings,
+        )
+    return summary
+
+
+def write_report(report, output_file_path):
+    """
+    Write ``report`` as JSON to ``output_file_path``, or to the standard
+    output if it's ``-``.
+
+    """
+    if output_file_path == '-':
+        write_json(report, sys.stdout, indent=2, sort_keys=True)
+        sys.stdout.write('\n')
+    else:
+        with open(output_file_path, 'w') as output_file:
+            write_json(report, output_file, indent=2, sort_keys=True)
+
+
+def parse_integers(integers_string):
+    """Return the comma-separated integers in ``integers_string``."""
+    return [int(integer) for integer in integers_string.split(',')]
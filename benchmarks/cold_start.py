@@ -0,0 +1,421 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+##############################################################################
+#
+# Copyright (c) 2016, 2degrees Limited.
+# All Rights Reserved.
+#
+# This file is part of django-pastedeploy-settings
+# <https://github.com/2degrees/django-pastedeploy-settings>, which is subject
+# to the provisions of the BSD at
+# <http://dev.2degreesnetwork.com/p/2degrees-license.html>. A copy of the
+# license should accompany this distribution. THIS SOFTWARE IS PROVIDED "AS IS"
+# AND ANY AND ALL EXPRESS OR IMPLIED WARRANTIES ARE DISCLAIMED, INCLUDING, BUT
+# NOT LIMITED TO, THE IMPLIED WARRANTIES OF TITLE, MERCHANTABILITY, AGAINST
+# INFRINGEMENT, AND FITNESS FOR A PARTICULAR PURPOSE.
+#
+##############################################################################
+"""
+Cold-start benchmark for the construction of the WSGI application.
+
+Each measurement is taken in a fresh Python process, which loads a Django
+project generated on the fly in a temporary directory::
+
+    python benchmarks/cold_start.py --apps 50 --options 500 --output out.json
+
+The time and peak resident set size are broken down by phase: INI parsing,
+settings module import, resolution of the options, Django set-up and
+construction of the WSGI application.
+
+"""
+from __future__ import print_function
+
+from argparse import ArgumentParser
+from json import dumps as convert_to_json
+from json import loads as parse_json
+import os
+from shutil import rmtree
+import subprocess
+import sys
+from tempfile import mkdtemp
+from timeit import default_timer
+
+from _reporting import get_environment
+from _reporting import write_report
+
+
+_ROOT_DIRECTORY = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+_TARGETS = ('loadapp', 'get_configured_django_wsgi_app', 'make_full_django_app')
+
+_PROJECT_PACKAGE_NAME = 'coldstart_project'
+
+
+def main(arguments=None):
+    argument_parser = _get_argument_parser()
+    parsed_arguments = argument_parser.parse_args(arguments)
+
+    project_directory = mkdtemp(prefix='coldstart-')
+    try:
+        config_file_path = generate_project(
+            project_directory,
+            parsed_arguments.apps,
+            parsed_arguments.models,
+            parsed_arguments.urls,
+            parsed_arguments.options,
+            )
+
+        results = []
+        for target in parsed_arguments.targets:
+            for _ in range(parsed_arguments.repeat):
+                measurement = \
+                    measure_cold_start(target, config_file_path, project_directory)
+                results.append(measurement)
+                print(
+                    '%-32s total %.3fs  peak RSS %s KiB' % (
+                        target,
+                        measurement['process_wall_time'],
+                        measurement['peak_rss_kib'],
+                        ),
+                    file=sys.stderr,
+                    )
+    finally:
+        rmtree(project_directory)
+
+    report = {
+        'environment': get_environment(),
+        'parameters': {
+            'apps': parsed_arguments.apps,
+            'models': parsed_arguments.models,
+            'urls': parsed_arguments.urls,
+            'options': parsed_arguments.options,
+            'repeat': parsed_arguments.repeat,
+            },
+        'results': results,
+        }
+    write_report(report, parsed_arguments.output)
+
+
+def generate_project(project_directory, app_count, model_count, url_count,
+                     option_count):
+    """
+    Generate a Django project with ``app_count`` applications, each with
+    ``model_count`` models, plus ``url_count`` URL patterns and a
+    PasteDeploy configuration file with ``option_count`` extra options.
+
+    :return: The path to the PasteDeploy configuration file
+
+    """
+    package_directory = os.path.join(project_directory, _PROJECT_PACKAGE_NAME)
+    _write_file(package_directory, '__init__.py', '')
+    _write_file(package_directory, 'settings.py', 'USE_TZ = True\n')
+    _write_file(package_directory, 'views.py', _VIEWS_MODULE_SOURCE)
+
+    url_patterns = ''.join(
+        "    url(r'^page-%d/$', views.view),\n" % url_index
+        for url_index in range(url_count)
+        )
+    _write_file(
+        package_directory,
+        'urls.py',
+        _URLS_MODULE_SOURCE % {'url_patterns': url_patterns},
+        )
+
+    app_names = []
+    for app_index in range(app_count):
+        app_name = 'app%04d' % app_index
+        app_directory = os.path.join(package_directory, app_name)
+        _write_file(app_directory, '__init__.py', '')
+        model_definitions = ''.join(
+            _MODEL_SOURCE % {'model_index': model_index}
+            for model_index in range(model_count)
+            )
+        _write_file(
+            app_directory,
+            'models.py',
+            'from django.db import models\n' + model_definitions,
+            )
+        app_names.append('%s.%s' % (_PROJECT_PACKAGE_NAME, app_name))
+
+    extra_options = ''.join(
+        'OPTION_%05d = {"index": %d, "path": "${here}/%d"}\n' % (
+            option_index,
+            option_index,
+            option_index,
+            )
+        for option_index in range(option_count)
+        )
+    config_file_contents = _CONFIG_FILE_TEMPLATE % {
+        'settings_module': _PROJECT_PACKAGE_NAME + '.settings',
+        'installed_apps': convert_to_json(
+            ['django.contrib.contenttypes', 'django.contrib.auth'] + app_names,
+            ),
+        'root_urlconf': convert_to_json(_PROJECT_PACKAGE_NAME + '.urls'),
+        'extra_options': extra_options,
+        }
+    config_file_path = \
+        _write_file(project_directory, 'config.ini', config_file_contents)
+    return config_file_path
+
+
+def measure_cold_start(target, config_file_path, project_directory):
+    """
+    Load the application with ``target`` in a new Python process and return
+    the timings and memory usage.
+
+    """
+    child_arguments = convert_to_json({
+        'target': target,
+        'config_file_path': config_file_path,
+        'sys_path': [project_directory, _ROOT_DIRECTORY],
+        })
+
+    start_time = default_timer()
+    output = subprocess.check_output(
+        [sys.executable, '-c', _CHILD_SCRIPT, child_arguments],
+        )
+    process_wall_time = default_timer() - start_time
+
+    measurement = parse_json(output.decode('utf-8'))
+    # A function which is patched but never called means that the phase is
+    # measured elsewhere now, and that the report would be wrong
+    uncalled_function_names = sorted(
+        function_name
+        for function_name, call_count in measurement['call_counts'].items()
+        if not call_count
+        )
+    if uncalled_function_names:
+        raise RuntimeError(
+            'Functions never called by %s: %s' % (
+                target,
+                ', '.join(uncalled_function_names),
+                ),
+            )
+
+    measurement['target'] = target
+    measurement['process_wall_time'] = process_wall_time
+    return measurement
+
+
+def _write_file(directory, file_name, contents):
+    if not os.path.isdir(directory):
+        os.makedirs(directory)
+    file_path = os.path.join(directory, file_name)
+    with open(file_path, 'w') as file_:
+        file_.write(contents)
+    return file_path
+
+
+def _get_argument_parser():
+    argument_parser = ArgumentParser(description=__doc__.split('\n\n')[0])
+    argument_parser.add_argument(
+        '--targets',
+        type=lambda targets: targets.split(','),
+        default=list(_TARGETS),
+        help='Comma-separated entry points to measure (default: %s)' %
+            ','.join(_TARGETS),
+        )
+    argument_parser.add_argument(
+        '--apps',
+        type=int,
+        default=20,
+        help='Number of Django applications (default: %(default)s)',
+        )
+    argument_parser.add_argument(
+        '--models',
+        type=int,
+        default=5,
+        help='Number of models per application (default: %(default)s)',
+        )
+    argument_parser.add_argument(
+        '--urls',
+        type=int,
+        default=100,
+        help='Number of URL patterns (default: %(default)s)',
+        )
+    argument_parser.add_argument(
+        '--options',
+        type=int,
+        default=200,
+        help='Number of extra options in the configuration file '
+            '(default: %(default)s)',
+        )
+    argument_parser.add_argument(
+        '--repeat',
+        type=int,
+        default=3,
+        help='Number of processes started per target (default: %(default)s)',
+        )
+    argument_parser.add_argument(
+        '--output',
+        default='-',
+        help='Path to the JSON report; "-" for stdout (default: %(default)s)',
+        )
+    return argument_parser
+
+
+_VIEWS_MODULE_SOURCE = '''\
+from django.http import HttpResponse
+
+
+def view(request):
+    return HttpResponse('')
+'''
+
+
+_URLS_MODULE_SOURCE = '''\
+from django.conf.urls import url
+
+from coldstart_project import views
+
+
+urlpatterns = [
+%(url_patterns)s]
+'''
+
+
+_MODEL_SOURCE = '''
+
+class Model%(model_index)d(models.Model):
+    name = models.CharField(max_length=100)
+    created = models.DateTimeField(auto_now_add=True)
+    parent = models.ForeignKey('self', null=True, on_delete=models.CASCADE)
+'''
+
+
+_CONFIG_FILE_TEMPLATE = '''\
+[DEFAULT]
+debug = false
+django_settings_module = %(settings_module)s
+
+[app:main]
+paste.app_factory = django_pastedeploy_settings:get_configured_django_wsgi_app
+SECRET_KEY = "cold start"
+ALLOWED_HOSTS = ["*"]
+INSTALLED_APPS = %(installed_apps)s
+ROOT_URLCONF = %(root_urlconf)s
+DATABASES = {"default": {"ENGINE": "django.db.backends.sqlite3", "NAME": ":memory:"}}
+MEDIA_URL = "/media/"
+MEDIA_ROOT = "${here}/media"
+ADMIN_MEDIA_PREFIX = "/admin-media/"
+%(extra_options)s
+[composite:full]
+paste.composite_factory = django_pastedeploy_settings.factories:make_full_django_app
+django_app = main
+'''
+
+
+# Run in the child process. The functions behind each phase are wrapped to
+# record their duration and the peak RSS once they return, and the calls to each
+# function are counted. Nested phases are excluded from the duration of their
+# parents.
+_CHILD_SCRIPT = '''\
+import json
+import resource
+import sys
+from timeit import default_timer
+
+process_start_time = default_timer()
+
+arguments = json.loads(sys.argv[1])
+sys.path[:0] = arguments['sys_path']
+
+phase_timings = {}
+phase_peak_rss = {}
+call_counts = {}
+phase_stack = []
+
+
+def get_peak_rss_kib():
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if sys.platform == 'darwin':
+        peak_rss //= 1024
+    return peak_rss
+
+
+def wrap(phase_name, function):
+    def wrapper(*args, **kwargs):
+        phase_stack.append(0.0)
+        start_time = default_timer()
+        try:
+            return function(*args, **kwargs)
+        finally:
+            duration = default_timer() - start_time
+            nested_duration = phase_stack.pop()
+            if phase_stack:
+                phase_stack[-1] += duration
+            phase_timings[phase_name] = \\
+                phase_timings.get(phase_name, 0.0) + duration - nested_duration
+            phase_peak_rss[phase_name] = get_peak_rss_kib()
+    return wrapper
+
+
+def patch(obj, attribute_name, phase_name):
+    function_name = '%s.%s' % (obj.__name__, attribute_name)
+    call_counts[function_name] = 0
+    wrapper = wrap(phase_name, getattr(obj, attribute_name))
+
+    def counting_wrapper(*args, **kwargs):
+        call_counts[function_name] += 1
+        return wrapper(*args, **kwargs)
+
+    setattr(obj, attribute_name, counting_wrapper)
+
+
+import django
+import django.core.servers.basehttp
+from paste.deploy import loadapp
+from paste.deploy import loadwsgi
+
+import django_pastedeploy_settings
+
+imports_time = default_timer() - process_start_time
+
+patch(loadwsgi.ConfigLoader, '__init__', 'ini_parse')
+patch(django_pastedeploy_settings, '_get_module', 'settings_import')
+patch(
+    django_pastedeploy_settings.LoadContext,
+    'resolve_local_conf_options',
+    'resolution',
+    )
+patch(django_pastedeploy_settings, '_store_django_settings', 'resolution')
+patch(django, 'setup', 'django_setup')
+patch(
+    django.core.servers.basehttp,
+    'get_internal_wsgi_application',
+    'wsgi_application',
+    )
+
+config_uri = 'config:' + arguments['config_file_path']
+target = arguments['target']
+target_start_time = default_timer()
+if target == 'loadapp':
+    loadapp(config_uri)
+elif target == 'get_configured_django_wsgi_app':
+    app_config = wrap('ini_parse', loadwsgi.appconfig)(config_uri)
+    django_pastedeploy_settings.get_configured_django_wsgi_app(
+        app_config.global_conf,
+        **app_config.local_conf
+        )
+elif target == 'make_full_django_app':
+    loadapp(config_uri, name='full')
+else:
+    raise ValueError('Unknown target %r' % target)
+target_time = default_timer() - target_start_time
+
+json.dump(
+    {
+        'imports_time': imports_time,
+        'target_time': target_time,
+        'phase_timings': phase_timings,
+        'call_counts': call_counts,
+        'phase_peak_rss_kib': phase_peak_rss,
+        'peak_rss_kib': get_peak_rss_kib(),
+        },
+    sys.stdout,
+    )
+'''
+
+
+if __name__ == '__main__':
+    main()
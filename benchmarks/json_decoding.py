@@ -0,0 +1,206 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+##############################################################################
+#
+# Copyright (c) 2016, 2degrees Limited.
+# All Rights Reserved.
+#
+# This file is part of django-pastedeploy-settings
+# <https://github.com/2degrees/django-pastedeploy-settings>, which is subject
+# to the provisions of the BSD at
+# <http://dev.2degreesnetwork.com/p/2degrees-license.html>. A copy of the
+# license should accompany this distribution. THIS SOFTWARE IS PROVIDED "AS IS"
+# AND ANY AND ALL EXPRESS OR IMPLIED WARRANTIES ARE DISCLAIMED, INCLUDING, BUT
+# NOT LIMITED TO, THE IMPLIED WARRANTIES OF TITLE, MERCHANTABILITY, AGAINST
+# INFRINGEMENT, AND FITNESS FOR A PARTICULAR PURPOSE.
+#
+##############################################################################
+"""
+Microbenchmarks for the decoding of JSON option values with each backend.
+
+The options in the sample configuration file shipped with the documentation
+are replicated to build larger configurations, which are decoded with
+:func:`json.loads` (as in previous releases) and with
+:class:`~django_pastedeploy_settings.decoding.JSONDecoder` for each backend
+installed::
+
+    python benchmarks/json_decoding.py --scales 1,100,1000 --output out.json
+
+"""
+from __future__ import print_function
+
+from argparse import ArgumentParser
+from json import loads as parse_json
+import os
+import sys
+from timeit import default_timer
+
+try:
+    from configparser import RawConfigParser
+except ImportError:  # Python 2
+    from ConfigParser import RawConfigParser
+
+from _reporting import get_environment
+from _reporting import parse_integers
+from _reporting import summarize_timings
+from _reporting import write_report
+
+_ROOT_DIRECTORY = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, _ROOT_DIRECTORY)
+
+import django_pastedeploy_settings
+from django_pastedeploy_settings import _get_option_values_dereferenced
+from django_pastedeploy_settings.decoding import get_available_backend_names
+from django_pastedeploy_settings.decoding import JSONDecoder
+
+
+_DEFAULT_SCALES = (1, 10, 100, 1000)
+
+_SAMPLE_CONFIG_FILE_PATH = os.path.join(
+    _ROOT_DIRECTORY,
+    'docs',
+    'source',
+    '_static',
+    'simplest-settings.ini',
+    )
+
+_SAMPLE_APP_SECTION_NAME = 'app:main'
+
+_GLOBAL_OPTIONS = {
+    'debug': 'false',
+    'here': '/srv/project',
+    }
+
+_BASELINE_DECODER_NAME = 'json.loads'
+
+
+def main(arguments=None):
+    argument_parser = _get_argument_parser()
+    parsed_arguments = argument_parser.parse_args(arguments)
+
+    sample_options = load_sample_options(parsed_arguments.config_file)
+    decoders = get_decoders()
+
+    results = []
+    for scale in parsed_arguments.scales:
+        option_values = scale_options(sample_options, scale)
+        for (decoder_name, decode) in decoders:
+            timings = \
+                benchmark_decoder(decode, option_values, parsed_arguments.repeat)
+            results.append(
+                summarize_timings(
+                    timings,
+                    scale=scale,
+                    size=len(option_values),
+                    decoder=decoder_name,
+                    ),
+                )
+            print(
+                '%6d options  %-20s best %.6fs' % (
+                    len(option_values),
+                    decoder_name,
+                    min(timings),
+                    ),
+                file=sys.stderr,
+                )
+
+    report = {
+        'environment': get_environment(
+            package_path=os.path.dirname(django_pastedeploy_settings.__file__),
+            json_backends=get_available_backend_names(),
+            ),
+        'parameters': {
+            'config_file': parsed_arguments.config_file,
+            'sample_option_count': len(sample_options),
+            'scales': parsed_arguments.scales,
+            'repeat': parsed_arguments.repeat,
+            },
+        'results': results,
+        }
+    write_report(report, parsed_arguments.output)
+
+
+def load_sample_options(config_file_path):
+    """
+    Return the options in the application section of the PasteDeploy
+    configuration file at ``config_file_path``, with references resolved.
+
+    """
+    config_parser = RawConfigParser()
+    config_parser.optionxform = str
+    config_parser.read(config_file_path)
+
+    local_conf = {}
+    for option_name, option_value in \
+            config_parser.items(_SAMPLE_APP_SECTION_NAME):
+        if option_name not in _GLOBAL_OPTIONS and option_name != 'use':
+            local_conf[option_name] = option_value
+
+    return _get_option_values_dereferenced(_GLOBAL_OPTIONS, local_conf)
+
+
+def scale_options(options, scale):
+    """
+    Return the values in ``options`` replicated ``scale`` times, in a stable
+    order.
+
+    """
+    option_values = [options[option_name] for option_name in sorted(options)]
+    return option_values * scale
+
+
+def get_decoders():
+    """
+    Return the name and decoding function of :func:`json.loads` and each
+    backend installed.
+
+    """
+    decoders = [(_BASELINE_DECODER_NAME, parse_json)]
+    for backend_name in get_available_backend_names():
+        json_decoder = JSONDecoder(backend_name)
+        decoders.append(('JSONDecoder(%s)' % backend_name, json_decoder.decode))
+    return decoders
+
+
+def benchmark_decoder(decode, option_values, repeat):
+    """Time the decoding of ``option_values`` ``repeat`` times."""
+    timings = []
+    for _ in range(repeat):
+        start_time = default_timer()
+        for option_value in option_values:
+            decode(option_value)
+        timings.append(default_timer() - start_time)
+    return timings
+
+
+def _get_argument_parser():
+    argument_parser = ArgumentParser(description=__doc__.split('\n\n')[0])
+    argument_parser.add_argument(
+        '--config-file',
+        default=_SAMPLE_CONFIG_FILE_PATH,
+        help='Path to the configuration file whose options are replicated '
+            '(default: the sample in the documentation)',
+        )
+    argument_parser.add_argument(
+        '--scales',
+        type=parse_integers,
+        default=list(_DEFAULT_SCALES),
+        help='Comma-separated numbers of copies of the options '
+            '(default: %(default)s)',
+        )
+    argument_parser.add_argument(
+        '--repeat',
+        type=int,
+        default=5,
+        help='Number of times each decoder is timed (default: %(default)s)',
+        )
+    argument_parser.add_argument(
+        '--output',
+        default='-',
+        help='Path to the JSON report; "-" for stdout (default: %(default)s)',
+        )
+    return argument_parser
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,265 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+##############################################################################
+#
+# Copyright (c) 2016, 2degrees Limited.
+# All Rights Reserved.
+#
+# This file is part of django-pastedeploy-settings
+# <https://github.com/2degrees/django-pastedeploy-settings>, which is subject
+# to the provisions of the BSD at
+# <http://dev.2degreesnetwork.com/p/2degrees-license.html>. A copy of the
+# license should accompany this distribution. THIS SOFTWARE IS PROVIDED "AS IS"
+# AND ANY AND ALL EXPRESS OR IMPLIED WARRANTIES ARE DISCLAIMED, INCLUDING, BUT
+# NOT LIMITED TO, THE IMPLIED WARRANTIES OF TITLE, MERCHANTABILITY, AGAINST
+# INFRINGEMENT, AND FITNESS FOR A PARTICULAR PURPOSE.
+#
+##############################################################################
+"""
+Microbenchmarks for the resolution of PasteDeploy options into Django
+settings.
+
+Each stage of :func:`django_pastedeploy_settings.resolve_local_conf_options`
+is timed on synthetic configurations and the results are written as JSON, so
+that they can be compared across releases::
+
+    python benchmarks/settings_resolution.py --sizes 10,1000 --output out.json
+
+"""
+from __future__ import print_function
+
+from argparse import ArgumentParser
+from json import dumps as convert_to_json
+import os
+from random import Random
+import sys
+from timeit import default_timer
+from types import ModuleType
+
+from _reporting import get_environment
+from _reporting import parse_integers
+from _reporting import summarize_timings
+from _reporting import write_report
+
+_ROOT_DIRECTORY = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, _ROOT_DIRECTORY)
+
+import django_pastedeploy_settings
+from django_pastedeploy_settings import \
+    _get_django_settings_module_from_global_conf
+from django_pastedeploy_settings import _get_option_values_dereferenced
+from django_pastedeploy_settings import _get_option_values_parsed
+from django_pastedeploy_settings import _require_supported_options_only
+from django_pastedeploy_settings import _store_django_settings
+from django_pastedeploy_settings import _validate_global_debug_data
+from django_pastedeploy_settings import _validate_local_debug_data
+from django_pastedeploy_settings import resolve_local_conf_options
+
+
+_DEFAULT_SIZES = (10, 100, 1000, 10000, 50000)
+
+_SETTINGS_MODULE_NAME = '_benchmark_settings'
+
+_GLOBAL_OPTIONS = {
+    'base_path': '/srv/project',
+    'host': 'db.example.com',
+    'port': '5432',
+    }
+
+
+def main(arguments=None):
+    argument_parser = _get_argument_parser()
+    parsed_arguments = argument_parser.parse_args(arguments)
+
+    results = []
+    for size in parsed_arguments.sizes:
+        global_conf, local_conf = generate_configuration(
+            size,
+            parsed_arguments.reference_density,
+            parsed_arguments.value_size,
+            parsed_arguments.seed,
+            )
+        for (stage_name, stage_timings) in \
+                benchmark_stages(global_conf, local_conf, parsed_arguments.repeat):
+            results.append(
+                summarize_timings(stage_timings, size=size, stage=stage_name),
+                )
+            print(
+                '%6d options  %-28s best %.6fs' % (
+                    size,
+                    stage_name,
+                    min(stage_timings),
+                    ),
+                file=sys.stderr,
+                )
+
+    report = {
+        'environment': get_environment(
+            package_path=os.path.dirname(django_pastedeploy_settings.__file__),
+            ),
+        'parameters': {
+            'sizes': parsed_arguments.sizes,
+            'reference_density': parsed_arguments.reference_density,
+            'value_size': parsed_arguments.value_size,
+            'repeat': parsed_arguments.repeat,
+            'seed': parsed_arguments.seed,
+            },
+        'results': results,
+        }
+    write_report(report, parsed_arguments.output)
+
+
+def generate_configuration(size, reference_density, value_size, seed=0):
+    """
+    Return a ``global_conf`` and ``local_conf`` pair with ``size`` options.
+
+    A proportion ``reference_density`` of the options refer to global
+    options or to preceding local options, and the remaining ones are JSON
+    strings of ``value_size`` characters.
+
+    """
+    random = Random(seed)
+
+    global_conf = dict(
+        _GLOBAL_OPTIONS,
+        debug='false',
+        django_settings_module=_SETTINGS_MODULE_NAME,
+        )
+
+    local_conf = {}
+    option_names = []
+    for option_index in range(size):
+        option_name = 'SETTING_%05d' % option_index
+
+        if option_names and random.random() < reference_density:
+            if random.random() < 0.5:
+                global_option_name = random.choice(sorted(_GLOBAL_OPTIONS))
+                option_value = \
+                    '"${%s}/%s"' % (global_option_name, 'x' * value_size)
+            else:
+                referenced_option_name = random.choice(option_names)
+                option_value = '{"value": ${%s}}' % referenced_option_name
+        else:
+            option_value = convert_to_json('x' * value_size)
+
+        local_conf[option_name] = option_value
+        option_names.append(option_name)
+
+    return global_conf, local_conf
+
+
+def benchmark_stages(global_conf, local_conf, repeat):
+    """
+    Time each stage of the resolution of ``local_conf`` ``repeat`` times.
+
+    :return: Pairs made up of the stage name and the timings in seconds
+
+    """
+    local_conf_with_debug = dict(local_conf, DEBUG=global_conf['debug'])
+    dereferenced_options = \
+        _get_option_values_dereferenced(global_conf, local_conf_with_debug)
+    parsed_options = _get_option_values_parsed(dereferenced_options)
+
+    stages = (
+        (
+            'validate_debug_data',
+            lambda: _validate_debug_data(global_conf, local_conf),
+            ),
+        (
+            'require_supported_options',
+            lambda: _require_supported_options_only(local_conf),
+            ),
+        (
+            'dereference',
+            lambda: _get_option_values_dereferenced(
+                global_conf,
+                local_conf_with_debug,
+                ),
+            ),
+        (
+            'parse_json',
+            lambda: _get_option_values_parsed(dereferenced_options),
+            ),
+        (
+            'store_django_settings',
+            lambda: _store_django_settings(
+                parsed_options,
+                _install_settings_module(),
+                ),
+            ),
+        (
+            'resolve_local_conf_options',
+            lambda: resolve_local_conf_options(global_conf, local_conf),
+            ),
+        )
+
+    for (stage_name, stage) in stages:
+        stage_timings = []
+        for _ in range(repeat):
+            _install_settings_module()
+            start_time = default_timer()
+            stage()
+            stage_timings.append(default_timer() - start_time)
+        yield stage_name, stage_timings
+
+
+def _validate_debug_data(global_conf, local_conf):
+    """
+    Validate the debug options as each resolution used to do, before the
+    global options were validated once per
+    :class:`~django_pastedeploy_settings.LoadContext`.
+
+    """
+    _get_django_settings_module_from_global_conf(global_conf)
+    _validate_local_debug_data(local_conf)
+    _validate_global_debug_data(global_conf)
+
+
+def _install_settings_module():
+    settings_module = ModuleType(_SETTINGS_MODULE_NAME)
+    sys.modules[_SETTINGS_MODULE_NAME] = settings_module
+    return settings_module
+
+
+def _get_argument_parser():
+    argument_parser = ArgumentParser(description=__doc__.split('\n\n')[0])
+    argument_parser.add_argument(
+        '--sizes',
+        type=parse_integers,
+        default=list(_DEFAULT_SIZES),
+        help='Comma-separated numbers of options (default: %(default)s)',
+        )
+    argument_parser.add_argument(
+        '--reference-density',
+        type=float,
+        default=0.2,
+        help='Proportion of options with references (default: %(default)s)',
+        )
+    argument_parser.add_argument(
+        '--value-size',
+        type=int,
+        default=32,
+        help='Length of the generated string values (default: %(default)s)',
+        )
+    argument_parser.add_argument(
+        '--repeat',
+        type=int,
+        default=5,
+        help='Number of times each stage is timed (default: %(default)s)',
+        )
+    argument_parser.add_argument(
+        '--seed',
+        type=int,
+        default=0,
+        help='Seed for the generated configurations (default: %(default)s)',
+        )
+    argument_parser.add_argument(
+        '--output',
+        default='-',
+        help='Path to the JSON report; "-" for stdout (default: %(default)s)',
+        )
+    return argument_parser
+
+
+if __name__ == '__main__':
+    main()
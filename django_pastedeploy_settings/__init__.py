@@ -18,18 +18,44 @@
 Utilities to set up Django applications, both in Web and CLI environments.
 
 """
-from json import loads as parse_json
 from logging import getLogger
 import os
 import re
+import sys
+from types import ModuleType
 
+try:
+    from collections.abc import MutableMapping
+except ImportError:  # Python 2
+    from collections import MutableMapping
+
+from paste.deploy.converters import asbool
 from paste.deploy.loadwsgi import appconfig
 
+from django_pastedeploy_settings.caching import get_settings_cache_key
+from django_pastedeploy_settings.caching import SettingsCache
+from django_pastedeploy_settings.decoding import JSONDecoder
+from django_pastedeploy_settings.instrumentation import collect_startup_report
+from django_pastedeploy_settings.instrumentation import measure_phase
+from django_pastedeploy_settings.interning import MUTABLE_SETTINGS
+from django_pastedeploy_settings.interning import ValueInterner
+from django_pastedeploy_settings.loading import install_loader_cache
+from django_pastedeploy_settings.merging import \
+    get_default_merge_strategy_name
+from django_pastedeploy_settings.merging import MERGE_STRATEGIES
+from django_pastedeploy_settings.merging import parse_merge_strategies
+from django_pastedeploy_settings.reloading import RESTART_REQUIRED_SETTINGS
+from django_pastedeploy_settings.reloading import SettingsReload
+
 
 # The order is important to Sphinx' autodoc extension.
 __all__ = [
     'resolve_local_conf_options',
     'get_configured_django_wsgi_app',
+    'get_configured_django_asgi_app',
+    'get_load_context',
+    'LoadContext',
+    'LazilyDecodedOptions',
     'BadDebugFlagError',
     'InvalidSettingValueError',
     'MissingDjangoSettingsModuleError',
@@ -41,6 +67,9 @@ __all__ = [
 _LOGGER = getLogger(__name__)
 
 
+_DEFAULT_JSON_DECODER = JSONDecoder()
+
+
 _OPTION_REFERENCE_REGEX = re.compile(r"""
     (?P<escape_character>\$)?
     \$
@@ -65,7 +94,7 @@ def resolve_local_conf_options(global_conf, local_conf):
         ``debug``.
     :return: ``local_conf`` with its values deserialized from JSON and
         variable references resolved
-    :rtype: :class:`dict`
+    :rtype: :class:`dict` or :class:`LazilyDecodedOptions`
 
     The result also includes the following items:
 
@@ -73,19 +102,36 @@ def resolve_local_conf_options(global_conf, local_conf):
     - ``paste_configuration_file``: The path to the PasteDeploy configuration
       file used.
 
-    """
-    _validate_debug_data(global_conf, local_conf)
-    _require_supported_options_only(local_conf)
+    If the global option ``django_settings_cache_dir`` is set, the result is
+    cached in that directory and reused for as long as the configuration
+    file, ``global_conf`` and ``local_conf`` remain unchanged.
+
+    If the global option ``django_compiled_settings`` is set, the result is
+    read from the Python module at that path, as written by
+    :func:`~django_pastedeploy_settings.compiling.compile_settings`, unless
+    the configuration changed since it was compiled.
+
+    If the global option ``django_lazy_settings`` is enabled, the values are
+    only deserialized from JSON when they're first used (see
+    :class:`LazilyDecodedOptions`). Invalid values would then go unnoticed
+    until they're used, unless the global option
+    ``django_lazy_settings_validate`` is enabled too.
+
+    Values are decoded with the JSON parser named in the global option
+    ``django_json_backend`` (see
+    :class:`~django_pastedeploy_settings.decoding.JSONDecoder`). If the
+    global option ``django_json_strict`` is disabled, values which aren't
+    valid JSON are kept as strings instead of being rejected.
 
-    local_conf = dict(local_conf, DEBUG=global_conf['debug'])
-    local_conf_resolved = \
-        _get_option_values_dereferenced(global_conf, local_conf)
-    local_conf_resolved = _get_option_values_parsed(local_conf_resolved)
+    The time spent in each phase is recorded in a
+    :class:`~django_pastedeploy_settings.instrumentation.StartupReport`.
 
-    # Make the PasteDeploy configuration file path available
-    local_conf_resolved['paste_configuration_file'] = \
-        global_conf.get('__file__')
+    This is a shortcut for :meth:`LoadContext.resolve_local_conf_options`.
 
+    """
+    with collect_startup_report():
+        load_context = get_load_context(global_conf)
+        local_conf_resolved = load_context.resolve_local_conf_options(local_conf)
     return local_conf_resolved
 
 
@@ -100,10 +146,607 @@ def get_configured_django_wsgi_app(global_conf, **local_conf):
     result as Django settings. Any exceptions raised by that function are also
     propagated.
 
+    The application is warmed up with
+    :func:`~django_pastedeploy_settings.warmup.warm_up` before it's returned
+    if the global option ``django_warm_up_paths`` lists paths to request, or
+    if ``django_warm_up_connections`` is enabled. The global option
+    ``django_warm_up_host`` sets the host of those requests.
+
+    If the global option ``django_prefork`` is enabled, the current process
+    is prepared to be forked by the WSGI server with
+    :func:`~django_pastedeploy_settings.prefork.prepare_for_fork`.
+
+    The time spent in each phase is recorded in a
+    :class:`~django_pastedeploy_settings.instrumentation.StartupReport`, which
+    is logged as a warning if it exceeds the number of seconds set in the
+    global option ``django_startup_report_threshold``.
+
+    If the global option ``django_config_loader_cache`` is enabled, the
+    PasteDeploy configuration files loaded afterwards are parsed once with
+    :func:`~django_pastedeploy_settings.loading.install_loader_cache`.
+
+    If the global option ``django_background_loading`` is enabled, all of the
+    above happens in a background thread and a
+    :class:`~django_pastedeploy_settings.background.BackgroundLoadingApplication`
+    is returned straightaway, configured with the global options
+    ``django_background_loading_timeout``,
+    ``django_background_loading_retry_after`` and
+    ``django_background_loading_health_check_paths``. Exceptions are then
+    logged instead of propagated.
+
+    """
+    if asbool(global_conf.get('django_background_loading', False)):
+        wsgi_application = \
+            _make_background_loading_app(global_conf, local_conf)
+    else:
+        wsgi_application = _load_django_app(
+            global_conf,
+            local_conf,
+            'wsgi_application',
+            _get_django_wsgi_app,
+            )
+    return wsgi_application
+
+
+def get_configured_django_asgi_app(global_conf, **local_conf):
+    """
+    Load the Django application for use in an ASGI server.
+
+    :return: The ASGI application for Django as returned by
+        :func:`django.core.asgi.get_asgi_application`.
+    :raises ImportError: If the version of Django in use doesn't support ASGI
+        (i.e., before Django 3.0).
+
+    The settings are set up exactly like in
+    :func:`get_configured_django_wsgi_app`, including the handling of the
+    global options, so the same configuration can be served by WSGI and ASGI
+    servers at once.
+
+    """
+    asgi_application = _load_django_app(
+        global_conf,
+        local_conf,
+        'asgi_application',
+        _get_django_asgi_app,
+        # Warming up Django's WSGI handler initialises the same state as the
+        # ASGI one
+        _get_django_wsgi_app,
+        )
+    return asgi_application
+
+
+def get_load_context(global_conf):
+    """
+    Return the :class:`LoadContext` for ``global_conf``.
+
+    The same context is returned for all the applications whose global
+    options are the same (e.g., those defined in the same PasteDeploy
+    configuration file), as long as their settings module hasn't been
+    reloaded.
+
+    """
+    try:
+        load_context_key = tuple(sorted(global_conf.items()))
+        load_context = _LOAD_CONTEXTS.get(load_context_key)
+    except TypeError:
+        # Some global option values are unhashable
+        load_context_key = None
+        load_context = None
+
+    is_load_context_current = load_context is not None and \
+        load_context.django_settings_module is \
+        sys.modules.get(load_context.django_settings_module.__name__)
+    if not is_load_context_current:
+        load_context = LoadContext(global_conf)
+        if load_context_key is not None:
+            _LOAD_CONTEXTS[load_context_key] = load_context
+
+    return load_context
+
+
+_LOAD_CONTEXTS = {}
+
+
+class LoadContext(object):
     """
-    _set_up_settings(global_conf, local_conf)
+    Global state for the Django applications configured with
+    ``global_conf``.
+
+    The Django settings module is imported and the global options validated
+    once, when the context is created, and then shared by all the
+    applications loaded with this context.
+
+    :raises ImportError: If the Django settings module cannot be imported.
+    :raises MissingDjangoSettingsModuleError: If the ``django_settings_module``
+        option is not set.
+    :raises BadDebugFlagError: If the settings module defines ``DEBUG`` or
+        Paste's ``debug`` is not set.
+    :raises InvalidSettingValueError: If the ``django_merge_strategies``,
+        ``django_json_backend`` or ``django_startup_report_threshold`` option
+        is invalid.
+
+    Use :func:`get_load_context` to reuse existing contexts.
+
+    .. attribute:: value_interner
+
+        The :class:`~django_pastedeploy_settings.interning.ValueInterner`
+        which deduplicates the decoded values, if the global option
+        ``django_frozen_settings`` is enabled, or :data:`None` otherwise.
+
+    .. attribute:: startup_report_threshold
+
+        The number of seconds set in the global option
+        ``django_startup_report_threshold``, or :data:`None` if it's not set.
+
+    """
+
+    def __init__(self, global_conf):
+        super(LoadContext, self).__init__()
+
+        self.global_conf = global_conf
+
+        with measure_phase('validation'):
+            self.django_settings_module = \
+                _get_django_settings_module_from_global_conf(global_conf)
+            _validate_global_debug_data(global_conf)
+            self._merge_strategy_names = \
+                _get_merge_strategy_names(global_conf)
+            self._json_decoder = _get_json_decoder(global_conf)
+            self.startup_report_threshold = \
+                _get_startup_report_threshold(global_conf)
+
+        self._settings_cache = _get_settings_cache(global_conf)
+        self._compiled_settings_path = \
+            global_conf.get('django_compiled_settings')
+
+        if asbool(global_conf.get('django_frozen_settings', False)):
+            self.value_interner = ValueInterner()
+        else:
+            self.value_interner = None
+
+    def resolve_local_conf_options(self, local_conf):
+        """
+        Return the final values for the items in ``local_conf``.
+
+        See :func:`resolve_local_conf_options` for more information.
+
+        """
+        value_interner = self.value_interner
+        # Values are only shared within a resolution, so that the values of
+        # the previous ones aren't kept alive (e.g., across reloads)
+        if value_interner is not None:
+            value_interner.clear()
+
+        with collect_startup_report():
+            if self._compiled_settings_path:
+                local_conf_resolved = self._get_compiled_options(local_conf)
+            else:
+                local_conf_resolved = None
+
+            if local_conf_resolved is None:
+                if self._settings_cache:
+                    local_conf_resolved = self._get_cached_options(local_conf)
+                else:
+                    local_conf_resolved = \
+                        self._resolve_local_conf_options(local_conf)
+
+        # Lazily decoded values are still to be shared with each other
+        is_resolution_complete = \
+            not isinstance(local_conf_resolved, LazilyDecodedOptions)
+        if value_interner is not None and is_resolution_complete:
+            value_interner.clear()
+
+        return local_conf_resolved
+
+    def set_up_settings(self, local_conf):
+        """
+        Store the options in ``local_conf`` in the Django settings module
+        and make it the settings module used by Django.
+
+        """
+        _set_django_settings_module(self.django_settings_module)
+
+        options = self.resolve_local_conf_options(local_conf)
+        with measure_phase('storage'):
+            stored_settings = _get_stored_settings(self.django_settings_module)
+            stored_settings.record_options(options)
+            _store_django_settings(
+                options,
+                self.django_settings_module,
+                self._merge_strategy_names,
+                )
+
+    def reload_settings(self, local_conf):
+        """
+        Store the options in ``local_conf`` whose values changed since they
+        were last stored in the Django settings module, and update Django's
+        settings object accordingly.
+
+        The options which changed are merged again with the values originally
+        defined in the settings module. Those in
+        :data:`~django_pastedeploy_settings.reloading.RESTART_REQUIRED_SETTINGS`
+        are left untouched, as are the options which were removed.
+
+        :rtype: :class:`~django_pastedeploy_settings.reloading.SettingsReload`
+
+        """
+        django_settings_module = self.django_settings_module
+        stored_settings = _get_stored_settings(django_settings_module)
+
+        new_options = self.resolve_local_conf_options(local_conf)
+        changed_option_names = \
+            stored_settings.get_changed_option_names(new_options)
+        removed_option_names = \
+            stored_settings.get_removed_option_names(new_options)
+
+        reloadable_options = {}
+        restart_required_option_names = set(removed_option_names)
+        for option_name in changed_option_names:
+            if option_name in RESTART_REQUIRED_SETTINGS:
+                restart_required_option_names.add(option_name)
+            else:
+                reloadable_options[option_name] = new_options[option_name]
+
+        for option_name in reloadable_options:
+            stored_settings.restore_original_value(option_name)
+        _store_django_settings(
+            reloadable_options,
+            django_settings_module,
+            self._merge_strategy_names,
+            )
+        stored_settings.record_options(reloadable_options)
+
+        _update_django_settings_object(
+            reloadable_options,
+            django_settings_module,
+            )
+
+        return SettingsReload(reloadable_options, restart_required_option_names)
+
+    def _get_compiled_options(self, local_conf):
+        from django_pastedeploy_settings.compiling import \
+            load_compiled_options
+
+        with measure_phase('compiled_settings_lookup'):
+            local_conf_resolved = load_compiled_options(
+                self._compiled_settings_path,
+                self.global_conf,
+                local_conf,
+                )
+
+        if local_conf_resolved is not None:
+            local_conf_resolved = self._intern_options(local_conf_resolved)
+        return local_conf_resolved
+
+    def _get_cached_options(self, local_conf):
+        # Only plain dictionaries are cached: The raw values when they're
+        # decoded lazily, and the decoded values otherwise
+        is_lazy = asbool(self.global_conf.get('django_lazy_settings', False))
+
+        with measure_phase('cache_lookup'):
+            settings_cache_key = \
+                get_settings_cache_key(self.global_conf, local_conf)
+            cached_options = self._settings_cache.get(settings_cache_key)
+
+        if cached_options is None:
+            if is_lazy:
+                cached_options = \
+                    self._get_local_conf_options_dereferenced(local_conf)
+                local_conf_resolved = \
+                    self._get_local_conf_options_decoded(cached_options)
+            else:
+                local_conf_resolved = \
+                    self._resolve_local_conf_options(local_conf)
+                cached_options = local_conf_resolved
+            self._settings_cache.set(settings_cache_key, cached_options)
+        elif is_lazy:
+            local_conf_resolved = \
+                self._get_local_conf_options_decoded(cached_options)
+        else:
+            local_conf_resolved = self._intern_options(cached_options)
+
+        return local_conf_resolved
+
+    def _intern_options(self, options):
+        if self.value_interner is None:
+            return options
+
+        return {
+            option_name: _intern_option_value(
+                option_name,
+                option_value,
+                self.value_interner,
+                )
+            for option_name, option_value in options.items()
+            }
+
+    def _resolve_local_conf_options(self, local_conf):
+        local_conf_dereferenced = \
+            self._get_local_conf_options_dereferenced(local_conf)
+        return self._get_local_conf_options_decoded(local_conf_dereferenced)
+
+    def _get_local_conf_options_dereferenced(self, local_conf):
+        global_conf = self.global_conf
+
+        with measure_phase('validation'):
+            _validate_local_debug_data(local_conf)
+            _require_supported_options_only(local_conf)
+
+        local_conf = dict(local_conf, DEBUG=global_conf['debug'])
+        with measure_phase('dereferencing'):
+            local_conf_dereferenced = \
+                _get_option_values_dereferenced(global_conf, local_conf)
+        return local_conf_dereferenced
+
+    def _get_local_conf_options_decoded(self, local_conf_dereferenced):
+        global_conf = self.global_conf
+
+        with measure_phase('parsing'):
+            if asbool(global_conf.get('django_lazy_settings', False)):
+                local_conf_resolved = LazilyDecodedOptions(
+                    local_conf_dereferenced,
+                    self.value_interner,
+                    self._json_decoder,
+                    )
+                if asbool(global_conf.get('django_lazy_settings_validate', False)):
+                    local_conf_resolved.decode_all()
+            else:
+                local_conf_resolved = _get_option_values_parsed(
+                    local_conf_dereferenced,
+                    self.value_interner,
+                    self._json_decoder,
+                    )
+
+        # Make the PasteDeploy configuration file path available
+        local_conf_resolved['paste_configuration_file'] = \
+            global_conf.get('__file__')
+
+        return local_conf_resolved
+
+
+def _get_settings_cache(global_conf):
+    settings_cache_directory = global_conf.get('django_settings_cache_dir')
+    if settings_cache_directory:
+        settings_cache = SettingsCache(settings_cache_directory)
+    else:
+        settings_cache = None
+    return settings_cache
+
+
+def _get_stored_settings(django_settings_module):
+    stored_settings = _STORED_SETTINGS.get(django_settings_module.__name__)
+    is_stored_settings_current = stored_settings is not None and \
+        stored_settings.django_settings_module is django_settings_module
+    if not is_stored_settings_current:
+        stored_settings = _StoredSettings(django_settings_module)
+        _STORED_SETTINGS[django_settings_module.__name__] = stored_settings
+    return stored_settings
+
+
+# Settings stored in each Django settings module, by module name
+_STORED_SETTINGS = {}
+
+
+_MISSING = object()
+
+
+class _StoredSettings(object):
+    """
+    Options stored in a Django settings module, along with the values that
+    the module defined originally.
+
+    The mappings the options come from are kept, instead of their values, so
+    that options which are decoded lazily are not decoded prematurely.
+
+    """
+
+    def __init__(self, django_settings_module):
+        super(_StoredSettings, self).__init__()
+
+        self.django_settings_module = django_settings_module
+        self._options_by_name = {}
+        self._original_values = {}
+        self._original_module_class = django_settings_module.__class__
+
+    def record_options(self, options):
+        module_attributes = self.django_settings_module.__dict__
+        for option_name in options:
+            self._options_by_name[option_name] = options
+            if option_name not in self._original_values:
+                self._original_values[option_name] = \
+                    module_attributes.get(option_name, _MISSING)
+
+    def get_changed_option_names(self, new_options):
+        changed_option_names = []
+        for option_name, option_value in new_options.items():
+            options = self._options_by_name.get(option_name)
+            if options is None or options[option_name] != option_value:
+                changed_option_names.append(option_name)
+        return changed_option_names
+
+    def get_removed_option_names(self, new_options):
+        return [
+            option_name
+            for option_name in self._options_by_name
+            if option_name not in new_options
+            ]
+
+    def restore_original_value(self, option_name):
+        django_settings_module = self.django_settings_module
+        module_attributes = django_settings_module.__dict__
+        module_attributes.pop(option_name, None)
+
+        lazy_settings = module_attributes.get('__lazy_settings__')
+        if lazy_settings is not None:
+            lazy_settings.pop(option_name, None)
+            # Settings are no longer decoded lazily once none are left
+            if not lazy_settings:
+                del module_attributes['__lazy_settings__']
+                django_settings_module.__class__ = \
+                    self._original_module_class
+
+        original_value = self._original_values.get(option_name, _MISSING)
+        if original_value is not _MISSING:
+            module_attributes[option_name] = original_value
+
+
+def _update_django_settings_object(options, django_settings_module):
+    from django.conf import settings
+    if not settings.configured:
+        return
+
+    new_setting_values = {
+        option_name: getattr(django_settings_module, option_name)
+        for option_name in options
+        if option_name.isupper()
+        }
+
+    # Store all the values at once, so that they're never seen half-updated,
+    # and then discard the values cached by Django's settings object
+    settings._wrapped.__dict__.update(new_setting_values)
+    for setting_name in new_setting_values:
+        settings.__dict__.pop(setting_name, None)
+
+    from django_pastedeploy_settings.reloading import setting_reloaded
+    for setting_name, setting_value in new_setting_values.items():
+        setting_reloaded.send(
+            sender=settings._wrapped.__class__,
+            setting=setting_name,
+            value=setting_value,
+            )
+
+
+def _get_merge_strategy_names(global_conf):
+    merge_strategies_spec = global_conf.get('django_merge_strategies', '')
+    try:
+        merge_strategy_names = parse_merge_strategies(merge_strategies_spec)
+    except ValueError as exc:
+        raise InvalidSettingValueError(
+            'Invalid option "django_merge_strategies": %s' % exc,
+            )
+    return merge_strategy_names
+
+
+def _get_json_decoder(global_conf):
+    json_backend_name = global_conf.get('django_json_backend', 'auto')
+    is_json_strict = asbool(global_conf.get('django_json_strict', True))
+    try:
+        json_decoder = JSONDecoder(json_backend_name, is_json_strict)
+    except ValueError as exc:
+        raise InvalidSettingValueError(
+            'Invalid option "django_json_backend": %s' % exc,
+            )
+    return json_decoder
+
+
+def _get_startup_report_threshold(global_conf):
+    threshold = global_conf.get('django_startup_report_threshold')
+    if threshold is not None:
+        try:
+            threshold = float(threshold)
+        except ValueError as exc:
+            raise InvalidSettingValueError(
+                'Invalid option "django_startup_report_threshold": %s' % exc,
+                )
+    return threshold
+
+
+def _make_background_loading_app(global_conf, local_conf):
+    if asbool(global_conf.get('django_prefork', False)):
+        raise InvalidSettingValueError(
+            'Options "django_background_loading" and "django_prefork" cannot '
+            'be enabled at once',
+            )
+
+    try:
+        timeout = \
+            float(global_conf.get('django_background_loading_timeout', 0))
+        retry_after = global_conf.get('django_background_loading_retry_after')
+        if retry_after is not None:
+            retry_after = int(retry_after)
+    except ValueError as exc:
+        raise InvalidSettingValueError(
+            'Invalid background loading option: %s' % exc,
+            )
+    health_check_paths = global_conf.get(
+        'django_background_loading_health_check_paths',
+        '',
+        ).split()
+
+    from django_pastedeploy_settings.background import \
+        BackgroundLoadingApplication
+
+    def load_django_app():
+        return _load_django_app(
+            global_conf,
+            local_conf,
+            'wsgi_application',
+            _get_django_wsgi_app,
+            )
+
+    background_loading_app = BackgroundLoadingApplication(
+        load_django_app,
+        timeout,
+        retry_after,
+        health_check_paths,
+        )
+    background_loading_app.start()
+    return background_loading_app
+
+
+def _install_loader_cache(global_conf):
+    if asbool(global_conf.get('django_config_loader_cache', False)):
+        install_loader_cache()
+
+
+def _log_slow_startup(threshold, startup_report):
+    if threshold is None:
+        return
+
+    total_wall_time = startup_report.total_wall_time
+    if threshold < total_wall_time:
+        _LOGGER.warning(
+            'Start-up took %.3f seconds:\n%s',
+            total_wall_time,
+            startup_report.format(),
+            )
+
+
+def _load_django_app(global_conf, local_conf, phase_name, get_django_app,
+                     get_wsgi_app_to_warm_up=None):
+    _install_loader_cache(global_conf)
 
-    return _get_django_wsgi_app()
+    with collect_startup_report() as startup_report:
+        load_context = get_load_context(global_conf)
+        load_context.set_up_settings(local_conf)
+
+        with measure_phase(phase_name):
+            django_app = get_django_app()
+
+        warm_up_paths = global_conf.get('django_warm_up_paths', '').split()
+        open_connections = \
+            asbool(global_conf.get('django_warm_up_connections', False))
+        if warm_up_paths or open_connections:
+            from django_pastedeploy_settings.warmup import warm_up
+            if get_wsgi_app_to_warm_up:
+                wsgi_app_to_warm_up = get_wsgi_app_to_warm_up()
+            else:
+                wsgi_app_to_warm_up = django_app
+            warm_up(
+                wsgi_app_to_warm_up,
+                warm_up_paths,
+                open_connections,
+                global_conf.get('django_warm_up_host'),
+                )
+
+        if asbool(global_conf.get('django_prefork', False)):
+            from django_pastedeploy_settings.prefork import prepare_for_fork
+            with measure_phase('prefork'):
+                prepare_for_fork()
+
+    _log_slow_startup(load_context.startup_report_threshold, startup_report)
+
+    return django_app
 
 
 def _get_django_wsgi_app():
@@ -114,19 +757,22 @@ def _get_django_wsgi_app():
     return wsgi_application
 
 
+def _get_django_asgi_app():
+    # The following module can only be imported after the settings have been
+    # set.
+    from django.core.asgi import get_asgi_application
+    asgi_application = get_asgi_application()
+    return asgi_application
+
+
 def _set_up_settings(global_conf, local_conf):
     """
     Add the PasteDeploy options ``global_conf`` and ``local_conf`` to the
     Django settings module.
 
     """
-    django_settings_module = \
-        _get_django_settings_module_from_global_conf(global_conf)
-
-    _set_django_settings_module(django_settings_module)
-
-    options = resolve_local_conf_options(global_conf, local_conf)
-    _store_django_settings(options, django_settings_module)
+    load_context = get_load_context(global_conf)
+    load_context.set_up_settings(local_conf)
 
 
 def _set_django_settings_module(django_settings_module):
@@ -142,36 +788,147 @@ def _get_django_settings_module_from_global_conf(global_conf):
             'The "django_settings_module" option is not set',
             )
 
-    django_settings_module = _get_module(django_settings_module_name)
+    django_settings_module = _get_django_settings_module(
+        django_settings_module_name,
+        )
+    return django_settings_module
+
+
+def _get_django_settings_module(django_settings_module_name):
+    """
+    Return the settings module named ``django_settings_module_name``, once it
+    has been validated.
+
+    Settings modules are only validated the first time they're imported,
+    before the settings from the PasteDeploy configuration are stored in
+    them.
+
+    """
+    django_settings_module = \
+        _VALIDATED_DJANGO_SETTINGS_MODULES.get(django_settings_module_name)
+    is_django_settings_module_current = \
+        django_settings_module is not None and \
+        django_settings_module is sys.modules.get(django_settings_module_name)
+    if not is_django_settings_module_current:
+        django_settings_module = _get_module(django_settings_module_name)
+        _validate_django_settings_module(django_settings_module)
+        _VALIDATED_DJANGO_SETTINGS_MODULES[django_settings_module_name] = \
+            django_settings_module
+
     return django_settings_module
 
 
+_VALIDATED_DJANGO_SETTINGS_MODULES = {}
+
+
 def _get_module(module_qualified_name):
     # We need the module name for __import__ to work properly:
     # http://stackoverflow.com/questions/211100/pythons-import-doesnt-work-as-expected
     module_name = module_qualified_name.split('.')[-1]
-    module = __import__(module_qualified_name, fromlist=[module_name])
+    with measure_phase('module_lookup'):
+        module = __import__(module_qualified_name, fromlist=[module_name])
     return module
 
 
-def _store_django_settings(settings_dict, django_settings_module):
+def _store_django_settings(settings_dict, django_settings_module,
+                           merge_strategy_names=None):
+    """
+    Store the settings in ``settings_dict`` in ``django_settings_module``,
+    merging them with the settings already defined there.
+
+    The strategy used to merge each setting is taken from
+    ``merge_strategy_names`` or, failing that, from the type of the value in
+    the settings module.
+
+    """
+    if isinstance(settings_dict, LazilyDecodedOptions):
+        settings_dict = \
+            _store_lazy_django_settings(settings_dict, django_settings_module)
+
+    merge_strategy_names = merge_strategy_names or {}
     for (setting_name, setting_value) in settings_dict.items():
         try:
             existing_setting_value = \
                 getattr(django_settings_module, setting_name)
         except AttributeError:
             setattr(django_settings_module, setting_name, setting_value)
+            continue
+
+        merge_strategy_name = merge_strategy_names.get(setting_name) or \
+            get_default_merge_strategy_name(existing_setting_value)
+        if merge_strategy_name:
+            merge_strategy = MERGE_STRATEGIES[merge_strategy_name]
+            merged_setting_value = \
+                merge_strategy(existing_setting_value, setting_value)
         else:
-            if isinstance(existing_setting_value, (tuple, list)):
-                new_tuple = tuple(existing_setting_value) + tuple(setting_value)
-                setattr(django_settings_module, setting_name, new_tuple)
-            else:
-                # The name is already used and it's not an iterable
-                _LOGGER.warn(
-                    '"%s" will not be overridden in %s',
-                    setting_name,
-                    django_settings_module.__name__,
-                    )
+            merged_setting_value = NotImplemented
+
+        if merged_setting_value is NotImplemented:
+            _LOGGER.warn(
+                '"%s" will not be overridden in %s',
+                setting_name,
+                django_settings_module.__name__,
+                )
+        else:
+            setattr(django_settings_module, setting_name, merged_setting_value)
+
+
+def _store_lazy_django_settings(settings_dict, django_settings_module):
+    """
+    Defer the decoding of the settings in ``settings_dict`` which are not
+    yet defined in ``django_settings_module`` until they're first accessed.
+
+    Return the settings which must be stored straightaway.
+
+    """
+    if not isinstance(django_settings_module, _LazySettingsModule):
+        try:
+            django_settings_module.__class__ = _LazySettingsModule
+        except TypeError:
+            # Modules' classes cannot be changed in this version of Python
+            return settings_dict
+
+    lazy_settings = django_settings_module.__dict__.setdefault(
+        '__lazy_settings__',
+        {},
+        )
+    eager_settings = {}
+    for setting_name in settings_dict:
+        is_setting_defined = setting_name in lazy_settings or \
+            setting_name in django_settings_module.__dict__
+        if is_setting_defined or settings_dict.is_decoded(setting_name):
+            eager_settings[setting_name] = settings_dict[setting_name]
+        else:
+            lazy_settings[setting_name] = settings_dict
+
+    return eager_settings
+
+
+class _LazySettingsModule(ModuleType):
+    """
+    Django settings module whose settings from the PasteDeploy configuration
+    are decoded on first access.
+
+    Django's settings object reads the upper case settings when it's set up,
+    so only those with lower case names remain undecoded past that point.
+
+    """
+
+    def __getattr__(self, name):
+        lazy_settings = self.__dict__.get('__lazy_settings__', {})
+        try:
+            options = lazy_settings[name]
+        except KeyError:
+            raise AttributeError(name)
+
+        value = options[name]
+        setattr(self, name, value)
+        del lazy_settings[name]
+        return value
+
+    def __dir__(self):
+        lazy_settings = self.__dict__.get('__lazy_settings__', {})
+        return sorted(set(self.__dict__) | set(lazy_settings))
 
 
 # Built-in Django settings not currently supported by this plugin
@@ -182,21 +939,23 @@ _DJANGO_UNSUPPORTED_SETTINGS = frozenset([
     ])
 
 
-def _validate_debug_data(global_conf, local_conf):
-    django_settings_module = \
-        _get_django_settings_module_from_global_conf(global_conf)
+def _validate_django_settings_module(django_settings_module):
     if hasattr(django_settings_module, 'DEBUG'):
         raise BadDebugFlagError(
             'Settings modules must not define "DEBUG". It must be set in the '
                 'PasteDesploy configuration file as "debug".',
             )
 
+
+def _validate_local_debug_data(local_conf):
     if 'DEBUG' in local_conf:
         raise BadDebugFlagError(
             'Django\'s "DEBUG" setting must not be set in the configuration '
                 'file; use Paste\'s "debug" instead',
             )
 
+
+def _validate_global_debug_data(global_conf):
     if "debug" not in global_conf:
         raise BadDebugFlagError(
             'Paste\'s "debug" option must be set in the configuration file',
@@ -213,55 +972,301 @@ def _require_supported_options_only(local_conf):
 
 
 def _get_option_values_dereferenced(global_conf, local_conf):
-    options = {}
-    for local_option_name, local_option_value in local_conf.items():
-        try:
-            local_option_value_dereferrenced = _OPTION_REFERENCE_REGEX.sub(
-                lambda match: _resolve_option_reference(match, global_conf),
-                local_option_value,
-                )
-        except _NonExistingReferencedOptionError as exc:
-            raise InvalidSettingValueError(
-                'Option "%s" references non-existing global option "%s"' % (
-                    local_option_name,
-                    exc,
-                    ),
-                )
+    """
+    Return ``local_conf`` with the references to global and local options
+    replaced with their values.
 
-        options[local_option_name] = local_option_value_dereferrenced
+    References to global options take precedence. Local options may refer to
+    each other, as long as they don't do so in a circular fashion.
 
+    """
+    resolver = _OptionReferenceResolver(global_conf, local_conf)
+    options = {}
+    for local_option_name in local_conf:
+        options[local_option_name] = resolver.resolve(local_option_name)
     return options
 
 
-def _resolve_option_reference(reference_match, options):
-    is_escaping = bool(reference_match.group('escape_character'))
-    if is_escaping:
-        replacement = reference_match.group(0)[1:]
-    else:
-        referenced_option_name = reference_match.group('referenced_option_name')
+class _OptionReference(object):
+
+    __slots__ = ('option_name', )
+
+    def __init__(self, option_name):
+        self.option_name = option_name
+
+
+class _OptionReferenceResolver(object):
+    """
+    Resolver of the references in local options, each of which is resolved
+    at most once.
+
+    """
+
+    def __init__(self, global_conf, local_conf):
+        super(_OptionReferenceResolver, self).__init__()
+
+        self._global_conf = global_conf
+        self._local_conf = local_conf
+
+        self._tokens_by_option_name = {}
+        self._tokens_by_value = {}
+        self._resolved_values = {}
+
+    def resolve(self, option_name):
+        """
+        Return the value of the local option ``option_name`` with all the
+        references in it resolved.
+
+        The local options it refers to are resolved first, in depth-first
+        order.
+
+        """
+        pending_option_names = [option_name]
+        # The names of the options whose dependencies are being resolved,
+        # along with their position in the stack of pending options
+        option_names_in_progress = {}
+        while pending_option_names:
+            current_option_name = pending_option_names[-1]
+            if current_option_name in self._resolved_values:
+                pending_option_names.pop()
+                continue
+
+            unresolved_dependencies = [
+                dependency for dependency in
+                self._get_local_dependencies(current_option_name)
+                if dependency not in self._resolved_values
+                ]
+            if unresolved_dependencies:
+                option_names_in_progress[current_option_name] = \
+                    len(pending_option_names)
+                for dependency in unresolved_dependencies:
+                    if dependency in option_names_in_progress:
+                        _raise_circular_reference_error(
+                            dependency,
+                            option_names_in_progress,
+                            )
+                pending_option_names.extend(unresolved_dependencies)
+            else:
+                self._resolved_values[current_option_name] = \
+                    self._get_value_dereferenced(current_option_name)
+                option_names_in_progress.pop(current_option_name, None)
+                pending_option_names.pop()
+
+        return self._resolved_values[option_name]
+
+    def _get_local_dependencies(self, option_name):
+        dependencies = []
+        for token in self._get_tokens(option_name) or ():
+            if isinstance(token, _OptionReference):
+                referenced_option_name = token.option_name
+                is_local_reference = \
+                    referenced_option_name not in self._global_conf and \
+                    referenced_option_name in self._local_conf
+                if is_local_reference:
+                    dependencies.append(referenced_option_name)
+        return dependencies
+
+    def _get_value_dereferenced(self, option_name):
+        tokens = self._get_tokens(option_name)
+        if tokens is None:
+            return self._local_conf[option_name]
+
+        value_parts = []
+        for token in tokens:
+            if isinstance(token, _OptionReference):
+                token = self._get_referenced_value(option_name, token)
+            value_parts.append(token)
+        return ''.join(value_parts)
+
+    def _get_referenced_value(self, option_name, reference):
+        referenced_option_name = reference.option_name
+        if referenced_option_name in self._global_conf:
+            referenced_value = self._global_conf[referenced_option_name]
+        elif referenced_option_name in self._resolved_values:
+            referenced_value = self._resolved_values[referenced_option_name]
+        else:
+            raise _NonExistingReferencedOptionError(
+                'Option "%s" references non-existing option "%s"' % (
+                    option_name,
+                    referenced_option_name,
+                    ),
+                )
+        return referenced_value
+
+    def _get_tokens(self, option_name):
+        """
+        Return the literal strings and references making up the value of
+        ``option_name``, or :data:`None` if it contains no references.
+
+        """
         try:
-            referenced_option_value = options[referenced_option_name]
+            tokens = self._tokens_by_option_name[option_name]
         except KeyError:
-            raise _NonExistingReferencedOptionError(referenced_option_name)
-        replacement = referenced_option_value
+            option_value = self._local_conf[option_name]
+            try:
+                tokens = self._tokens_by_value[option_value]
+            except KeyError:
+                tokens = _tokenize_option_value(option_value)
+                self._tokens_by_value[option_value] = tokens
+            self._tokens_by_option_name[option_name] = tokens
+        return tokens
+
+
+def _raise_circular_reference_error(option_name, option_names_in_progress):
+    # The options in progress are the ancestors of the option which is
+    # currently being resolved, so the cycle starts with "option_name"
+    cycle_start = option_names_in_progress[option_name]
+    option_names_in_cycle = sorted(
+        (name for (name, position) in option_names_in_progress.items()
+         if cycle_start <= position),
+        key=option_names_in_progress.get,
+        )
+    option_names_in_cycle.append(option_name)
+
+    raise InvalidSettingValueError(
+        'Options reference each other in a circular fashion: %s' %
+            ' -> '.join('"%s"' % name for name in option_names_in_cycle),
+        )
+
+
+def _tokenize_option_value(option_value):
+    if '$' not in option_value:
+        return None
+
+    tokens = []
+    literal_start = 0
+    for reference_match in _OPTION_REFERENCE_REGEX.finditer(option_value):
+        tokens.append(option_value[literal_start:reference_match.start()])
+
+        is_escaping = bool(reference_match.group('escape_character'))
+        if is_escaping:
+            tokens.append(reference_match.group(0)[1:])
+        else:
+            referenced_option_name = \
+                reference_match.group('referenced_option_name')
+            tokens.append(_OptionReference(referenced_option_name))
+
+        literal_start = reference_match.end()
+    tokens.append(option_value[literal_start:])
 
-    return replacement
+    return tuple(token for token in tokens if token != '')
 
 
-def _get_option_values_parsed(raw_options):
+def _get_option_values_parsed(raw_options, value_interner=None,
+                              json_decoder=None):
     options = {}
     for (option_name, option_value) in raw_options.items():
+        options[option_name] = _decode_option_value(
+            option_name,
+            option_value,
+            value_interner,
+            json_decoder,
+            )
+    return options
+
+
+def _decode_option_value(option_name, option_value, value_interner=None,
+                         json_decoder=None):
+    json_decoder = json_decoder or _DEFAULT_JSON_DECODER
+    try:
+        decoded_option_value = json_decoder.decode(option_value)
+    except ValueError:
+        raise InvalidSettingValueError(
+            'Could not decode value for option %r: %r' % (
+                option_name,
+                option_value,
+                ),
+            )
+
+    if value_interner is not None:
+        decoded_option_value = _intern_option_value(
+            option_name,
+            decoded_option_value,
+            value_interner,
+            )
+    return decoded_option_value
+
+
+def _intern_option_value(option_name, option_value, value_interner):
+    if option_name in MUTABLE_SETTINGS:
+        interned_option_value = option_value
+    else:
+        interned_option_value = value_interner.intern(option_value)
+    return interned_option_value
+
+
+class LazilyDecodedOptions(MutableMapping):
+    """
+    Mapping of options whose values are deserialized from JSON when they're
+    first retrieved.
+
+    :raises InvalidSettingValueError: When retrieving an option whose value
+        cannot be decoded.
+
+    The values are deduplicated by ``value_interner``, if set (see
+    :class:`~django_pastedeploy_settings.interning.ValueInterner`), and
+    decoded by ``json_decoder`` (see
+    :class:`~django_pastedeploy_settings.decoding.JSONDecoder`).
+
+    """
+
+    def __init__(self, raw_options, value_interner=None, json_decoder=None):
+        super(LazilyDecodedOptions, self).__init__()
+        self._raw_options = dict(raw_options)
+        self._decoded_options = {}
+        self._value_interner = value_interner
+        self._json_decoder = json_decoder
+
+    def __getitem__(self, option_name):
         try:
-            decoded_option_value = parse_json(option_value)
-        except ValueError:
-            raise InvalidSettingValueError(
-                'Could not decode value for option %r: %r' % (
-                    option_name,
-                    option_value,
-                    ),
+            option_value = self._decoded_options[option_name]
+        except KeyError:
+            raw_option_value = self._raw_options[option_name]
+            option_value = _decode_option_value(
+                option_name,
+                raw_option_value,
+                self._value_interner,
+                self._json_decoder,
                 )
-        options[option_name] = decoded_option_value
-    return options
+            self._decoded_options[option_name] = option_value
+            del self._raw_options[option_name]
+        return option_value
+
+    def __setitem__(self, option_name, option_value):
+        self._raw_options.pop(option_name, None)
+        self._decoded_options[option_name] = option_value
+
+    def __delitem__(self, option_name):
+        if option_name in self._decoded_options:
+            del self._decoded_options[option_name]
+        else:
+            del self._raw_options[option_name]
+
+    def __iter__(self):
+        # Values may be decoded during the iteration, so iterate over a copy
+        option_names = list(self._decoded_options) + list(self._raw_options)
+        return iter(option_names)
+
+    def __len__(self):
+        return len(self._decoded_options) + len(self._raw_options)
+
+    def __contains__(self, option_name):
+        return option_name in self._decoded_options or \
+            option_name in self._raw_options
+
+    def is_decoded(self, option_name):
+        """Report whether the value of ``option_name`` has been decoded."""
+        return option_name in self._decoded_options
+
+    def decode_all(self):
+        """
+        Decode all the pending values.
+
+        :raises InvalidSettingValueError: If any value cannot be decoded.
+
+        """
+        for option_name in list(self._raw_options):
+            self[option_name]
 
 
 #{ Exceptions
@@ -0,0 +1,40 @@
+# -*- coding: utf-8 -*-
+##############################################################################
+#
+# Copyright (c) 2016, 2degrees Limited.
+# All Rights Reserved.
+#
+# This file is part of django-pastedeploy-settings
+# <https://github.com/2degrees/django-pastedeploy-settings>, which is subject
+# to the provisions of the BSD at
+# <http://dev.2degreesnetwork.com/p/2degrees-license.html>. A copy of the
+# license should accompany this distribution. THIS SOFTWARE IS PROVIDED "AS IS"
+# AND ANY AND ALL EXPRESS OR IMPLIED WARRANTIES ARE DISCLAIMED, INCLUDING, BUT
+# NOT LIMITED TO, THE IMPLIED WARRANTIES OF TITLE, MERCHANTABILITY, AGAINST
+# INFRINGEMENT, AND FITNESS FOR A PARTICULAR PURPOSE.
+#
+##############################################################################
+"""
+WSGI utilities shared by the applications in this package.
+
+"""
+
+
+__all__ = ['respond']
+
+
+def respond(start_response, status, headers=None):
+    """
+    Start a plain text response whose body is ``status``, or an empty one if
+    ``status`` is ``304 Not Modified``, and return the body.
+
+    """
+    headers = list(headers or [])
+    if not status.startswith('304'):
+        headers.append(('Content-Type', 'text/plain'))
+        headers.append(('Content-Length', str(len(status))))
+        body = [status.encode('ascii')]
+    else:
+        body = []
+    start_response(status, headers)
+    return body
@@ -0,0 +1,200 @@
+# -*- coding: utf-8 -*-
+##############################################################################
+#
+# Copyright (c) 2016, 2degrees Limited.
+# All Rights Reserved.
+#
+# This file is part of django-pastedeploy-settings
+# <https://github.com/2degrees/django-pastedeploy-settings>, which is subject
+# to the provisions of the BSD at
+# <http://dev.2degreesnetwork.com/p/2degrees-license.html>. A copy of the
+# license should accompany this distribution. THIS SOFTWARE IS PROVIDED "AS IS"
+# AND ANY AND ALL EXPRESS OR IMPLIED WARRANTIES ARE DISCLAIMED, INCLUDING, BUT
+# NOT LIMITED TO, THE IMPLIED WARRANTIES OF TITLE, MERCHANTABILITY, AGAINST
+# INFRINGEMENT, AND FITNESS FOR A PARTICULAR PURPOSE.
+#
+##############################################################################
+"""
+Loading of WSGI applications in the background, so that the server can start
+listening straightaway.
+
+"""
+from logging import getLogger
+import os
+from threading import Event
+from threading import Lock
+from threading import Thread
+from weakref import ref as make_weak_reference
+
+from django_pastedeploy_settings._wsgi import respond
+
+
+__all__ = ['BackgroundLoadingApplication']
+
+
+_LOGGER = getLogger(__name__)
+
+
+class BackgroundLoadingApplication(object):
+    """
+    WSGI application which loads the application returned by
+    ``load_application`` in a background thread, and then passes the
+    requests on to it.
+
+    :param load_application: A callable which takes no arguments and returns
+        the WSGI application.
+    :param timeout: The maximum number of seconds that requests received
+        whilst loading wait for the application to be loaded.
+    :param retry_after: The number of seconds set in the header
+        ``Retry-After`` of the ``503 Service Unavailable`` responses, if any.
+    :param health_check_paths: The paths answered with ``200 OK`` whilst
+        loading, so that the process is considered alive.
+
+    Loading starts when :meth:`start` is called, or failing that when the
+    first request is received. Processes forked before loading finished
+    (e.g., by servers which load the application before forking the workers)
+    start loading again straightaway, since the thread doesn't survive the
+    fork. On versions of Python which can't run code after forks (before
+    3.7), they start loading when they receive their first request instead,
+    and the health checks are only answered once loading has started.
+
+    Requests received whilst loading are answered with
+    ``503 Service Unavailable`` if the application isn't loaded within
+    ``timeout`` seconds. If loading fails, the error is logged and all the
+    requests are answered with ``500 Internal Server Error``.
+
+    """
+
+    def __init__(self, load_application, timeout=0, retry_after=None,
+                 health_check_paths=()):
+        super(BackgroundLoadingApplication, self).__init__()
+
+        self.timeout = timeout
+        self.retry_after = retry_after
+        self.health_check_paths = frozenset(health_check_paths)
+
+        self.application = None
+        self.loading_error = None
+
+        self._load_application = load_application
+        self._application_wrappers = []
+        self._application_lock = Lock()
+        self._loaded_event = Event()
+        self._start_lock = Lock()
+        self._loading_process_id = None
+
+        if hasattr(os, 'register_at_fork'):
+            weak_self = make_weak_reference(self)
+            os.register_at_fork(
+                after_in_child=lambda: _restart_after_fork(weak_self),
+                )
+
+    def start(self):
+        """
+        Start loading the application in a background thread, unless it's
+        already loaded or being loaded in the current process.
+
+        """
+        with self._start_lock:
+            if self.is_loaded:
+                return
+
+            process_id = os.getpid()
+            if self._loading_process_id == process_id:
+                return
+
+            if self._loading_process_id is not None:
+                # The process was forked whilst loading, and the thread that
+                # would have set the event in the parent isn't running here
+                self._loaded_event = Event()
+            self._loading_process_id = process_id
+
+            thread = Thread(
+                target=self._load_application_logging_errors,
+                name='BackgroundLoadingApplication',
+                )
+            thread.daemon = True
+            thread.start()
+
+    def wrap_application(self, wrapper):
+        """
+        Replace the application with the WSGI application returned by
+        ``wrapper``, called with the application once it's been loaded (or
+        straightaway if it's already loaded).
+
+        Requests are never passed on to the application before it's wrapped.
+
+        """
+        with self._application_lock:
+            self._application_wrappers.append(wrapper)
+            if self.application is not None:
+                self.application = wrapper(self.application)
+
+    def wait(self, timeout=None):
+        """
+        Wait for the application to be loaded, or for loading to fail, for up
+        to ``timeout`` seconds.
+
+        :return: Whether loading finished.
+
+        """
+        self._loaded_event.wait(timeout)
+        return self.is_loaded
+
+    @property
+    def is_loaded(self):
+        """Whether loading finished, successfully or not."""
+        return self._loaded_event.is_set()
+
+    def __call__(self, environ, start_response):
+        application = self.application
+        if application is not None:
+            return application(environ, start_response)
+
+        if not self.is_loaded:
+            self.start()
+
+            if environ.get('PATH_INFO') in self.health_check_paths:
+                return respond(start_response, '200 OK')
+
+            if not self.wait(self.timeout):
+                headers = []
+                if self.retry_after is not None:
+                    headers.append(('Retry-After', str(self.retry_after)))
+                return respond(
+                    start_response,
+                    '503 Service Unavailable',
+                    headers,
+                    )
+
+        application = self.application
+        if application is None:
+            return respond(start_response, '500 Internal Server Error')
+        return application(environ, start_response)
+
+    def _load_application_logging_errors(self):
+        try:
+            application = self._load_application()
+            with self._application_lock:
+                for application_wrapper in self._application_wrappers:
+                    application = application_wrapper(application)
+                self.application = application
+        except Exception as exc:
+            self.loading_error = exc
+            _LOGGER.exception('Could not load the application')
+        finally:
+            self._loaded_event.set()
+
+    def _restart_after_fork(self):
+        # Only the forking thread survives, so the locks may never be
+        # released if other threads held them
+        self._start_lock = Lock()
+        self._application_lock = Lock()
+        if self._loading_process_id is not None:
+            self.start()
+
+
+def _restart_after_fork(weak_background_loading_application):
+    background_loading_application = weak_background_loading_application()
+    if background_loading_application is not None:
+        background_loading_application._restart_after_fork()
@@ -14,11 +14,14 @@
 #
 ##############################################################################
 from deployrecipes import ConfvarsRecipe
+from zc.buildout import UserError
 
+from django_pastedeploy_settings import InvalidSettingValueError
 from django_pastedeploy_settings import resolve_local_conf_options
+from django_pastedeploy_settings.compiling import compile_settings
 
 
-__all__ = ['DecodedConfvarsRecipe']
+__all__ = ['CompiledSettingsRecipe', 'DecodedConfvarsRecipe']
 
 
 class DecodedConfvarsRecipe(ConfvarsRecipe):
@@ -41,3 +44,42 @@ class DecodedConfvarsRecipe(ConfvarsRecipe):
             variables_with_str_values[variable_name] = str(variable_value)
 
         return variables_with_str_values
+
+
+class CompiledSettingsRecipe(object):
+    """
+    Recipe to compile PasteDeploy-based Django settings into a Python module
+    at build time.
+
+    The configuration URI is set in ``config_uri``, and optionally the
+    name of the application in ``app_name`` and the path to the module in
+    ``output`` (which defaults to the global option
+    ``django_compiled_settings``).
+
+    """
+
+    def __init__(self, buildout, name, options):
+        super(CompiledSettingsRecipe, self).__init__()
+
+        self.name = name
+        self.options = options
+
+        if not options.get('config_uri'):
+            raise UserError(
+                "Part [%s] must define the PasteDeploy config URI in "
+                "'config_uri'" % name,
+                )
+
+    def install(self):
+        options = self.options
+        try:
+            output_path = compile_settings(
+                options['config_uri'],
+                options.get('output'),
+                options.get('app_name'),
+                )
+        except InvalidSettingValueError as exc:
+            raise UserError('Part [%s]: %s' % (self.name, exc))
+        return [output_path]
+
+    update = install
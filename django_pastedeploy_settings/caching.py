@@ -0,0 +1,211 @@
+# -*- coding: utf-8 -*-
+##############################################################################
+#
+# Copyright (c) 2016, 2degrees Limited.
+# All Rights Reserved.
+#
+# This file is part of django-pastedeploy-settings
+# <https://github.com/2degrees/django-pastedeploy-settings>, which is subject
+# to the provisions of the BSD at
+# <http://dev.2degreesnetwork.com/p/2degrees-license.html>. A copy of the
+# license should accompany this distribution. THIS SOFTWARE IS PROVIDED "AS IS"
+# AND ANY AND ALL EXPRESS OR IMPLIED WARRANTIES ARE DISCLAIMED, INCLUDING, BUT
+# NOT LIMITED TO, THE IMPLIED WARRANTIES OF TITLE, MERCHANTABILITY, AGAINST
+# INFRINGEMENT, AND FITNESS FOR A PARTICULAR PURPOSE.
+#
+##############################################################################
+"""
+On-disk cache of resolved PasteDeploy options.
+
+"""
+from hashlib import sha1
+from logging import getLogger
+import os
+import pickle
+import re
+import sys
+from tempfile import NamedTemporaryFile
+
+
+__all__ = ['SettingsCache', 'get_settings_cache_key']
+
+
+_LOGGER = getLogger(__name__)
+
+
+_CACHE_FILE_EXTENSION = '.pickle'
+
+
+_DIRECTORY_MARKER = '%(here)s'
+
+
+_STRING_TYPES = (str, type(u''))
+
+
+# Characters which may surround a path in an option value, such as the quotes
+# of a JSON string or the separators of a list
+_PATH_DELIMITERS = r'\s"\',:;=\[\]{}()'
+
+
+def get_settings_cache_key(global_conf, local_conf, relocatable=False):
+    """
+    Return the key for the options resolved from ``global_conf`` and
+    ``local_conf``.
+
+    The key covers the contents of the PasteDeploy configuration file (if
+    any), ``global_conf`` (which contains the name of the Django settings
+    module), ``local_conf`` and the version of Python in use, so it changes
+    whenever any of them does.
+
+    If ``relocatable`` is enabled, the directory of the configuration file
+    is left out of the option values, so that the key remains the same when
+    the directory is moved along with the files referenced from it.
+
+    """
+    config_file_path = global_conf.get('__file__')
+    if relocatable:
+        config_directory_path = global_conf.get('here')
+        global_conf = \
+            _get_options_without_directory(global_conf, config_directory_path)
+        local_conf = \
+            _get_options_without_directory(local_conf, config_directory_path)
+
+    hash_ = sha1()
+    _update_hash(hash_, sys.version_info[:2])
+    _update_hash(hash_, global_conf.get('django_settings_module'))
+    _update_hash(hash_, sorted(global_conf.items()))
+    _update_hash(hash_, sorted(local_conf.items()))
+
+    if config_file_path:
+        try:
+            with open(config_file_path, 'rb') as config_file:
+                hash_.update(config_file.read())
+        except (IOError, OSError):
+            _update_hash(hash_, None)
+
+    return hash_.hexdigest()
+
+
+def _update_hash(hash_, value):
+    hash_.update(repr(value).encode('utf-8'))
+
+
+def _get_options_without_directory(options, directory_path):
+    if not directory_path:
+        return options
+
+    options_without_directory = {}
+    for option_name, option_value in options.items():
+        if isinstance(option_value, _STRING_TYPES):
+            option_value = _replace_directory_path(
+                option_value,
+                directory_path,
+                _DIRECTORY_MARKER,
+                )
+        options_without_directory[option_name] = option_value
+    return options_without_directory
+
+
+def _replace_directory_path(string, directory_path, new_directory_path):
+    """
+    Return ``string`` with ``new_directory_path`` in place of the paths to
+    ``directory_path`` and to the files within it.
+
+    Paths which merely start with the same characters (e.g., ``/srv/app2``
+    for ``/srv/app``) or contain them (e.g., ``/srv/app`` for ``/app``) are
+    left untouched.
+
+    """
+    directory_path_regex = re.compile(
+        r'(?<![^%(delimiters)s])%(path)s(?=%(separator)s|[%(delimiters)s]|$)'
+        % {
+            'delimiters': _PATH_DELIMITERS,
+            'path': re.escape(directory_path),
+            'separator': re.escape(os.sep),
+            },
+        )
+    return directory_path_regex.sub(lambda match: new_directory_path, string)
+
+
+class SettingsCache(object):
+    """
+    Cache of resolved options, stored as pickles in ``directory``.
+
+    Entries are never invalidated explicitly: Use
+    :func:`get_settings_cache_key` to compute the key, which changes when
+    any of the inputs changes.
+
+    """
+
+    def __init__(self, directory):
+        super(SettingsCache, self).__init__()
+        self.directory = directory
+
+    def get(self, key):
+        """
+        Return the options stored under ``key`` or :data:`None` if they
+        aren't cached.
+
+        """
+        cache_file_path = self._get_cache_file_path(key)
+        try:
+            with open(cache_file_path, 'rb') as cache_file:
+                options = pickle.load(cache_file)
+        except (IOError, OSError):
+            options = None
+        except Exception:
+            _LOGGER.warning(
+                'Ignoring corrupt settings cache file %s',
+                cache_file_path,
+                )
+            options = None
+        return options
+
+    def set(self, key, options):
+        """
+        Store ``options`` under ``key``.
+
+        Errors are logged instead of raised, including those raised when
+        ``options`` can't be pickled, and leave the cache unchanged.
+
+        """
+        cache_file_path = self._get_cache_file_path(key)
+        temporary_file_path = None
+        try:
+            if not os.path.isdir(self.directory):
+                os.makedirs(self.directory)
+
+            # Write to a temporary file first so that concurrent readers
+            # never see a partially-written entry
+            temporary_file = NamedTemporaryFile(
+                dir=self.directory,
+                suffix='.tmp',
+                delete=False,
+                )
+            temporary_file_path = temporary_file.name
+            with temporary_file:
+                pickle.dump(options, temporary_file, pickle.HIGHEST_PROTOCOL)
+            os.rename(temporary_file_path, cache_file_path)
+            temporary_file_path = None
+        except (IOError, OSError) as exc:
+            _LOGGER.warning(
+                'Could not write settings cache file %s: %s',
+                cache_file_path,
+                exc,
+                )
+        except (pickle.PicklingError, TypeError) as exc:
+            _LOGGER.warning('Could not cache the options: %s', exc)
+        finally:
+            if temporary_file_path:
+                _remove_file(temporary_file_path)
+
+    def _get_cache_file_path(self, key):
+        cache_file_name = key + _CACHE_FILE_EXTENSION
+        return os.path.join(self.directory, cache_file_name)
+
+
+def _remove_file(file_path):
+    try:
+        os.remove(file_path)
+    except OSError:
+        pass
@@ -0,0 +1,270 @@
+# -*- coding: utf-8 -*-
+##############################################################################
+#
+# Copyright (c) 2016, 2degrees Limited.
+# All Rights Reserved.
+#
+# This file is part of django-pastedeploy-settings
+# <https://github.com/2degrees/django-pastedeploy-settings>, which is subject
+# to the provisions of the BSD at
+# <http://dev.2degreesnetwork.com/p/2degrees-license.html>. A copy of the
+# license should accompany this distribution. THIS SOFTWARE IS PROVIDED "AS IS"
+# AND ANY AND ALL EXPRESS OR IMPLIED WARRANTIES ARE DISCLAIMED, INCLUDING, BUT
+# NOT LIMITED TO, THE IMPLIED WARRANTIES OF TITLE, MERCHANTABILITY, AGAINST
+# INFRINGEMENT, AND FITNESS FOR A PARTICULAR PURPOSE.
+#
+##############################################################################
+"""
+Compilation of resolved PasteDeploy options into a Python module, so that
+they don't have to be resolved at runtime.
+
+"""
+from argparse import ArgumentParser
+from ast import literal_eval
+from logging import getLogger
+import os
+from py_compile import compile as compile_python_file
+import sys
+from tempfile import NamedTemporaryFile
+
+from django_pastedeploy_settings.caching import _replace_directory_path
+from django_pastedeploy_settings.caching import _STRING_TYPES
+from django_pastedeploy_settings.caching import get_settings_cache_key
+
+
+__all__ = ['compile_settings', 'load_compiled_options']
+
+
+_LOGGER = getLogger(__name__)
+
+
+_COMPILED_SETTINGS_MODULE_NAME = '_django_pastedeploy_compiled_settings'
+
+
+_COMPILED_SETTINGS_MODULE_TEMPLATE = '''\
+# -*- coding: utf-8 -*-
+"""
+Options compiled by django-pastedeploy-settings from %(config_file_path)s.
+
+Do not edit this file: Compile the configuration again instead.
+
+"""
+SETTINGS_KEY = %(settings_key)r
+
+CONFIG_DIRECTORY = %(config_directory_path)r
+
+OPTIONS = {
+%(options)s}
+'''
+
+
+def compile_settings(config_uri, output_path=None, name=None,
+                     relative_to=None):
+    """
+    Resolve the options of the application ``name`` in the PasteDeploy
+    configuration at ``config_uri`` and write them as literals in the Python
+    module at ``output_path``, which is then byte-compiled.
+
+    :param output_path: The path to the module, which defaults to the value
+        of the global option ``django_compiled_settings``.
+    :return: The path to the module.
+    :raises InvalidSettingValueError: If ``output_path`` is not set and
+        neither is ``django_compiled_settings``, or if a value cannot be
+        written as a literal.
+
+    The other arguments are the same as in :func:`paste.deploy.appconfig`,
+    except that ``config_uri`` may also be the path to a configuration file.
+
+    """
+    from paste.deploy import appconfig
+
+    from django_pastedeploy_settings import get_load_context
+    from django_pastedeploy_settings import InvalidSettingValueError
+    from django_pastedeploy_settings.loading import _get_config_uri
+
+    app_config = appconfig(
+        _get_config_uri(config_uri),
+        name=name,
+        relative_to=relative_to,
+        )
+    global_conf = app_config.global_conf
+    local_conf = app_config.local_conf
+
+    output_path = output_path or global_conf.get('django_compiled_settings')
+    if not output_path:
+        raise InvalidSettingValueError(
+            'The path to the compiled settings is not set',
+            )
+
+    # Any existing module is bypassed, since it may be outdated
+    load_context = get_load_context(global_conf)
+    options = load_context._resolve_local_conf_options(local_conf)
+
+    module_source = _COMPILED_SETTINGS_MODULE_TEMPLATE % {
+        'config_file_path': global_conf.get('__file__'),
+        'settings_key': _get_settings_key(global_conf, local_conf),
+        'config_directory_path': global_conf.get('here'),
+        'options': _format_options(options),
+        }
+    _write_python_file(output_path, module_source)
+    return output_path
+
+
+def load_compiled_options(module_path, global_conf, local_conf):
+    """
+    Return the options stored in the module at ``module_path``, or
+    :data:`None` if the module doesn't exist or was compiled from a
+    different configuration than ``global_conf`` and ``local_conf``.
+
+    The module remains valid when the directory of the configuration file is
+    moved, in which case the paths to that directory in the options are
+    updated.
+
+    """
+    try:
+        compiled_settings_module = _load_python_file(module_path)
+    except (IOError, OSError):
+        _LOGGER.warning('Compiled settings %s do not exist', module_path)
+        return None
+
+    settings_key = _get_settings_key(global_conf, local_conf)
+    if compiled_settings_module.SETTINGS_KEY != settings_key:
+        _LOGGER.warning(
+            'Ignoring compiled settings %s because the configuration changed',
+            module_path,
+            )
+        return None
+
+    options = compiled_settings_module.OPTIONS
+    compiled_config_directory_path = compiled_settings_module.CONFIG_DIRECTORY
+    config_directory_path = global_conf.get('here')
+    if compiled_config_directory_path and \
+            compiled_config_directory_path != config_directory_path:
+        options = _relocate_value(
+            options,
+            compiled_config_directory_path,
+            config_directory_path,
+            )
+    return options
+
+
+def _get_settings_key(global_conf, local_conf):
+    return get_settings_cache_key(global_conf, local_conf, relocatable=True)
+
+
+def _relocate_value(value, old_directory_path, new_directory_path):
+    """
+    Return ``value`` with ``old_directory_path`` replaced with
+    ``new_directory_path`` in the paths it contains.
+
+    """
+    if isinstance(value, _STRING_TYPES):
+        return _replace_directory_path(
+            value,
+            old_directory_path,
+            new_directory_path,
+            )
+
+    if isinstance(value, dict):
+        return {
+            item_key: _relocate_value(
+                item_value,
+                old_directory_path,
+                new_directory_path,
+                )
+            for item_key, item_value in value.items()
+            }
+
+    if isinstance(value, (list, tuple, set, frozenset)):
+        return type(value)(
+            _relocate_value(item, old_directory_path, new_directory_path)
+            for item in value
+            )
+
+    return value
+
+
+def _format_options(options):
+    from django_pastedeploy_settings import InvalidSettingValueError
+
+    formatted_options = []
+    for option_name in sorted(options):
+        option_value = options[option_name]
+        option_value_literal = repr(option_value)
+        try:
+            literal_eval(option_value_literal)
+        except (SyntaxError, ValueError):
+            raise InvalidSettingValueError(
+                'Setting %r cannot be compiled: %s' % (
+                    option_name,
+                    option_value_literal,
+                    ),
+                )
+        formatted_options.append(
+            '    %r: %s,\n' % (option_name, option_value_literal),
+            )
+    return ''.join(formatted_options)
+
+
+def _write_python_file(file_path, source):
+    directory_path = os.path.dirname(os.path.abspath(file_path))
+    # Write to a temporary file first so that the processes starting
+    # meanwhile never see a partially-written module
+    temporary_file = NamedTemporaryFile(
+        dir=directory_path,
+        suffix='.tmp',
+        delete=False,
+        )
+    with temporary_file:
+        temporary_file.write(source.encode('utf-8'))
+    os.rename(temporary_file.name, file_path)
+
+    compile_python_file(file_path, doraise=True)
+
+
+def _load_python_file(file_path):
+    if not os.path.isfile(file_path):
+        raise IOError('No such file: %r' % file_path)
+
+    try:
+        from importlib.util import module_from_spec
+        from importlib.util import spec_from_file_location
+    except ImportError:  # Python 2
+        from imp import load_source
+        try:
+            module = load_source(_COMPILED_SETTINGS_MODULE_NAME, file_path)
+        finally:
+            sys.modules.pop(_COMPILED_SETTINGS_MODULE_NAME, None)
+    else:
+        module_spec = \
+            spec_from_file_location(_COMPILED_SETTINGS_MODULE_NAME, file_path)
+        module = module_from_spec(module_spec)
+        module_spec.loader.exec_module(module)
+    return module
+
+
+def main(argv=None):
+    """Entry point for the command :command:`paste-compile-settings`."""
+    argument_parser = ArgumentParser(
+        description='Compile the settings in a PasteDeploy configuration file '
+            'into a Python module',
+        )
+    argument_parser.add_argument('config_uri')
+    argument_parser.add_argument(
+        '--app-name',
+        help='The name of the application in the configuration file '
+            '(default: main)',
+        )
+    argument_parser.add_argument(
+        '--output',
+        help='The path to the module (default: the value of the option '
+            '"django_compiled_settings")',
+        )
+    arguments = argument_parser.parse_args(argv)
+
+    output_path = compile_settings(
+        arguments.config_uri,
+        arguments.output,
+        arguments.app_name,
+        )
+    print(output_path)
@@ -0,0 +1,205 @@
+# -*- coding: utf-8 -*-
+##############################################################################
+#
+# Copyright (c) 2016, 2degrees Limited.
+# All Rights Reserved.
+#
+# This file is part of django-pastedeploy-settings
+# <https://github.com/2degrees/django-pastedeploy-settings>, which is subject
+# to the provisions of the BSD at
+# <http://dev.2degreesnetwork.com/p/2degrees-license.html>. A copy of the
+# license should accompany this distribution. THIS SOFTWARE IS PROVIDED "AS IS"
+# AND ANY AND ALL EXPRESS OR IMPLIED WARRANTIES ARE DISCLAIMED, INCLUDING, BUT
+# NOT LIMITED TO, THE IMPLIED WARRANTIES OF TITLE, MERCHANTABILITY, AGAINST
+# INFRINGEMENT, AND FITNESS FOR A PARTICULAR PURPOSE.
+#
+##############################################################################
+"""
+Compression of static media files with gzip.
+
+"""
+from argparse import ArgumentParser
+from gzip import GzipFile
+from io import BytesIO
+import mimetypes
+from multiprocessing import Pool
+import os
+import re
+
+
+__all__ = [
+    'MIN_COMPRESSIBLE_FILE_SIZE',
+    'compress',
+    'is_compressible_content_type',
+    'precompress_directory',
+    ]
+
+
+MIN_COMPRESSIBLE_FILE_SIZE = 256
+"""
+The size in bytes of the smallest file worth compressing, below which the
+gzip header and trailer outweigh the savings.
+
+"""
+
+
+_COMPRESSIBLE_CONTENT_TYPE_REGEX = re.compile(
+    r'^(text/.+|application/(javascript|x-javascript|ecmascript|json|xml|'
+    r'manifest\+json)|.+\+xml|image/x-icon|font/(ttf|otf))$',
+    )
+
+
+_GZIP_FILE_EXTENSION = '.gz'
+
+
+def compress(data, compression_level=9):
+    """
+    Return ``data`` compressed with gzip.
+
+    The output only depends on ``data`` (e.g., no timestamp is included), so
+    compressing the same file twice produces the same bytes.
+
+    """
+    compressed_file = BytesIO()
+    gzip_file = GzipFile(
+        filename='',
+        mode='wb',
+        compresslevel=compression_level,
+        fileobj=compressed_file,
+        mtime=0,
+        )
+    try:
+        gzip_file.write(data)
+    finally:
+        gzip_file.close()
+    return compressed_file.getvalue()
+
+
+def is_compressible_content_type(content_type):
+    """Whether files of type ``content_type`` are worth compressing."""
+    return bool(_COMPRESSIBLE_CONTENT_TYPE_REGEX.match(content_type))
+
+
+def precompress_directory(root_directory, processes=None,
+                          min_file_size=MIN_COMPRESSIBLE_FILE_SIZE):
+    """
+    Write a gzip-compressed copy next to each compressible file in
+    ``root_directory``, with the extension ``.gz``, and return the paths to
+    the files compressed.
+
+    The files are compressed in parallel by ``processes`` processes (as many
+    as CPUs by default). Copies are only written for files no smaller than
+    ``min_file_size`` bytes which are smaller once compressed, and files
+    whose copy is up-to-date are skipped.
+
+    """
+    file_paths = \
+        list(_get_file_paths_to_compress(root_directory, min_file_size))
+    if not file_paths:
+        return []
+
+    pool = Pool(processes)
+    try:
+        compressed_file_paths = [
+            file_path
+            for file_path in pool.imap_unordered(_compress_file, file_paths)
+            if file_path
+            ]
+    finally:
+        pool.close()
+        pool.join()
+    return sorted(compressed_file_paths)
+
+
+def _get_file_paths_to_compress(root_directory, min_file_size):
+    for directory_path, _, file_names in os.walk(root_directory):
+        for file_name in file_names:
+            if file_name.endswith(_GZIP_FILE_EXTENSION):
+                continue
+
+            content_type = mimetypes.guess_type(file_name)[0]
+            if not content_type or \
+                    not is_compressible_content_type(content_type):
+                continue
+
+            file_path = os.path.join(directory_path, file_name)
+            try:
+                file_stat = os.stat(file_path)
+            except OSError:
+                continue
+            if file_stat.st_size < min_file_size:
+                continue
+
+            try:
+                compressed_file_stat = \
+                    os.stat(file_path + _GZIP_FILE_EXTENSION)
+            except OSError:
+                pass
+            else:
+                # Timestamps are compared to the second because utime() may
+                # not preserve them in full
+                if int(compressed_file_stat.st_mtime) == \
+                        int(file_stat.st_mtime):
+                    continue
+
+            yield file_path
+
+
+def _compress_file(file_path):
+    """
+    Write the compressed copy of the file at ``file_path`` and return the
+    path, or return :data:`None` if compression doesn't make it smaller.
+
+    The copy is given the modification time of the file, so that it can be
+    told apart from outdated copies. Any copy left by a previous run is
+    removed when compression is skipped, as it'd be outdated.
+
+    """
+    file_stat = os.stat(file_path)
+    with open(file_path, 'rb') as file_:
+        file_contents = file_.read()
+    compressed_file_contents = compress(file_contents)
+    compressed_file_path = file_path + _GZIP_FILE_EXTENSION
+    if len(file_contents) <= len(compressed_file_contents):
+        try:
+            os.remove(compressed_file_path)
+        except OSError:
+            pass
+        return None
+
+    temporary_file_path = '%s.%d.tmp' % (compressed_file_path, os.getpid())
+    with open(temporary_file_path, 'wb') as compressed_file:
+        compressed_file.write(compressed_file_contents)
+    os.utime(temporary_file_path, (file_stat.st_atime, file_stat.st_mtime))
+    os.rename(temporary_file_path, compressed_file_path)
+    return file_path
+
+
+def main(argv=None):
+    """Entry point for the command :command:`precompress-media`."""
+    argument_parser = ArgumentParser(
+        description='Write a gzip-compressed copy of each compressible file '
+            'in a media directory',
+        )
+    argument_parser.add_argument('root_directory')
+    argument_parser.add_argument(
+        '--processes',
+        type=int,
+        help='The number of files to compress at once (default: one per CPU)',
+        )
+    argument_parser.add_argument(
+        '--min-file-size',
+        type=int,
+        default=MIN_COMPRESSIBLE_FILE_SIZE,
+        help='The size in bytes of the smallest file to compress '
+            '(default: %(default)s)',
+        )
+    arguments = argument_parser.parse_args(argv)
+
+    compressed_file_paths = precompress_directory(
+        arguments.root_directory,
+        arguments.processes,
+        arguments.min_file_size,
+        )
+    for compressed_file_path in compressed_file_paths:
+        print(compressed_file_path)
@@ -0,0 +1,167 @@
+# -*- coding: utf-8 -*-
+##############################################################################
+#
+# Copyright (c) 2016, 2degrees Limited.
+# All Rights Reserved.
+#
+# This file is part of django-pastedeploy-settings
+# <https://github.com/2degrees/django-pastedeploy-settings>, which is subject
+# to the provisions of the BSD at
+# <http://dev.2degreesnetwork.com/p/2degrees-license.html>. A copy of the
+# license should accompany this distribution. THIS SOFTWARE IS PROVIDED "AS IS"
+# AND ANY AND ALL EXPRESS OR IMPLIED WARRANTIES ARE DISCLAIMED, INCLUDING, BUT
+# NOT LIMITED TO, THE IMPLIED WARRANTIES OF TITLE, MERCHANTABILITY, AGAINST
+# INFRINGEMENT, AND FITNESS FOR A PARTICULAR PURPOSE.
+#
+##############################################################################
+"""
+Decoding of JSON option values, with pluggable parsers.
+
+"""
+from importlib import import_module
+import json
+import re
+
+
+__all__ = ['JSON_BACKEND_NAMES', 'JSONDecoder', 'get_available_backend_names']
+
+
+JSON_BACKEND_NAMES = ('orjson', 'simplejson', 'json')
+"""
+Names of the modules which can parse JSON values, by order of preference.
+
+The standard library's :mod:`json` is always available, and the others are
+used when they're installed.
+
+"""
+
+
+_AUTOMATIC_BACKEND_NAME = 'auto'
+
+
+_STDLIB_BACKEND_NAME = 'json'
+
+
+_JSON_KEYWORDS = {'true': True, 'false': False, 'null': None}
+
+
+# Strings without escape sequences nor control characters, which the
+# standard library rejects by default
+_JSON_SIMPLE_STRING_REGEX = re.compile(r'"[^"\\\x00-\x1f]*"\Z')
+
+
+_JSON_NUMBER_REGEX = re.compile(r"""
+    -?
+    (0|[1-9][0-9]*)
+    (?P<fraction_or_exponent>(\.[0-9]+)?([eE][-+]?[0-9]+)?)
+    \Z
+    """,
+    re.VERBOSE,
+    )
+
+
+_NOT_A_SCALAR = object()
+
+
+class JSONDecoder(object):
+    """
+    Decoder of JSON values.
+
+    :param backend_name: The name of the module which parses the values, from
+        :data:`JSON_BACKEND_NAMES`, or ``auto`` to use the first one
+        installed.
+    :param strict: Whether values which aren't valid JSON are rejected, or
+        returned as is.
+    :raises ValueError: If the backend is unknown or isn't installed.
+
+    Scalar literals (e.g., ``true``, ``1`` or ``"en-gb"``) are decoded without
+    calling the backend. The values rejected by a backend other than
+    :mod:`json` are parsed again with :mod:`json`, so that the same values
+    are accepted regardless of the backend (e.g., ``NaN``).
+
+    """
+
+    def __init__(self, backend_name=_AUTOMATIC_BACKEND_NAME, strict=True):
+        super(JSONDecoder, self).__init__()
+
+        if backend_name == _AUTOMATIC_BACKEND_NAME:
+            backend_name = get_available_backend_names()[0]
+        elif backend_name not in JSON_BACKEND_NAMES:
+            raise ValueError('Unknown JSON backend %r' % backend_name)
+
+        self.backend_name = backend_name
+        self.strict = strict
+
+        try:
+            backend_module = import_module(backend_name)
+        except ImportError:
+            raise ValueError('JSON backend %r is not installed' % backend_name)
+        self._json_parsers = [backend_module.loads]
+        if backend_name != _STDLIB_BACKEND_NAME:
+            self._json_parsers.append(json.loads)
+
+    def decode(self, value):
+        """
+        Return the object represented by the JSON ``value``.
+
+        :raises ValueError: If ``value`` isn't valid JSON and decoding is
+            strict.
+
+        """
+        decoded_value = _decode_scalar(value)
+        if decoded_value is not _NOT_A_SCALAR:
+            return decoded_value
+
+        for parse_json in self._json_parsers:
+            try:
+                return parse_json(value)
+            except ValueError:
+                pass
+
+        if self.strict:
+            raise ValueError('%r is not valid JSON' % value)
+        return value
+
+
+def get_available_backend_names():
+    """
+    Return the names of the JSON backends installed, by order of preference.
+
+    """
+    available_backend_names = []
+    for backend_name in JSON_BACKEND_NAMES:
+        try:
+            import_module(backend_name)
+        except ImportError:
+            pass
+        else:
+            available_backend_names.append(backend_name)
+    return available_backend_names
+
+
+def _decode_scalar(value):
+    """
+    Return the scalar represented by the JSON literal ``value``, exactly as
+    :func:`json.loads` would, or ``_NOT_A_SCALAR`` if ``value`` is not a
+    scalar literal or its decoding requires the full parser (e.g., because of
+    escape sequences).
+
+    """
+    decoded_value = _JSON_KEYWORDS.get(value, _NOT_A_SCALAR)
+    if decoded_value is not _NOT_A_SCALAR:
+        return decoded_value
+
+    if value[:1] == '"':
+        if _JSON_SIMPLE_STRING_REGEX.match(value):
+            decoded_value = value[1:-1]
+            if isinstance(decoded_value, bytes):  # Python 2
+                decoded_value = decoded_value.decode('utf-8')
+        return decoded_value
+
+    number_match = _JSON_NUMBER_REGEX.match(value)
+    if number_match:
+        if number_match.group('fraction_or_exponent'):
+            decoded_value = float(value)
+        else:
+            decoded_value = int(value)
+    return decoded_value
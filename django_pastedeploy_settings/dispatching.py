@@ -0,0 +1,236 @@
+# -*- coding: utf-8 -*-
+##############################################################################
+#
+# Copyright (c) 2016, 2degrees Limited.
+# All Rights Reserved.
+#
+# This file is part of django-pastedeploy-settings
+# <https://github.com/2degrees/django-pastedeploy-settings>, which is subject
+# to the provisions of the BSD at
+# <http://dev.2degreesnetwork.com/p/2degrees-license.html>. A copy of the
+# license should accompany this distribution. THIS SOFTWARE IS PROVIDED "AS IS"
+# AND ANY AND ALL EXPRESS OR IMPLIED WARRANTIES ARE DISCLAIMED, INCLUDING, BUT
+# NOT LIMITED TO, THE IMPLIED WARRANTIES OF TITLE, MERCHANTABILITY, AGAINST
+# INFRINGEMENT, AND FITNESS FOR A PARTICULAR PURPOSE.
+#
+##############################################################################
+"""
+Dispatching of requests to the WSGI application mounted at the longest prefix
+of their path.
+
+"""
+import re
+
+from paste.httpexceptions import HTTPNotFound
+
+
+__all__ = ['PrefixDispatcher']
+
+
+_MULTIPLE_SLASHES_REGEX = re.compile('//+')
+
+
+_DOMAIN_URL_REGEX = re.compile('^(http|https)://')
+
+
+_DEFAULT_PORT_SUFFIXES = (':80', ':443')
+
+
+class PrefixDispatcher(object):
+    """
+    WSGI application which dispatches each request to the application mounted
+    at the longest prefix of its path, and a drop-in replacement for
+    :class:`paste.urlmap.URLMap`.
+
+    Applications are mounted like in a dictionary whose keys are paths
+    (e.g., ``dispatcher['/media'] = media_app``). Keys can be restricted to a
+    host, as in ``http://example.com/media`` or
+    ``('example.com', '/media')``, in which case they take precedence over
+    those without a host. Hosts are case-insensitive, and those with the
+    default port of HTTP or HTTPS (e.g., ``example.com:80``) are the same as
+    those without a port.
+
+    ``SCRIPT_NAME`` and ``PATH_INFO`` are adjusted like in
+    :class:`~paste.urlmap.URLMap`, and requests which don't match any prefix
+    are passed to ``not_found_app``, which responds with ``404 Not Found``
+    by default.
+
+    The prefixes are stored in a tree of path segments per host, so the cost
+    of dispatching a request only depends on the depth of its path.
+
+    """
+
+    def __init__(self, not_found_app=None):
+        super(PrefixDispatcher, self).__init__()
+
+        self.not_found_app = not_found_app or _respond_not_found
+
+        self._apps = {}
+        self._root_nodes_by_domain = {}
+
+    def __setitem__(self, url, app):
+        if app is None:
+            self._apps.pop(_normalize_url(url), None)
+            self._build_trees()
+            return
+
+        domain, app_url = _normalize_url(url)
+        self._apps[(domain, app_url)] = app
+
+        node = self._root_nodes_by_domain.setdefault(domain, _PrefixNode())
+        for path_segment in _get_path_segments(app_url):
+            node = node.child_nodes.setdefault(path_segment, _PrefixNode())
+        node.app_url = app_url
+        node.app = app
+
+    def __getitem__(self, url):
+        domain_and_app_url = _normalize_url(url)
+        try:
+            return self._apps[domain_and_app_url]
+        except KeyError:
+            raise KeyError(
+                'No application with the url %r (domain: %r)' % (
+                    domain_and_app_url[1],
+                    domain_and_app_url[0] or '*',
+                    ),
+                )
+
+    def __delitem__(self, url):
+        domain_and_app_url = _normalize_url(url)
+        if domain_and_app_url not in self._apps:
+            raise KeyError(
+                'No application with the url %r' % (domain_and_app_url,),
+                )
+        del self._apps[domain_and_app_url]
+        self._build_trees()
+
+    def __contains__(self, url):
+        return _normalize_url(url) in self._apps
+
+    def __iter__(self):
+        return iter(self.keys())
+
+    def __len__(self):
+        return len(self._apps)
+
+    def keys(self):
+        """Return the hosts and prefixes mounted, as ``(host, prefix)``."""
+        return list(self._apps)
+
+    def __call__(self, environ, start_response):
+        host = \
+            (environ.get('HTTP_HOST') or environ.get('SERVER_NAME')).lower()
+        if ':' in host:
+            host, port = host.split(':', 1)
+        elif environ['wsgi.url_scheme'] == 'http':
+            port = '80'
+        else:
+            port = '443'
+
+        path_info = \
+            _MULTIPLE_SLASHES_REGEX.sub('/', environ.get('PATH_INFO', ''))
+        for domain in (host, host + ':' + port, None):
+            root_node = self._root_nodes_by_domain.get(domain)
+            node = root_node and _get_longest_prefix_node(root_node, path_info)
+            if node:
+                environ['SCRIPT_NAME'] += node.app_url
+                environ['PATH_INFO'] = path_info[len(node.app_url):]
+                return node.app(environ, start_response)
+
+        return self.not_found_app(environ, start_response)
+
+    def _build_trees(self):
+        apps = self._apps
+        self._apps = {}
+        self._root_nodes_by_domain = {}
+        for domain_and_app_url, app in apps.items():
+            self[domain_and_app_url] = app
+
+
+class _PrefixNode(object):
+
+    __slots__ = ('child_nodes', 'app_url', 'app')
+
+    def __init__(self):
+        self.child_nodes = {}
+        self.app_url = None
+        self.app = None
+
+
+def _get_longest_prefix_node(root_node, path_info):
+    """
+    Return the node of the application mounted at the longest prefix of
+    ``path_info``, or :data:`None` if there's no such application.
+
+    """
+    if path_info and not path_info.startswith('/'):
+        return None
+
+    if root_node.app is None:
+        longest_prefix_node = None
+    else:
+        longest_prefix_node = root_node
+    node = root_node
+    for path_segment in _get_path_segments(path_info):
+        node = node.child_nodes.get(path_segment)
+        if node is None:
+            break
+        if node.app is not None:
+            longest_prefix_node = node
+    return longest_prefix_node
+
+
+def _get_path_segments(path):
+    return path.split('/')[1:]
+
+
+def _normalize_url(url):
+    """
+    Return the host and path in ``url``, like
+    :meth:`paste.urlmap.URLMap.normalize_url`.
+
+    """
+    if isinstance(url, (list, tuple)):
+        domain = _normalize_domain(url[0])
+        app_url = _normalize_url(url[1])[1]
+        return domain, app_url
+
+    domain_url_match = _DOMAIN_URL_REGEX.search(url)
+    if domain_url_match:
+        url = url[domain_url_match.end():]
+        if '/' in url:
+            domain, url = url.split('/', 1)
+            url = '/' + url
+        else:
+            domain, url = url, ''
+    elif url and not url.startswith('/'):
+        raise ValueError(
+            'URL prefixes must start with "/" or "http://" (got %r)' % url,
+            )
+    else:
+        domain = None
+
+    app_url = _MULTIPLE_SLASHES_REGEX.sub('/', url).rstrip('/')
+    return _normalize_domain(domain), app_url
+
+
+def _normalize_domain(domain):
+    """
+    Return ``domain`` in lower case and without the default port of HTTP or
+    HTTPS, so that it matches the host of the requests.
+
+    """
+    if not domain:
+        return domain
+
+    domain = domain.lower()
+    for default_port_suffix in _DEFAULT_PORT_SUFFIXES:
+        if domain.endswith(default_port_suffix):
+            domain = domain[:-len(default_port_suffix)]
+            break
+    return domain
+
+
+def _respond_not_found(environ, start_response):
+    not_found_app = HTTPNotFound(environ.get('PATH_INFO')).wsgi_application
+    return not_found_app(environ, start_response)
@@ -20,17 +20,53 @@ Miscellaneous PasteDeploy Application Factories.
 """
 from os import path
 
+from paste.deploy.converters import asbool
+from paste.urlmap import parse_path_expression
 from paste.urlmap import URLMap
 from paste.urlparser import StaticURLParser
 from django import __file__ as django_init
 
+from django_pastedeploy_settings import _install_loader_cache
+from django_pastedeploy_settings.background import \
+    BackgroundLoadingApplication
+from django_pastedeploy_settings.dispatching import PrefixDispatcher
+from django_pastedeploy_settings.media import StaticMediaApplication
 
-__all__ = ("make_full_django_app", "add_media_to_app")
+
+__all__ = (
+    "make_full_django_app",
+    "add_media_to_app",
+    "make_prefix_dispatcher",
+    )
 
 
 _DJANGO_ROOT = path.dirname(django_init)
 
 
+_DISPATCHER_FACTORIES = {
+    'prefix': PrefixDispatcher,
+    'urlmap': URLMap,
+    }
+
+
+_MEDIA_APP_FACTORIES = {
+    'builtin': StaticMediaApplication,
+    'paste': StaticURLParser,
+    }
+
+
+_MEDIA_APP_OPTION_CONVERTERS = {
+    'cache_max_age': int,
+    'compress': asbool,
+    'compression_cache_size': int,
+    'hashed_file_max_age': int,
+    'index': asbool,
+    'index_ttl': float,
+    'response_cache_max_file_size': int,
+    'response_cache_size': int,
+    }
+
+
 def make_full_django_app(loader, global_conf, **local_conf):
     """
     Return a WSGI application made up of the Django application, its media and
@@ -38,18 +74,99 @@ def make_full_django_app(loader, global_conf, **local_conf):
     
     This is a PasteDeploy Composite Application Factory.
     
+    The Django application is loaded with the PasteDeploy configuration
+    files cached if the global option ``django_config_loader_cache`` is
+    enabled.
+    
+    The media are served by the server set in the option ``media_server``, and
+    the options prefixed with ``media_`` and ``admin_media_`` are passed to the
+    applications serving the media and the Django Admin media, respectively
+    (e.g., ``media_cache_max_age = 3600``). The applications are mounted with
+    the dispatcher set in the option ``dispatcher``.
+    
+    When the Django application is loaded in the background, the media are
+    mounted once it's loaded, since their URLs come from the settings.
+    
     """
+    _install_loader_cache(global_conf)
     django_app = loader.get_app(local_conf['django_app'], global_conf=global_conf)
-    return add_media_to_app(django_app)
+    
+    def add_media(app):
+        return add_media_to_app(
+            app,
+            local_conf.get('media_server', 'paste'),
+            _get_media_app_options(local_conf, 'media_'),
+            _get_media_app_options(local_conf, 'admin_media_'),
+            local_conf.get('dispatcher', 'urlmap'),
+            )
+    
+    if isinstance(django_app, BackgroundLoadingApplication):
+        django_app.wrap_application(add_media)
+        app = django_app
+    else:
+        app = add_media(django_app)
+    return app
 
 
-def add_media_to_app(django_app):
+def make_prefix_dispatcher(loader, global_conf, **local_conf):
+    """
+    Return a :class:`~django_pastedeploy_settings.dispatching.PrefixDispatcher`
+    with the applications in ``local_conf`` mounted.
+    
+    This is a PasteDeploy Composite Application Factory, and a replacement for
+    ``egg:Paste#urlmap``: Each option maps a path, optionally preceded by a
+    host and port (e.g., ``domain example.com port 8080 /media``), to the
+    name of an application, except for ``not_found_app``.
+    
+    """
+    _install_loader_cache(global_conf)
+    
+    not_found_app_name = local_conf.pop(
+        'not_found_app',
+        global_conf.get('not_found_app'),
+        )
+    if not_found_app_name:
+        not_found_app = \
+            loader.get_app(not_found_app_name, global_conf=global_conf)
+    else:
+        not_found_app = None
+    
+    dispatcher = PrefixDispatcher(not_found_app)
+    for path_expression, app_name in local_conf.items():
+        url = parse_path_expression(path_expression)
+        dispatcher[url] = loader.get_app(app_name, global_conf=global_conf)
+    return dispatcher
+
+
+def add_media_to_app(django_app, media_server='paste', media_app_options=None,
+                     admin_media_app_options=None, dispatcher='urlmap'):
     """
     Return a WSGI application made up of the Django application, its media and
     the Django Admin media.
     
+    The media are served by Paste's :class:`~paste.urlparser.StaticURLParser`
+    if ``media_server`` is ``"paste"``, or by
+    :class:`~django_pastedeploy_settings.media.StaticMediaApplication` if
+    it's ``"builtin"``. The keyword arguments for each application can be set
+    in ``media_app_options`` and ``admin_media_app_options``.
+    
+    The applications are mounted on a :class:`~paste.urlmap.URLMap` if
+    ``dispatcher`` is ``"urlmap"``, or on a
+    :class:`~django_pastedeploy_settings.dispatching.PrefixDispatcher` if it's
+    ``"prefix"``.
+    
     """
-    app = URLMap()
+    try:
+        media_app_factory = _MEDIA_APP_FACTORIES[media_server]
+    except KeyError:
+        raise ValueError('Unknown media server %r' % media_server)
+    
+    try:
+        dispatcher_factory = _DISPATCHER_FACTORIES[dispatcher]
+    except KeyError:
+        raise ValueError('Unknown dispatcher %r' % dispatcher)
+    
+    app = dispatcher_factory()
     app['/'] = django_app
     
     # The Django App has been loaded, so it's now safe to access the settings:
@@ -57,9 +174,27 @@ def add_media_to_app(django_app):
     
     # Setting up the Admin media:
     admin_media = path.join(_DJANGO_ROOT, "contrib", "admin", "media")
-    app[settings.ADMIN_MEDIA_PREFIX] = StaticURLParser(admin_media)
+    app[settings.ADMIN_MEDIA_PREFIX] = \
+        media_app_factory(admin_media, **(admin_media_app_options or {}))
     
     # Setting up the media for the Django application:
-    app[settings.MEDIA_URL] = StaticURLParser(settings.MEDIA_ROOT)
+    app[settings.MEDIA_URL] = \
+        media_app_factory(settings.MEDIA_ROOT, **(media_app_options or {}))
     
     return app
+
+
+def _get_media_app_options(local_conf, option_name_prefix):
+    media_app_options = {}
+    for option_name, option_value in local_conf.items():
+        if option_name == 'media_server' or \
+                not option_name.startswith(option_name_prefix):
+            continue
+        
+        media_app_option_name = option_name[len(option_name_prefix):]
+        option_value_converter = \
+            _MEDIA_APP_OPTION_CONVERTERS.get(media_app_option_name)
+        if option_value_converter:
+            option_value = option_value_converter(option_value)
+        media_app_options[media_app_option_name] = option_value
+    return media_app_options
@@ -0,0 +1,247 @@
+# -*- coding: utf-8 -*-
+##############################################################################
+#
+# Copyright (c) 2016, 2degrees Limited.
+# All Rights Reserved.
+#
+# This file is part of django-pastedeploy-settings
+# <https://github.com/2degrees/django-pastedeploy-settings>, which is subject
+# to the provisions of the BSD at
+# <http://dev.2degreesnetwork.com/p/2degrees-license.html>. A copy of the
+# license should accompany this distribution. THIS SOFTWARE IS PROVIDED "AS IS"
+# AND ANY AND ALL EXPRESS OR IMPLIED WARRANTIES ARE DISCLAIMED, INCLUDING, BUT
+# NOT LIMITED TO, THE IMPLIED WARRANTIES OF TITLE, MERCHANTABILITY, AGAINST
+# INFRINGEMENT, AND FITNESS FOR A PARTICULAR PURPOSE.
+#
+##############################################################################
+"""
+Measurement of the phases of the start-up of Django applications.
+
+"""
+from contextlib import contextmanager
+from threading import local
+import time
+from timeit import default_timer
+
+try:
+    import tracemalloc
+except ImportError:  # Python 2
+    tracemalloc = None
+
+
+__all__ = [
+    'add_phase_hook',
+    'get_last_startup_report',
+    'remove_phase_hook',
+    'PhaseMeasurement',
+    'StartupReport',
+    ]
+
+
+_get_cpu_time = getattr(time, 'process_time', None) or time.clock
+
+
+_PHASE_HOOKS = []
+
+
+_state = local()
+
+
+_last_startup_report = None
+
+
+class PhaseMeasurement(object):
+    """
+    Resources used by a phase of the start-up.
+
+    .. attribute:: name
+
+    .. attribute:: parent_name
+
+        The name of the phase within which this phase took place, if any.
+
+    .. attribute:: wall_time
+
+        Elapsed time in seconds.
+
+    .. attribute:: cpu_time
+
+        Processor time in seconds.
+
+    .. attribute:: allocated_bytes
+
+        Change in the size of the memory blocks traced by :mod:`tracemalloc`,
+        or :data:`None` if :mod:`tracemalloc` is not tracing.
+
+    """
+
+    def __init__(self, name, parent_name, wall_time, cpu_time, allocated_bytes):
+        super(PhaseMeasurement, self).__init__()
+
+        self.name = name
+        self.parent_name = parent_name
+        self.wall_time = wall_time
+        self.cpu_time = cpu_time
+        self.allocated_bytes = allocated_bytes
+
+    def __repr__(self):
+        return '<PhaseMeasurement %r: %.6fs wall, %.6fs CPU>' % (
+            self.name,
+            self.wall_time,
+            self.cpu_time,
+            )
+
+
+class StartupReport(object):
+    """
+    Measurements of the phases of a start-up, in the order they ended.
+
+    """
+
+    def __init__(self):
+        super(StartupReport, self).__init__()
+
+        self.phase_measurements = []
+
+        self._initial_wall_time = default_timer()
+        self._final_wall_time = None
+
+    @property
+    def total_wall_time(self):
+        """
+        The elapsed time of the whole start-up so far, in seconds, including
+        the time spent outside the phases.
+
+        """
+        final_wall_time = self._final_wall_time
+        if final_wall_time is None:
+            final_wall_time = default_timer()
+        return final_wall_time - self._initial_wall_time
+
+    def format(self):
+        """Return the report as a human-readable string."""
+        lines = []
+        for phase_measurement in self.phase_measurements:
+            if phase_measurement.allocated_bytes is None:
+                allocated_size = 'n/a'
+            else:
+                allocated_size = '%d B' % phase_measurement.allocated_bytes
+
+            if phase_measurement.parent_name is None:
+                phase_label = phase_measurement.name
+            else:
+                phase_label = '%s > %s' % (
+                    phase_measurement.parent_name,
+                    phase_measurement.name,
+                    )
+
+            lines.append(
+                '%s: %.3fs wall, %.3fs CPU, %s allocated' % (
+                    phase_label,
+                    phase_measurement.wall_time,
+                    phase_measurement.cpu_time,
+                    allocated_size,
+                    ),
+                )
+        return '\n'.join(lines)
+
+
+def get_last_startup_report():
+    """
+    Return the :class:`StartupReport` for the most recent start-up, or
+    :data:`None` if there hasn't been any.
+
+    """
+    return _last_startup_report
+
+
+def add_phase_hook(phase_hook):
+    """
+    Call ``phase_hook`` with the :class:`PhaseMeasurement` of each phase of
+    the start-up once it ends.
+
+    """
+    _PHASE_HOOKS.append(phase_hook)
+
+
+def remove_phase_hook(phase_hook):
+    """Stop calling ``phase_hook``."""
+    _PHASE_HOOKS.remove(phase_hook)
+
+
+@contextmanager
+def collect_startup_report():
+    """
+    Collect the measurements of the phases within this context in a new
+    :class:`StartupReport`, unless one is already being collected.
+
+    """
+    global _last_startup_report
+
+    startup_report = getattr(_state, 'startup_report', None)
+    if startup_report:
+        yield startup_report
+    else:
+        startup_report = StartupReport()
+        _state.startup_report = startup_report
+        _state.phase_names = []
+        try:
+            yield startup_report
+        finally:
+            startup_report._final_wall_time = default_timer()
+            _state.startup_report = None
+            _last_startup_report = startup_report
+
+
+@contextmanager
+def measure_phase(phase_name):
+    """
+    Measure the resources used within this context as the phase
+    ``phase_name``.
+
+    Nothing is measured outside :func:`collect_startup_report`.
+
+    """
+    startup_report = getattr(_state, 'startup_report', None)
+    if not startup_report:
+        yield
+        return
+
+    phase_names = _state.phase_names
+    parent_name = phase_names[-1] if phase_names else None
+    phase_names.append(phase_name)
+
+    initial_allocated_bytes = _get_allocated_bytes()
+    initial_cpu_time = _get_cpu_time()
+    initial_wall_time = default_timer()
+    try:
+        yield
+    finally:
+        wall_time = default_timer() - initial_wall_time
+        cpu_time = _get_cpu_time() - initial_cpu_time
+        final_allocated_bytes = _get_allocated_bytes()
+        if initial_allocated_bytes is None or final_allocated_bytes is None:
+            allocated_bytes = None
+        else:
+            allocated_bytes = final_allocated_bytes - initial_allocated_bytes
+
+        phase_names.pop()
+
+        phase_measurement = PhaseMeasurement(
+            phase_name,
+            parent_name,
+            wall_time,
+            cpu_time,
+            allocated_bytes,
+            )
+        startup_report.phase_measurements.append(phase_measurement)
+        for phase_hook in _PHASE_HOOKS:
+            phase_hook(phase_measurement)
+
+
+def _get_allocated_bytes():
+    if tracemalloc and tracemalloc.is_tracing():
+        allocated_bytes = tracemalloc.get_traced_memory()[0]
+    else:
+        allocated_bytes = None
+    return allocated_bytes
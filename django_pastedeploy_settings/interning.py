@@ -0,0 +1,201 @@
+# -*- coding: utf-8 -*-
+##############################################################################
+#
+# Copyright (c) 2016, 2degrees Limited.
+# All Rights Reserved.
+#
+# This file is part of django-pastedeploy-settings
+# <https://github.com/2degrees/django-pastedeploy-settings>, which is subject
+# to the provisions of the BSD at
+# <http://dev.2degreesnetwork.com/p/2degrees-license.html>. A copy of the
+# license should accompany this distribution. THIS SOFTWARE IS PROVIDED "AS IS"
+# AND ANY AND ALL EXPRESS OR IMPLIED WARRANTIES ARE DISCLAIMED, INCLUDING, BUT
+# NOT LIMITED TO, THE IMPLIED WARRANTIES OF TITLE, MERCHANTABILITY, AGAINST
+# INFRINGEMENT, AND FITNESS FOR A PARTICULAR PURPOSE.
+#
+##############################################################################
+"""
+Deduplication of decoded setting values into immutable structures shared
+across settings.
+
+"""
+import sys
+from threading import Lock
+
+
+__all__ = [
+    'FrozenDict',
+    'InterningReport',
+    'MUTABLE_SETTINGS',
+    'ValueInterner',
+    ]
+
+
+MUTABLE_SETTINGS = frozenset([
+    'DATABASES',
+    ])
+"""
+Settings which Django modifies in place, and whose values therefore can't be
+frozen.
+
+"""
+
+
+class FrozenDict(dict):
+    """
+    Dictionary which cannot be modified.
+
+    Copies made with :meth:`copy` are regular, mutable dictionaries.
+
+    """
+
+    def _raise_immutable_error(self, *args, **kwargs):
+        raise TypeError(
+            '%r object does not support modification' % type(self).__name__,
+            )
+
+    __setitem__ = _raise_immutable_error
+    __delitem__ = _raise_immutable_error
+    clear = _raise_immutable_error
+    pop = _raise_immutable_error
+    popitem = _raise_immutable_error
+    setdefault = _raise_immutable_error
+    update = _raise_immutable_error
+
+    def __ior__(self, other):
+        self._raise_immutable_error()
+
+    def __reduce__(self):
+        return type(self), (dict(self),)
+
+
+class InterningReport(object):
+    """
+    Size of the values decoded by a :class:`ValueInterner`.
+
+    .. attribute:: value_count
+
+        The number of values, including the items in containers.
+
+    .. attribute:: unique_value_count
+
+        The number of distinct objects the values were reduced to.
+
+    .. attribute:: total_size
+
+        The size in bytes the values would take up if they were not shared.
+
+    .. attribute:: unique_size
+
+        The size in bytes of the distinct objects.
+
+    Sizes are computed with :func:`sys.getsizeof`, so they're estimates.
+
+    """
+
+    def __init__(self, value_count, unique_value_count, total_size,
+                 unique_size):
+        super(InterningReport, self).__init__()
+
+        self.value_count = value_count
+        self.unique_value_count = unique_value_count
+        self.total_size = total_size
+        self.unique_size = unique_size
+
+    @property
+    def saved_size(self):
+        """The size in bytes saved by sharing values."""
+        return self.total_size - self.unique_size
+
+    def __repr__(self):
+        return '<InterningReport %d values, %d unique, %d bytes saved>' % (
+            self.value_count,
+            self.unique_value_count,
+            self.saved_size,
+            )
+
+
+class ValueInterner(object):
+    """
+    Converter of decoded JSON values into immutable equivalents, which are
+    shared with the equal values converted before.
+
+    Lists are converted to tuples and dictionaries to :class:`FrozenDict`
+    objects. Containers are only shared when their items are equal and in
+    the same order, and scalars are only shared with scalars of the same type
+    (e.g., ``1`` is not shared with ``True``) and representation (e.g.,
+    ``0.0`` is not shared with ``-0.0``).
+
+    """
+
+    def __init__(self):
+        super(ValueInterner, self).__init__()
+
+        self._unique_values = {}
+        self._lock = Lock()
+
+        self._value_count = 0
+        self._unique_value_count = 0
+        self._total_size = 0
+        self._unique_size = 0
+
+    def intern(self, value):
+        """Return the immutable, shared equivalent of ``value``."""
+        with self._lock:
+            return self._intern(value)
+
+    def clear(self):
+        """
+        Forget the values interned so far, so that they're no longer shared
+        with the values interned next.
+
+        The :attr:`report` still covers the values forgotten.
+
+        """
+        with self._lock:
+            self._unique_values.clear()
+
+    @property
+    def report(self):
+        """The :class:`InterningReport` for the values interned so far."""
+        with self._lock:
+            return InterningReport(
+                self._value_count,
+                self._unique_value_count,
+                self._total_size,
+                self._unique_size,
+                )
+
+    def _intern(self, value):
+        # Items are interned first, so equal containers have the same items
+        # and can be told apart by their identities
+        if isinstance(value, dict):
+            items = tuple(
+                (self._intern(item_key), self._intern(item_value))
+                for item_key, item_value in value.items()
+                )
+            value_key = (FrozenDict, tuple(
+                (id(item_key), id(item_value))
+                for item_key, item_value in items
+                ))
+            value = FrozenDict(items)
+        elif isinstance(value, (list, tuple)):
+            value = tuple(self._intern(item) for item in value)
+            value_key = (tuple, tuple(id(item) for item in value))
+        elif isinstance(value, float):
+            # Equal floats may differ in their sign (0.0 and -0.0)
+            value_key = (float, repr(value))
+        else:
+            value_key = (type(value), value)
+
+        try:
+            unique_value = self._unique_values[value_key]
+        except KeyError:
+            unique_value = value
+            self._unique_values[value_key] = unique_value
+            self._unique_value_count += 1
+            self._unique_size += sys.getsizeof(unique_value)
+
+        self._value_count += 1
+        self._total_size += sys.getsizeof(unique_value)
+        return unique_value
@@ -0,0 +1,319 @@
+# -*- coding: utf-8 -*-
+##############################################################################
+#
+# Copyright (c) 2016, 2degrees Limited.
+# All Rights Reserved.
+#
+# This file is part of django-pastedeploy-settings
+# <https://github.com/2degrees/django-pastedeploy-settings>, which is subject
+# to the provisions of the BSD at
+# <http://dev.2degreesnetwork.com/p/2degrees-license.html>. A copy of the
+# license should accompany this distribution. THIS SOFTWARE IS PROVIDED "AS IS"
+# AND ANY AND ALL EXPRESS OR IMPLIED WARRANTIES ARE DISCLAIMED, INCLUDING, BUT
+# NOT LIMITED TO, THE IMPLIED WARRANTIES OF TITLE, MERCHANTABILITY, AGAINST
+# INFRINGEMENT, AND FITNESS FOR A PARTICULAR PURPOSE.
+#
+##############################################################################
+"""
+Caching layer for PasteDeploy's loaders.
+
+PasteDeploy parses a configuration file each time it's referenced (e.g.,
+with ``use = config:base.ini``), even when several applications in the same
+composite refer to the same file. Likewise, it looks up the entry points in
+distributions each time they're used (e.g., with ``use = egg:...``).
+
+Once :func:`install_loader_cache` has been called, parsed configuration files
+are reused for as long as they remain unchanged, and so are the entry points
+found.
+
+.. warning::
+    The cache replaces the loaders in PasteDeploy's private
+    ``paste.deploy.loadwsgi._loaders`` for the whole process, so it also
+    applies to the applications which don't use this package, and it may
+    break with future releases of PasteDeploy.
+
+"""
+from contextlib import contextmanager
+from copy import copy
+import os
+from threading import local
+
+try:
+    from urllib.parse import unquote
+except ImportError:  # Python 2
+    from urllib import unquote
+
+import pkg_resources
+from paste.deploy import loadwsgi
+
+
+__all__ = [
+    'appconfig',
+    'clear_loader_cache',
+    'get_cached_config_file_paths',
+    'install_loader_cache',
+    'loadapp',
+    'uninstall_loader_cache',
+    ]
+
+
+_ORIGINAL_LOADERS = {
+    'config': loadwsgi._loaders['config'],
+    'egg': loadwsgi._loaders['egg'],
+    }
+
+
+# Parsed configuration files by absolute path, along with the modification
+# time and size of the file when it was parsed
+_CONFIG_PARSERS = {}
+
+
+_EGG_ENTRY_POINTS = {}
+
+
+_state = local()
+
+
+def install_loader_cache():
+    """
+    Make PasteDeploy reuse parsed configuration files and the entry points
+    found in distributions.
+
+    This is called by the application factories in this package when the
+    global option ``django_config_loader_cache`` is enabled, so that the
+    applications loaded after them (e.g., the other applications in the same
+    composite) benefit from the cache.
+
+    """
+    loadwsgi._loaders['config'] = _load_config
+    loadwsgi._loaders['egg'] = _load_egg
+
+
+def uninstall_loader_cache():
+    """Restore PasteDeploy's own loaders and empty the cache."""
+    loadwsgi._loaders.update(_ORIGINAL_LOADERS)
+    clear_loader_cache()
+
+
+def clear_loader_cache():
+    """Forget all the parsed configuration files and entry points."""
+    _CONFIG_PARSERS.clear()
+    _EGG_ENTRY_POINTS.clear()
+
+
+def get_cached_config_file_paths():
+    """
+    Return the absolute paths to the configuration files parsed since the
+    cache was installed.
+
+    """
+    return sorted(_CONFIG_PARSERS)
+
+
+def loadapp(uri, name=None, **kwargs):
+    """
+    Load the WSGI application at ``uri`` like :func:`paste.deploy.loadapp`,
+    with the cache installed.
+
+    """
+    install_loader_cache()
+    return loadwsgi.loadapp(uri, name=name, **kwargs)
+
+
+def appconfig(uri, name=None, relative_to=None, global_conf=None):
+    """
+    Return the configuration for the application at ``uri`` like
+    :func:`paste.deploy.appconfig`, with the cache installed.
+
+    """
+    install_loader_cache()
+    return loadwsgi.appconfig(uri, name, relative_to, global_conf)
+
+
+def _get_config_uri(config_uri):
+    """
+    Return ``config_uri`` as a PasteDeploy URI, taking it as the path to a
+    configuration file if it has no scheme.
+
+    """
+    if ':' not in config_uri:
+        config_uri = 'config:' + os.path.abspath(config_uri)
+    return config_uri
+
+
+@contextmanager
+def _record_config_file_signatures():
+    """
+    Collect the modification time and size of the configuration files used
+    within this context, by absolute path.
+
+    The signature of a file which could not be found is :data:`None`.
+
+    """
+    previous_config_file_signatures = \
+        getattr(_state, 'config_file_signatures', None)
+    config_file_signatures = {}
+    _state.config_file_signatures = config_file_signatures
+    try:
+        yield config_file_signatures
+    finally:
+        _state.config_file_signatures = previous_config_file_signatures
+
+
+def _record_config_file_signature(absolute_path, file_signature):
+    config_file_signatures = getattr(_state, 'config_file_signatures', None)
+    if config_file_signatures is not None:
+        config_file_signatures[absolute_path] = file_signature
+
+
+class CachingConfigLoader(loadwsgi.ConfigLoader):
+    """
+    PasteDeploy configuration loader which reuses the parsed file while it
+    remains unchanged.
+
+    """
+
+    def __init__(self, filename):
+        self.filename = filename = filename.strip()
+        self.parser = _get_config_parser(filename)
+
+    def update_defaults(self, new_defaults, overwrite=True):
+        super(CachingConfigLoader, self).update_defaults(
+            new_defaults,
+            overwrite,
+            )
+        self.parser.forget_defaults()
+
+
+class CachingEggLoader(loadwsgi.EggLoader):
+    """
+    PasteDeploy distribution loader which reuses the entry points found.
+
+    """
+
+    def get_context(self, object_type, name=None, global_conf=None):
+        if self.absolute_name(name):
+            return loadwsgi.loadcontext(
+                object_type,
+                name,
+                global_conf=global_conf,
+                )
+
+        cache_key = (self.spec, object_type, name)
+        try:
+            entry_point, protocol, entry_point_name, distribution = \
+                _EGG_ENTRY_POINTS[cache_key]
+        except KeyError:
+            entry_point, protocol, entry_point_name = \
+                self.find_egg_entry_point(object_type, name=name)
+            distribution = pkg_resources.get_distribution(self.spec)
+            _EGG_ENTRY_POINTS[cache_key] = \
+                (entry_point, protocol, entry_point_name, distribution)
+
+        return loadwsgi.LoaderContext(
+            entry_point,
+            object_type,
+            protocol,
+            global_conf or {},
+            {},
+            self,
+            distribution=distribution,
+            entry_point_name=entry_point_name,
+            )
+
+
+class _DefaultsCachingConfigParser(loadwsgi.NicerConfigParser):
+    """
+    Configuration parser which interpolates the defaults once.
+
+    """
+
+    _interpolated_defaults = None
+
+    def defaults(self):
+        if self._interpolated_defaults is None:
+            self._interpolated_defaults = \
+                loadwsgi.NicerConfigParser.defaults(self)
+        return self._interpolated_defaults
+
+    def forget_defaults(self):
+        self._interpolated_defaults = None
+
+
+def _get_config_parser(filename):
+    """
+    Return a copy of the parser for ``filename``, parsing the file if it
+    hasn't been parsed before or has changed since.
+
+    Each loader gets its own copy of the defaults, which PasteDeploy
+    updates, whilst the sections are shared.
+
+    """
+    absolute_path = os.path.abspath(filename)
+    try:
+        file_stat = os.stat(absolute_path)
+    except OSError:
+        _record_config_file_signature(absolute_path, None)
+        raise
+    file_signature = (file_stat.st_mtime, file_stat.st_size)
+    _record_config_file_signature(absolute_path, file_signature)
+
+    cached_parser_entry = _CONFIG_PARSERS.get(absolute_path)
+    if cached_parser_entry and cached_parser_entry[0] == file_signature:
+        cached_parser = cached_parser_entry[1]
+    else:
+        cached_parser = _parse_config_file(filename)
+        _CONFIG_PARSERS[absolute_path] = (file_signature, cached_parser)
+
+    parser = copy(cached_parser)
+    parser._defaults = cached_parser._defaults.copy()
+    parser.forget_defaults()
+    return parser
+
+
+def _parse_config_file(filename):
+    # Mirror ConfigLoader.__init__()
+    absolute_path = os.path.abspath(filename)
+    defaults = {
+        'here': os.path.dirname(absolute_path),
+        '__file__': absolute_path,
+        }
+    parser = _DefaultsCachingConfigParser(filename, defaults=defaults)
+    parser.optionxform = str
+    with open(filename) as config_file:
+        try:
+            read_file = parser.read_file
+        except AttributeError:  # Python 2
+            read_file = parser.readfp
+        read_file(config_file)
+    return parser
+
+
+def _load_config(object_type, uri, path, name, relative_to, global_conf):
+    # Mirror paste.deploy.loadwsgi._loadconfig()
+    is_absolute_path = os.path.isabs(path)
+    path = path.replace('\\', '/')
+    if not is_absolute_path:
+        if not relative_to:
+            raise ValueError(
+                "Cannot resolve relative uri %r; no relative_to keyword "
+                    "argument given" % uri,
+                )
+        relative_to = relative_to.replace('\\', '/')
+        if relative_to.endswith('/'):
+            path = relative_to + path
+        else:
+            path = relative_to + '/' + path
+    if path.startswith('///'):
+        path = path[2:]
+    path = unquote(path)
+
+    loader = CachingConfigLoader(path)
+    if global_conf:
+        loader.update_defaults(global_conf, overwrite=False)
+    return loader.get_context(object_type, name, global_conf)
+
+
+def _load_egg(object_type, uri, spec, name, relative_to, global_conf):
+    loader = CachingEggLoader(spec)
+    return loader.get_context(object_type, name, global_conf)
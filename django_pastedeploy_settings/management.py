@@ -0,0 +1,145 @@
+# -*- coding: utf-8 -*-
+##############################################################################
+#
+# Copyright (c) 2016, 2degrees Limited.
+# All Rights Reserved.
+#
+# This file is part of django-pastedeploy-settings
+# <https://github.com/2degrees/django-pastedeploy-settings>, which is subject
+# to the provisions of the BSD at
+# <http://dev.2degreesnetwork.com/p/2degrees-license.html>. A copy of the
+# license should accompany this distribution. THIS SOFTWARE IS PROVIDED "AS IS"
+# AND ANY AND ALL EXPRESS OR IMPLIED WARRANTIES ARE DISCLAIMED, INCLUDING, BUT
+# NOT LIMITED TO, THE IMPLIED WARRANTIES OF TITLE, MERCHANTABILITY, AGAINST
+# INFRINGEMENT, AND FITNESS FOR A PARTICULAR PURPOSE.
+#
+##############################################################################
+"""
+Execution of Django management commands with the settings in a PasteDeploy
+configuration, without building the WSGI application.
+
+"""
+from argparse import ArgumentParser
+from argparse import REMAINDER
+import shlex
+
+from django_pastedeploy_settings.instrumentation import collect_startup_report
+from django_pastedeploy_settings.instrumentation import measure_phase
+
+
+__all__ = ['call_management_commands', 'set_up_django']
+
+
+def set_up_django(config_uri, name=None, relative_to=None):
+    """
+    Store the settings of the application ``name`` in the PasteDeploy
+    configuration at ``config_uri`` and set up Django, without building the
+    WSGI application or its middleware.
+
+    The arguments are the same as in :func:`paste.deploy.appconfig`, except
+    that ``config_uri`` may also be the path to a configuration file.
+
+    """
+    from paste.deploy import appconfig
+
+    from django_pastedeploy_settings import _set_up_settings
+    from django_pastedeploy_settings.loading import _get_config_uri
+
+    config_uri = _get_config_uri(config_uri)
+    with collect_startup_report():
+        app_config = appconfig(config_uri, name=name, relative_to=relative_to)
+        _set_up_settings(app_config.global_conf, app_config.local_conf)
+
+        with measure_phase('django_setup'):
+            import django
+            django.setup()
+
+
+def call_management_commands(config_uri, commands, name=None,
+                             relative_to=None):
+    """
+    Set up Django like :func:`set_up_django` and execute each of the
+    management ``commands`` in turn, like :command:`manage.py` would.
+
+    :param commands: The command lines to execute, each one being the list
+        of arguments passed to :command:`manage.py` (e.g.,
+        ``['clearsessions']``).
+    :return: The exit status of the last command executed.
+    :rtype: :class:`int`
+
+    Django is only set up once, so the commands share the same process and
+    its warm state. Execution stops at the first command which fails.
+
+    """
+    set_up_django(config_uri, name, relative_to)
+
+    exit_status = 0
+    for command_arguments in commands:
+        exit_status = _call_management_command(command_arguments)
+        if exit_status:
+            break
+    return exit_status
+
+
+def _call_management_command(command_arguments):
+    from django.core.management import ManagementUtility
+
+    management_utility = \
+        ManagementUtility(['django-admin'] + list(command_arguments))
+    try:
+        management_utility.execute()
+    except SystemExit as exc:
+        exit_status = _get_exit_status(exc)
+    else:
+        exit_status = 0
+    return exit_status
+
+
+def _get_exit_status(system_exit):
+    exit_code = system_exit.code
+    if exit_code is None:
+        exit_status = 0
+    elif isinstance(exit_code, int):
+        exit_status = exit_code
+    else:
+        exit_status = 1
+    return exit_status
+
+
+def main(argv=None):
+    """Entry point for the command :command:`paste-manage`."""
+    argument_parser = ArgumentParser(
+        description='Execute Django management commands with the settings in '
+            'a PasteDeploy configuration file',
+        )
+    argument_parser.add_argument('config_uri')
+    argument_parser.add_argument(
+        '--app-name',
+        help='The name of the application in the configuration file '
+            '(default: main)',
+        )
+    argument_parser.add_argument(
+        '-c',
+        '--command',
+        action='append',
+        default=[],
+        dest='command_lines',
+        help='A command line to execute, such as "clearsessions". It can be '
+            'set more than once to execute several commands in turn',
+        )
+    argument_parser.add_argument('command_arguments', nargs=REMAINDER)
+    arguments = argument_parser.parse_args(argv)
+
+    commands = [
+        shlex.split(command_line) for command_line in arguments.command_lines
+        ]
+    if arguments.command_arguments:
+        commands.append(arguments.command_arguments)
+    if not commands:
+        argument_parser.error('No command to execute')
+
+    return call_management_commands(
+        arguments.config_uri,
+        commands,
+        arguments.app_name,
+        )
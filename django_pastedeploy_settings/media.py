@@ -0,0 +1,924 @@
+# -*- coding: utf-8 -*-
+##############################################################################
+#
+# Copyright (c) 2016, 2degrees Limited.
+# All Rights Reserved.
+#
+# This file is part of django-pastedeploy-settings
+# <https://github.com/2degrees/django-pastedeploy-settings>, which is subject
+# to the provisions of the BSD at
+# <http://dev.2degreesnetwork.com/p/2degrees-license.html>. A copy of the
+# license should accompany this distribution. THIS SOFTWARE IS PROVIDED "AS IS"
+# AND ANY AND ALL EXPRESS OR IMPLIED WARRANTIES ARE DISCLAIMED, INCLUDING, BUT
+# NOT LIMITED TO, THE IMPLIED WARRANTIES OF TITLE, MERCHANTABILITY, AGAINST
+# INFRINGEMENT, AND FITNESS FOR A PARTICULAR PURPOSE.
+#
+##############################################################################
+"""
+WSGI application to serve static media files.
+
+"""
+from email.utils import formatdate
+from email.utils import mktime_tz
+from email.utils import parsedate_tz
+from collections import OrderedDict
+import json
+from logging import getLogger
+import mimetypes
+import os
+import re
+from stat import S_ISREG
+import sys
+from threading import Lock
+from threading import Thread
+from time import time
+
+from django_pastedeploy_settings._wsgi import respond
+from django_pastedeploy_settings.compression import \
+    MIN_COMPRESSIBLE_FILE_SIZE
+from django_pastedeploy_settings.compression import compress
+from django_pastedeploy_settings.compression import \
+    is_compressible_content_type
+
+
+__all__ = ['StaticMediaApplication']
+
+
+_LOGGER = getLogger(__name__)
+
+
+_BLOCK_SIZE = 64 * 1024
+
+
+# Names given by Django's ManifestStaticFilesStorage (e.g.,
+# style.0123456789ab.css)
+_HASHED_FILE_NAME_REGEX = re.compile(r'\.[0-9a-f]{12}\.[^./]+$')
+
+
+_BYTE_RANGE_REGEX = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+_PRECOMPRESSED_FILE_EXTENSIONS = (('br', '.br'), ('gzip', '.gz'))
+
+
+_DEFAULT_RESPONSE_CACHE_MAX_FILE_SIZE = 64 * 1024
+
+
+_DEFAULT_COMPRESSION_CACHE_SIZE = 16 * 1024 * 1024
+
+
+_COMPRESSION_MAX_FILE_SIZE = 1024 * 1024
+
+
+_COMPRESSION_LEVEL = 6
+
+
+class StaticMediaApplication(object):
+    """
+    WSGI application which serves the files in ``root_directory``.
+
+    :param cache_max_age: The number of seconds that clients may cache the
+        files for, if any.
+    :param hashed_file_max_age: The number of seconds that clients may cache
+        the files whose names contain a hash of their contents for, if any.
+    :param index: Whether to index the files in ``root_directory`` upfront,
+        so that requests are served without accessing the file system until
+        the file is sent.
+    :param index_ttl: The number of seconds after which the index is
+        refreshed in the background, if any.
+    :param index_manifest: The path to a Django staticfiles manifest
+        (:file:`staticfiles.json`) listing the files to index, instead of
+        scanning ``root_directory``. Relative paths are relative to
+        ``root_directory``.
+    :param response_cache_size: The maximum number of bytes of file contents
+        to keep in memory, if any.
+    :param response_cache_max_file_size: The size in bytes of the largest
+        file whose contents may be kept in memory.
+    :param compress: Whether to compress text-like files with gzip when the
+        client supports it and there's no precompressed variant.
+    :param compression_cache_size: The maximum number of bytes of compressed
+        contents to keep in memory.
+
+    When ``hashed_file_max_age`` is set, files whose names contain a hash of
+    their contents as produced by Django's
+    :class:`~django.contrib.staticfiles.storage.ManifestStaticFilesStorage`
+    (e.g., ``style.0123456789ab.css``) are marked as immutable and can be
+    cached for that long instead. Only set it for directories of static
+    files, since other files (e.g., user uploads) may have similar names and
+    yet be replaced.
+
+    Files are sent with ``wsgi.file_wrapper`` when the server provides it,
+    which allows the server to use ``sendfile()``. Conditional requests and
+    single byte ranges are supported.
+
+    The headers for each file are computed once, and then reused for as long
+    as the modification time and size of the file don't change. When the
+    files are indexed, the changes are only noticed once the index is
+    refreshed.
+
+    When ``response_cache_size`` is set, the contents of the files no larger
+    than ``response_cache_max_file_size`` are kept in memory along with their
+    headers, and the least recently used ones are discarded when the
+    contents of all the files exceed ``response_cache_size``. The contents
+    are read again when the modification time or size of the file changes.
+
+    The encoding of the response is negotiated with the client: Files such as
+    ``style.css`` are served compressed from ``style.css.br`` or
+    ``style.css.gz`` when present, or otherwise compressed with gzip if
+    ``compress`` is set. Compressed contents are kept in memory until the
+    file changes or until they're discarded to keep within
+    ``compression_cache_size``, and only files up to 1 MiB are compressed.
+
+    """
+
+    def __init__(self, root_directory, cache_max_age=None, index=False,
+                 index_ttl=None, index_manifest=None, response_cache_size=None,
+                 response_cache_max_file_size=None, compress=False,
+                 compression_cache_size=None, hashed_file_max_age=None):
+        super(StaticMediaApplication, self).__init__()
+
+        self.root_directory = os.path.abspath(root_directory)
+        self.cache_max_age = cache_max_age
+        self.hashed_file_max_age = hashed_file_max_age
+
+        self._file_records = {}
+
+        if compress:
+            if compression_cache_size is None:
+                compression_cache_size = _DEFAULT_COMPRESSION_CACHE_SIZE
+            self.compression_cache = _ResponseCache(
+                compression_cache_size,
+                min(_COMPRESSION_MAX_FILE_SIZE, compression_cache_size),
+                )
+        else:
+            self.compression_cache = None
+
+        if index or index_manifest:
+            if index_manifest:
+                index_manifest = \
+                    os.path.join(self.root_directory, index_manifest)
+            self.file_index = _StaticFileIndex(
+                self.root_directory,
+                self._make_file_record,
+                index_ttl,
+                index_manifest,
+                )
+        else:
+            self.file_index = None
+
+        if response_cache_size:
+            if response_cache_max_file_size is None:
+                response_cache_max_file_size = \
+                    _DEFAULT_RESPONSE_CACHE_MAX_FILE_SIZE
+            self.response_cache = _ResponseCache(
+                response_cache_size,
+                min(response_cache_max_file_size, response_cache_size),
+                )
+        else:
+            self.response_cache = None
+
+    def __call__(self, environ, start_response):
+        request_method = environ['REQUEST_METHOD']
+        if request_method not in ('GET', 'HEAD'):
+            return respond(
+                start_response,
+                '405 Method Not Allowed',
+                [('Allow', 'GET, HEAD')],
+                )
+
+        relative_path = _get_relative_path(environ.get('PATH_INFO', ''))
+        file_record = relative_path and self._get_file_record(relative_path)
+        if not file_record:
+            return respond(start_response, '404 Not Found')
+
+        file_record, file_contents = \
+            self._negotiate_content_encoding(environ, file_record)
+
+        if _is_not_modified(environ, file_record):
+            return respond(
+                start_response,
+                '304 Not Modified',
+                file_record.validation_headers,
+                )
+
+        byte_range = _get_byte_range(environ, file_record)
+        if byte_range is _UNSATISFIABLE_BYTE_RANGE:
+            return respond(
+                start_response,
+                '416 Requested Range Not Satisfiable',
+                [('Content-Range', 'bytes */%d' % file_record.size)],
+                )
+
+        if byte_range:
+            first_byte_position, last_byte_position = byte_range
+            content_length = last_byte_position - first_byte_position + 1
+            status = '206 Partial Content'
+            headers = file_record.headers + [
+                ('Content-Length', str(content_length)),
+                (
+                    'Content-Range',
+                    'bytes %d-%d/%d' % (
+                        first_byte_position,
+                        last_byte_position,
+                        file_record.size,
+                        ),
+                    ),
+                ]
+        else:
+            first_byte_position = 0
+            content_length = file_record.size
+            status = '200 OK'
+            headers = file_record.headers + \
+                [('Content-Length', str(content_length))]
+
+        if request_method == 'HEAD':
+            start_response(status, headers)
+            return []
+
+        response_cache = self.response_cache
+        if file_contents is None and response_cache is not None and \
+                response_cache.is_cacheable(file_record.size):
+            file_contents = self._get_file_contents(file_record)
+
+        if file_contents is not None:
+            start_response(status, headers)
+            return [
+                file_contents[
+                    first_byte_position:first_byte_position + content_length
+                    ],
+                ]
+
+        try:
+            file_ = open(file_record.file_path, 'rb')
+        except IOError:
+            return respond(start_response, '404 Not Found')
+
+        start_response(status, headers)
+
+        file_wrapper = environ.get('wsgi.file_wrapper')
+        if file_wrapper and not byte_range:
+            response_body = file_wrapper(file_, _BLOCK_SIZE)
+        else:
+            response_body = \
+                _FileIterator(file_, first_byte_position, content_length)
+        return response_body
+
+    def _get_file_contents(self, file_record):
+        cache_entry = \
+            self.response_cache.get(file_record.file_path, file_record)
+        if cache_entry:
+            file_contents = cache_entry[1]
+        else:
+            file_contents = _read_file_contents(file_record)
+            if file_contents is not None:
+                self.response_cache.set(
+                    file_record.file_path,
+                    file_record,
+                    file_contents,
+                    )
+        return file_contents
+
+    def _negotiate_content_encoding(self, environ, file_record):
+        """
+        Return the record of the variant of the file to serve, along with
+        its contents if they're in memory.
+
+        """
+        if not file_record.vary_by_content_encoding:
+            return file_record, None
+
+        content_encodings = _get_accepted_content_encodings(
+            environ.get('HTTP_ACCEPT_ENCODING', ''),
+            )
+        for content_encoding, _ in _PRECOMPRESSED_FILE_EXTENSIONS:
+            if content_encoding in content_encodings and \
+                    content_encoding in file_record.precompressed_file_paths:
+                encoded_file_record = self._get_precompressed_file_record(
+                    file_record,
+                    content_encoding,
+                    )
+                if encoded_file_record:
+                    return encoded_file_record, None
+
+        if file_record.is_compressible and 'gzip' in content_encodings:
+            return self._get_compressed_file(file_record)
+
+        return file_record, None
+
+    def _get_precompressed_file_record(self, file_record, content_encoding):
+        encoded_file_records = file_record.encoded_file_records
+        encoded_file_record = encoded_file_records.get(content_encoding)
+        if encoded_file_record and self.file_index:
+            if _is_outdated_variant(encoded_file_record, file_record):
+                return None
+            return encoded_file_record
+
+        encoded_file_path = \
+            file_record.precompressed_file_paths[content_encoding]
+        try:
+            encoded_file_stat = os.stat(encoded_file_path)
+        except OSError:
+            return None
+
+        encoded_file_signature = \
+            (encoded_file_stat.st_mtime, encoded_file_stat.st_size)
+        if not encoded_file_record or \
+                encoded_file_record.signature != encoded_file_signature:
+            encoded_file_record = _FileRecord(
+                encoded_file_path,
+                encoded_file_stat,
+                file_record.cache_control,
+                content_type=file_record.content_type,
+                content_encoding=content_encoding,
+                )
+            encoded_file_records[content_encoding] = encoded_file_record
+
+        if _is_outdated_variant(encoded_file_record, file_record):
+            return None
+        return encoded_file_record
+
+    def _get_compressed_file(self, file_record):
+        compression_cache = self.compression_cache
+        cache_entry = compression_cache.get(file_record.file_path, file_record)
+        if cache_entry:
+            return cache_entry
+
+        file_contents = _read_file_contents(file_record)
+        if file_contents is None:
+            return file_record, None
+
+        compressed_file_contents = compress(file_contents, _COMPRESSION_LEVEL)
+        if len(file_contents) <= len(compressed_file_contents):
+            return file_record, None
+
+        # The record of the variant shares the signature of the file, so
+        # that it's discarded when the file changes
+        compressed_file_record = _FileRecord(
+            file_record.file_path,
+            file_record.file_stat,
+            file_record.cache_control,
+            content_type=file_record.content_type,
+            content_encoding='gzip',
+            size=len(compressed_file_contents),
+            )
+        compression_cache.set(
+            file_record.file_path,
+            compressed_file_record,
+            compressed_file_contents,
+            )
+        return compressed_file_record, compressed_file_contents
+
+    def _get_file_record(self, relative_path):
+        if self.file_index:
+            return self.file_index.get_file_record(relative_path)
+
+        file_path = _get_file_path(self.root_directory, relative_path)
+        try:
+            file_stat = os.stat(file_path)
+        except OSError:
+            return None
+
+        file_signature = (file_stat.st_mtime, file_stat.st_size)
+        file_record = self._file_records.get(relative_path)
+        if file_record is None or file_record.signature != file_signature:
+            file_record = self._make_file_record(relative_path, file_stat)
+            if file_record:
+                self._file_records[relative_path] = file_record
+        return file_record
+
+    def _make_file_record(self, relative_path, file_stat=None,
+                          sibling_file_names=None):
+        """
+        Return the record for the file at ``relative_path``, or :data:`None`
+        if it isn't a regular file.
+
+        ``sibling_file_names`` are the names of the files in the same
+        directory, if known, so that the precompressed variants of the file
+        can be found without accessing the file system.
+
+        """
+        file_path = _get_file_path(self.root_directory, relative_path)
+        if file_stat is None:
+            try:
+                file_stat = os.stat(file_path)
+            except OSError:
+                return None
+
+        if not S_ISREG(file_stat.st_mode):
+            return None
+
+        file_name = os.path.basename(file_path)
+        precompressed_file_paths = {}
+        for content_encoding, file_extension in _PRECOMPRESSED_FILE_EXTENSIONS:
+            precompressed_file_name = file_name + file_extension
+            if sibling_file_names is None:
+                is_precompressed = \
+                    os.path.isfile(file_path + file_extension)
+            else:
+                is_precompressed = \
+                    precompressed_file_name in sibling_file_names
+            if is_precompressed:
+                precompressed_file_paths[content_encoding] = \
+                    file_path + file_extension
+
+        content_type = _guess_content_type(file_path)
+        compression_cache = self.compression_cache
+        is_compressible = bool(
+            compression_cache is not None and
+            is_compressible_content_type(content_type) and
+            MIN_COMPRESSIBLE_FILE_SIZE <= file_stat.st_size and
+            compression_cache.is_cacheable(file_stat.st_size)
+            )
+
+        file_record = _FileRecord(
+            file_path,
+            file_stat,
+            self._get_cache_control(file_name),
+            precompressed_file_paths,
+            is_compressible,
+            content_type,
+            )
+        return file_record
+
+    def _get_cache_control(self, file_name):
+        is_hashed_file = self.hashed_file_max_age is not None and \
+            _HASHED_FILE_NAME_REGEX.search(file_name)
+        if is_hashed_file:
+            cache_control = 'public, max-age=%d, immutable' % \
+                self.hashed_file_max_age
+        elif self.cache_max_age is not None:
+            cache_control = 'public, max-age=%d' % self.cache_max_age
+        else:
+            cache_control = None
+        return cache_control
+
+
+class _StaticFileIndex(object):
+    """
+    Records of the files in a directory, by path relative to the directory.
+
+    The files listed in a manifest are recorded on first access, so that
+    the index can be built without accessing each file.
+
+    """
+
+    def __init__(self, root_directory, make_file_record, ttl=None,
+                 manifest_path=None):
+        super(_StaticFileIndex, self).__init__()
+
+        self.root_directory = root_directory
+        self.ttl = ttl
+        self.manifest_path = manifest_path
+
+        self._make_file_record = make_file_record
+        self._file_records = {}
+        self._expiry_time = None
+        self._expiry_lock = Lock()
+
+        self.refresh()
+
+    def get_file_record(self, relative_path):
+        if self._expiry_time is not None and self._expiry_time <= time():
+            self._refresh_in_background()
+
+        file_records = self._file_records
+        try:
+            file_record = file_records[relative_path]
+        except KeyError:
+            return None
+
+        if file_record is None:
+            file_record = self._make_file_record(relative_path)
+            if file_record:
+                file_records[relative_path] = file_record
+            else:
+                file_records.pop(relative_path, None)
+        return file_record
+
+    def refresh(self):
+        """
+        Replace the records with those of the files currently in the
+        directory or manifest.
+
+        The records of the files which haven't changed are reused.
+
+        """
+        if self.manifest_path:
+            file_records = self._get_file_records_from_manifest()
+        else:
+            file_records = self._get_file_records_from_directory()
+        self._file_records = file_records
+
+        if self.ttl is not None:
+            self._expiry_time = time() + self.ttl
+
+    def _refresh_in_background(self):
+        with self._expiry_lock:
+            if time() < self._expiry_time:
+                return
+            # Prevent concurrent refreshes
+            self._expiry_time = time() + self.ttl
+
+        refresh_thread = Thread(
+            target=self._refresh_logging_errors,
+            name='StaticFileIndexRefresh',
+            )
+        refresh_thread.daemon = True
+        refresh_thread.start()
+
+    def _refresh_logging_errors(self):
+        try:
+            self.refresh()
+        except Exception:
+            _LOGGER.exception(
+                'Could not refresh index of %s',
+                self.root_directory,
+                )
+
+    def _get_file_records_from_directory(self):
+        old_file_records = self._file_records
+        file_records = {}
+        for directory_path, _, file_names in os.walk(self.root_directory):
+            relative_directory_path = \
+                os.path.relpath(directory_path, self.root_directory)
+            if relative_directory_path == os.curdir:
+                relative_path_prefix = ''
+            else:
+                relative_path_prefix = \
+                    relative_directory_path.replace(os.sep, '/') + '/'
+
+            sibling_file_names = frozenset(file_names)
+            for file_name in file_names:
+                relative_path = relative_path_prefix + file_name
+                file_path = os.path.join(directory_path, file_name)
+                try:
+                    file_stat = os.stat(file_path)
+                except OSError:
+                    continue
+
+                file_record = old_file_records.get(relative_path)
+                if file_record is None or file_record.signature != \
+                        (file_stat.st_mtime, file_stat.st_size):
+                    file_record = self._make_file_record(
+                        relative_path,
+                        file_stat,
+                        sibling_file_names,
+                        )
+                if file_record:
+                    file_records[relative_path] = file_record
+        return file_records
+
+    def _get_file_records_from_manifest(self):
+        with open(self.manifest_path) as manifest_file:
+            manifest = json.load(manifest_file)
+
+        old_file_records = self._file_records
+        file_records = {}
+        for original_path, hashed_path in manifest['paths'].items():
+            file_records[original_path] = None
+            # Files with hashed names don't change, so their records remain
+            # valid
+            file_records[hashed_path] = old_file_records.get(hashed_path)
+        return file_records
+
+
+class _FileRecord(object):
+    """
+    Metadata and response headers for a file.
+
+    """
+
+    __slots__ = (
+        'file_path',
+        'file_stat',
+        'signature',
+        'size',
+        'modification_time',
+        'etag',
+        'last_modified',
+        'cache_control',
+        'content_type',
+        'precompressed_file_paths',
+        'is_compressible',
+        'vary_by_content_encoding',
+        'encoded_file_records',
+        'validation_headers',
+        'headers',
+        )
+
+    def __init__(self, file_path, file_stat, cache_control,
+                 precompressed_file_paths=None, is_compressible=False,
+                 content_type=None, content_encoding=None, size=None):
+        self.file_path = file_path
+        self.file_stat = file_stat
+        self.signature = (file_stat.st_mtime, file_stat.st_size)
+        self.size = file_stat.st_size if size is None else size
+        self.modification_time = int(file_stat.st_mtime)
+
+        # The inode isn't part of the ETag, so that it's the same on every
+        # server with a copy of the file
+        etag = '%x-%x' % (
+            int(file_stat.st_mtime * 1000000),
+            file_stat.st_size,
+            )
+        if content_encoding:
+            etag += '-' + content_encoding
+        self.etag = '"%s"' % etag
+
+        self.last_modified = formatdate(self.modification_time, usegmt=True)
+        self.cache_control = cache_control
+        self.content_type = content_type or _guess_content_type(file_path)
+        self.precompressed_file_paths = precompressed_file_paths or {}
+        self.is_compressible = is_compressible
+        self.vary_by_content_encoding = bool(
+            content_encoding or
+            self.precompressed_file_paths or
+            is_compressible
+            )
+        # Records of the precompressed variants, by content encoding
+        self.encoded_file_records = {}
+
+        self.validation_headers = [
+            ('ETag', self.etag),
+            ('Last-Modified', self.last_modified),
+            ]
+        if cache_control:
+            self.validation_headers.append(('Cache-Control', cache_control))
+        if self.vary_by_content_encoding:
+            self.validation_headers.append(('Vary', 'Accept-Encoding'))
+
+        self.headers = self.validation_headers + \
+            [('Content-Type', self.content_type)]
+        if content_encoding:
+            self.headers.append(('Content-Encoding', content_encoding))
+        self.headers.append(('Accept-Ranges', 'bytes'))
+
+
+class _ResponseCache(object):
+    """
+    Least recently used contents of files, along with the records they were
+    read for, by file path.
+
+    The total size of the contents is kept within ``max_size`` bytes.
+
+    """
+
+    def __init__(self, max_size, max_file_size):
+        super(_ResponseCache, self).__init__()
+
+        self.max_size = max_size
+        self.max_file_size = max_file_size
+
+        self._size = 0
+        self._entries = OrderedDict()
+        self._lock = Lock()
+
+    def is_cacheable(self, file_size):
+        return file_size <= self.max_file_size
+
+    def get(self, file_path, file_record):
+        """
+        Return the record and contents cached for the file at ``file_path``
+        if they were read for a record with the same signature as
+        ``file_record``.
+
+        """
+        with self._lock:
+            entry = self._entries.pop(file_path, None)
+            if entry is None:
+                return None
+
+            cached_file_record, file_contents = entry
+            if cached_file_record.signature != file_record.signature:
+                self._size -= len(file_contents)
+                return None
+
+            self._entries[file_path] = entry
+        return entry
+
+    def set(self, file_path, file_record, file_contents):
+        with self._lock:
+            old_entry = self._entries.pop(file_path, None)
+            if old_entry:
+                self._size -= len(old_entry[1])
+
+            self._entries[file_path] = (file_record, file_contents)
+            self._size += len(file_contents)
+            while self.max_size < self._size:
+                _, (_, evicted_file_contents) = \
+                    self._entries.popitem(last=False)
+                self._size -= len(evicted_file_contents)
+
+    @property
+    def size(self):
+        """The total size of the contents cached."""
+        return self._size
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class _FileIterator(object):
+    """
+    Iterator over ``length`` bytes of ``file_`` from ``offset``.
+
+    """
+
+    def __init__(self, file_, offset, length):
+        super(_FileIterator, self).__init__()
+
+        self._file = file_
+        self._offset = offset
+        self._remaining_length = length
+
+    def __iter__(self):
+        self._file.seek(self._offset)
+        while 0 < self._remaining_length:
+            block = self._file.read(min(_BLOCK_SIZE, self._remaining_length))
+            if not block:
+                break
+            self._remaining_length -= len(block)
+            yield block
+
+    def close(self):
+        self._file.close()
+
+
+_UNSATISFIABLE_BYTE_RANGE = object()
+
+
+def _get_byte_range(environ, file_record):
+    """
+    Return the first and last positions of the single byte range requested,
+    :data:`None` if the whole file must be sent, or
+    ``_UNSATISFIABLE_BYTE_RANGE``.
+
+    Requests for multiple ranges are served the whole file.
+
+    """
+    range_header = environ.get('HTTP_RANGE')
+    if not range_header:
+        return None
+
+    if_range_header = environ.get('HTTP_IF_RANGE')
+    if if_range_header and if_range_header not in \
+            (file_record.etag, file_record.last_modified):
+        return None
+
+    byte_range_match = _BYTE_RANGE_REGEX.match(range_header.strip())
+    if not byte_range_match:
+        return None
+
+    first_byte_position, last_byte_position = byte_range_match.groups()
+    file_size = file_record.size
+    if first_byte_position:
+        first_byte_position = int(first_byte_position)
+        if last_byte_position:
+            last_byte_position = \
+                min(int(last_byte_position), file_size - 1)
+        else:
+            last_byte_position = file_size - 1
+        if last_byte_position < first_byte_position:
+            if file_size <= first_byte_position:
+                return _UNSATISFIABLE_BYTE_RANGE
+            return None
+    elif last_byte_position:
+        suffix_length = int(last_byte_position)
+        if not suffix_length or not file_size:
+            return _UNSATISFIABLE_BYTE_RANGE
+        first_byte_position = max(file_size - suffix_length, 0)
+        last_byte_position = file_size - 1
+    else:
+        return None
+
+    return first_byte_position, last_byte_position
+
+
+def _is_not_modified(environ, file_record):
+    if_none_match_header = environ.get('HTTP_IF_NONE_MATCH')
+    if if_none_match_header:
+        etags = [etag.strip() for etag in if_none_match_header.split(',')]
+        weak_etag = 'W/' + file_record.etag
+        return '*' in etags or file_record.etag in etags or weak_etag in etags
+
+    if_modified_since_header = environ.get('HTTP_IF_MODIFIED_SINCE')
+    if if_modified_since_header:
+        if_modified_since = parsedate_tz(if_modified_since_header)
+        if if_modified_since:
+            return file_record.modification_time <= \
+                mktime_tz(if_modified_since)
+
+    return False
+
+
+def _is_outdated_variant(encoded_file_record, file_record):
+    """
+    Report whether the precompressed variant in ``encoded_file_record`` is
+    older than the file it was compressed from.
+
+    Modification times are compared to the second, as the variants created
+    by :mod:`django_pastedeploy_settings.compression` share the modification
+    time of their files.
+
+    """
+    return encoded_file_record.modification_time < \
+        file_record.modification_time
+
+
+def _get_accepted_content_encodings(accept_encoding_header):
+    """
+    Return the content encodings that the client accepts, according to
+    ``accept_encoding_header``.
+
+    """
+    accepted_content_encodings = set()
+    rejected_content_encodings = set()
+    are_other_content_encodings_accepted = False
+    for accept_encoding_item in accept_encoding_header.split(','):
+        content_encoding, _, parameters = accept_encoding_item.partition(';')
+        content_encoding = content_encoding.strip().lower()
+        if not content_encoding:
+            continue
+
+        quality = 1
+        parameter_name, _, parameter_value = parameters.partition('=')
+        if parameter_name.strip().lower() == 'q':
+            try:
+                quality = float(parameter_value)
+            except ValueError:
+                quality = 0
+
+        if content_encoding == '*':
+            are_other_content_encodings_accepted = 0 < quality
+        elif 0 < quality:
+            accepted_content_encodings.add(content_encoding)
+        else:
+            rejected_content_encodings.add(content_encoding)
+
+    if 'x-gzip' in accepted_content_encodings:
+        accepted_content_encodings.add('gzip')
+    if are_other_content_encodings_accepted:
+        for content_encoding, _ in _PRECOMPRESSED_FILE_EXTENSIONS:
+            if content_encoding not in rejected_content_encodings:
+                accepted_content_encodings.add(content_encoding)
+    return accepted_content_encodings
+
+
+def _read_file_contents(file_record):
+    """
+    Return the contents of the file in ``file_record``, or :data:`None` if
+    it can't be read or it has changed since it was recorded.
+
+    """
+    try:
+        with open(file_record.file_path, 'rb') as file_:
+            file_contents = file_.read()
+    except IOError:
+        return None
+
+    if len(file_contents) != file_record.signature[1]:
+        file_contents = None
+    return file_contents
+
+
+def _get_relative_path(path_info):
+    """
+    Return the path to the file requested, relative to the root directory
+    and with forward slashes, or :data:`None` if it's invalid.
+
+    """
+    if sys.version_info[0] >= 3:
+        # PEP 3333 strings are decoded as ISO-8859-1
+        try:
+            path_info = path_info.encode('iso-8859-1').decode('utf-8')
+        except UnicodeError:
+            return None
+
+    path_segments = [
+        path_segment
+        for path_segment in path_info.split('/')
+        if path_segment and path_segment != '.'
+        ]
+    is_path_valid = path_segments and all(
+        path_segment != '..' and '\0' not in path_segment and
+            '\\' not in path_segment
+        for path_segment in path_segments
+        )
+    if is_path_valid:
+        relative_path = '/'.join(path_segments)
+    else:
+        relative_path = None
+    return relative_path
+
+
+def _get_file_path(root_directory, relative_path):
+    return os.path.join(root_directory, *relative_path.split('/'))
+
+
+def _guess_content_type(file_path):
+    content_type, content_encoding = mimetypes.guess_type(file_path)
+    if content_encoding == 'gzip':
+        content_type = 'application/gzip'
+    elif not content_type:
+        content_type = 'application/octet-stream'
+    return content_type
@@ -0,0 +1,173 @@
+# -*- coding: utf-8 -*-
+##############################################################################
+#
+# Copyright (c) 2016, 2degrees Limited.
+# All Rights Reserved.
+#
+# This file is part of django-pastedeploy-settings
+# <https://github.com/2degrees/django-pastedeploy-settings>, which is subject
+# to the provisions of the BSD at
+# <http://dev.2degreesnetwork.com/p/2degrees-license.html>. A copy of the
+# license should accompany this distribution. THIS SOFTWARE IS PROVIDED "AS IS"
+# AND ANY AND ALL EXPRESS OR IMPLIED WARRANTIES ARE DISCLAIMED, INCLUDING, BUT
+# NOT LIMITED TO, THE IMPLIED WARRANTIES OF TITLE, MERCHANTABILITY, AGAINST
+# INFRINGEMENT, AND FITNESS FOR A PARTICULAR PURPOSE.
+#
+##############################################################################
+"""
+Merging of the settings in the PasteDeploy configuration with those already
+defined in the Django settings module.
+
+Each strategy is a function which takes the value in the settings module and
+the value in the PasteDeploy configuration, and returns the merged value or
+:data:`NotImplemented` if it cannot merge values of those types.
+
+"""
+from itertools import chain
+
+
+__all__ = [
+    'MERGE_STRATEGIES',
+    'append_sequences',
+    'get_default_merge_strategy_name',
+    'keep_value',
+    'merge_mappings',
+    'merge_sequences_uniquely',
+    'parse_merge_strategies',
+    'replace_value',
+    ]
+
+
+def merge_sequences_uniquely(existing_value, new_value):
+    """
+    Return the items in ``existing_value`` followed by those in
+    ``new_value`` as a tuple, without duplicates.
+
+    The first occurrence of each item is kept.
+
+    """
+    if not _are_sequences(existing_value, new_value):
+        return NotImplemented
+
+    merged_items = []
+    hashable_items_seen = set()
+    unhashable_items_seen = []
+    for item in chain(existing_value, new_value):
+        try:
+            is_item_seen = item in hashable_items_seen
+        except TypeError:
+            is_item_seen = item in unhashable_items_seen
+            if not is_item_seen:
+                unhashable_items_seen.append(item)
+        else:
+            if not is_item_seen:
+                hashable_items_seen.add(item)
+
+        if not is_item_seen:
+            merged_items.append(item)
+
+    return tuple(merged_items)
+
+
+def append_sequences(existing_value, new_value):
+    """
+    Return the items in ``existing_value`` followed by those in
+    ``new_value`` as a tuple, including any duplicates.
+
+    """
+    if not _are_sequences(existing_value, new_value):
+        return NotImplemented
+
+    return tuple(existing_value) + tuple(new_value)
+
+
+def merge_mappings(existing_value, new_value):
+    """
+    Return ``existing_value`` updated recursively with the items in
+    ``new_value``.
+
+    Neither mapping is modified: The mappings which are updated are copied,
+    whilst the rest are shared with the original mappings.
+
+    """
+    if not (isinstance(existing_value, dict) and isinstance(new_value, dict)):
+        return NotImplemented
+
+    merged_value = existing_value.copy()
+    for key, new_item in new_value.items():
+        existing_item = merged_value.get(key)
+        if isinstance(existing_item, dict) and isinstance(new_item, dict):
+            new_item = merge_mappings(existing_item, new_item)
+        merged_value[key] = new_item
+    return merged_value
+
+
+def replace_value(existing_value, new_value):
+    """Return ``new_value``."""
+    return new_value
+
+
+def keep_value(existing_value, new_value):
+    """Return ``existing_value``."""
+    return existing_value
+
+
+MERGE_STRATEGIES = {
+    'union': merge_sequences_uniquely,
+    'append': append_sequences,
+    'merge': merge_mappings,
+    'replace': replace_value,
+    'keep': keep_value,
+    }
+"""Merge strategies by name."""
+
+
+def get_default_merge_strategy_name(existing_value):
+    """
+    Return the name of the strategy to merge a setting whose value in the
+    settings module is ``existing_value``, or :data:`None` if it must not be
+    overridden.
+
+    """
+    if isinstance(existing_value, (tuple, list)):
+        merge_strategy_name = 'union'
+    elif isinstance(existing_value, dict):
+        merge_strategy_name = 'merge'
+    else:
+        merge_strategy_name = None
+    return merge_strategy_name
+
+
+def parse_merge_strategies(merge_strategies_spec):
+    """
+    Return the strategy names by setting name in ``merge_strategies_spec``.
+
+    The specification is made up of ``SETTING_NAME:strategy_name`` pairs
+    separated by whitespace.
+
+    :raises ValueError: If a pair is malformed or refers to an unknown
+        strategy.
+
+    """
+    merge_strategy_names = {}
+    for merge_strategy_pair in merge_strategies_spec.split():
+        setting_name, separator, merge_strategy_name = \
+            merge_strategy_pair.partition(':')
+        if not (setting_name and separator):
+            raise ValueError(
+                'Merge strategy %r is not in the form "SETTING:strategy"' %
+                    merge_strategy_pair,
+                )
+        if merge_strategy_name not in MERGE_STRATEGIES:
+            raise ValueError(
+                'Unknown merge strategy %r for setting %r' % (
+                    merge_strategy_name,
+                    setting_name,
+                    ),
+                )
+        merge_strategy_names[setting_name] = merge_strategy_name
+    return merge_strategy_names
+
+
+def _are_sequences(*values):
+    return all(isinstance(value, (tuple, list)) for value in values)
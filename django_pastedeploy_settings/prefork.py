@@ -0,0 +1,106 @@
+# -*- coding: utf-8 -*-
+##############################################################################
+#
+# Copyright (c) 2016, 2degrees Limited.
+# All Rights Reserved.
+#
+# This file is part of django-pastedeploy-settings
+# <https://github.com/2degrees/django-pastedeploy-settings>, which is subject
+# to the provisions of the BSD at
+# <http://dev.2degreesnetwork.com/p/2degrees-license.html>. A copy of the
+# license should accompany this distribution. THIS SOFTWARE IS PROVIDED "AS IS"
+# AND ANY AND ALL EXPRESS OR IMPLIED WARRANTIES ARE DISCLAIMED, INCLUDING, BUT
+# NOT LIMITED TO, THE IMPLIED WARRANTIES OF TITLE, MERCHANTABILITY, AGAINST
+# INFRINGEMENT, AND FITNESS FOR A PARTICULAR PURPOSE.
+#
+##############################################################################
+"""
+Support for WSGI servers which load the application before forking workers.
+
+"""
+import gc
+from logging import getLogger
+import os
+
+
+__all__ = ['add_post_fork_hook', 'prepare_for_fork', 'reset_after_fork']
+
+
+_LOGGER = getLogger(__name__)
+
+
+_POST_FORK_HOOKS = []
+
+
+_is_fork_handler_registered = False
+
+
+def prepare_for_fork():
+    """
+    Get the current process ready to be forked once the Django application
+    has been loaded.
+
+    This completes the set-up of Django and releases the resources which
+    must not be shared with the child processes (e.g., database connections).
+
+    Then the objects created so far are moved to the permanent generation of
+    the garbage collector, where available, so that the collector doesn't
+    write to the memory pages shared with the children.
+
+    On Python 3.7 and later, :func:`reset_after_fork` is called automatically
+    in the child processes. Otherwise, it has to be called from the
+    post-fork hook of the server (e.g., ``post_fork`` in Gunicorn).
+
+    """
+    import django
+    django.setup()
+
+    _close_django_connections()
+
+    gc.collect()
+    if hasattr(gc, 'freeze'):
+        gc.freeze()
+    else:
+        _LOGGER.debug('Garbage collector cannot be frozen in this Python')
+
+    _register_fork_handler()
+
+
+def reset_after_fork():
+    """
+    Release the resources inherited from the parent process and call the
+    hooks registered with :func:`add_post_fork_hook`.
+
+    """
+    _close_django_connections()
+
+    for post_fork_hook in _POST_FORK_HOOKS:
+        post_fork_hook()
+
+
+def add_post_fork_hook(post_fork_hook):
+    """
+    Call ``post_fork_hook`` without arguments in each child process.
+
+    """
+    _POST_FORK_HOOKS.append(post_fork_hook)
+
+
+def _close_django_connections():
+    from django.db import connections
+    for connection in connections.all():
+        connection.close()
+
+    from django.core.cache import caches
+    for cache in caches.all():
+        cache.close()
+
+
+def _register_fork_handler():
+    global _is_fork_handler_registered
+
+    if _is_fork_handler_registered or not hasattr(os, 'register_at_fork'):
+        return
+
+    os.register_at_fork(after_in_child=reset_after_fork)
+    _is_fork_handler_registered = True
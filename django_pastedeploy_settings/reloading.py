@@ -0,0 +1,200 @@
+# -*- coding: utf-8 -*-
+##############################################################################
+#
+# Copyright (c) 2016, 2degrees Limited.
+# All Rights Reserved.
+#
+# This file is part of django-pastedeploy-settings
+# <https://github.com/2degrees/django-pastedeploy-settings>, which is subject
+# to the provisions of the BSD at
+# <http://dev.2degreesnetwork.com/p/2degrees-license.html>. A copy of the
+# license should accompany this distribution. THIS SOFTWARE IS PROVIDED "AS IS"
+# AND ANY AND ALL EXPRESS OR IMPLIED WARRANTIES ARE DISCLAIMED, INCLUDING, BUT
+# NOT LIMITED TO, THE IMPLIED WARRANTIES OF TITLE, MERCHANTABILITY, AGAINST
+# INFRINGEMENT, AND FITNESS FOR A PARTICULAR PURPOSE.
+#
+##############################################################################
+"""
+Reloading of the settings of running Django applications.
+
+"""
+from logging import getLogger
+import signal
+from threading import Lock
+
+from django.dispatch import Signal
+
+
+__all__ = [
+    'install_reload_signal_handler',
+    'reload_settings',
+    'RESTART_REQUIRED_SETTINGS',
+    'SettingsReload',
+    'setting_reloaded',
+    ]
+
+
+_LOGGER = getLogger(__name__)
+
+
+_RELOAD_LOCK = Lock()
+
+
+setting_reloaded = Signal()
+"""
+Signal sent for each setting whose new value was stored in Django's
+:data:`~django.conf.settings` object by a reload, with the arguments
+``setting`` (the name of the setting) and ``value``.
+
+"""
+
+
+RESTART_REQUIRED_SETTINGS = frozenset([
+    'ADMIN_MEDIA_PREFIX',
+    'AUTH_USER_MODEL',
+    'CACHES',
+    'DATABASE_ROUTERS',
+    'DATABASES',
+    'DEBUG',
+    'INSTALLED_APPS',
+    'LOGGING',
+    'LOGGING_CONFIG',
+    'MEDIA_ROOT',
+    'MEDIA_URL',
+    'MIDDLEWARE',
+    'MIDDLEWARE_CLASSES',
+    'ROOT_URLCONF',
+    'STATIC_ROOT',
+    'STATIC_URL',
+    'TEMPLATES',
+    'TIME_ZONE',
+    'USE_TZ',
+    'WSGI_APPLICATION',
+    ])
+"""
+Settings which are only read when the application is loaded, and therefore
+cannot be changed in a running process.
+
+"""
+
+
+class SettingsReload(object):
+    """
+    Outcome of the reload of the settings of an application.
+
+    .. attribute:: reloaded_setting_names
+
+        The names of the settings whose new values were stored.
+
+    .. attribute:: restart_required_setting_names
+
+        The names of the settings which changed or were removed, but which
+        can only be updated by restarting the process.
+
+    """
+
+    def __init__(self, reloaded_setting_names, restart_required_setting_names):
+        super(SettingsReload, self).__init__()
+
+        self.reloaded_setting_names = sorted(reloaded_setting_names)
+        self.restart_required_setting_names = \
+            sorted(restart_required_setting_names)
+
+    @property
+    def is_restart_required(self):
+        """Whether some changes only take effect after a restart."""
+        return bool(self.restart_required_setting_names)
+
+    def __repr__(self):
+        return '<SettingsReload reloaded=%r restart_required=%r>' % (
+            self.reloaded_setting_names,
+            self.restart_required_setting_names,
+            )
+
+
+def reload_settings(config_uri, name=None, relative_to=None):
+    """
+    Re-read the configuration of the application ``name`` in the
+    PasteDeploy configuration at ``config_uri`` and store the settings which
+    changed since the application was loaded.
+
+    The arguments are the same as in :func:`paste.deploy.appconfig`.
+
+    :rtype: :class:`SettingsReload`
+
+    Any exception raised while resolving the new options is propagated, in
+    which case no settings are changed. Concurrent reloads are serialised.
+
+    """
+    with _RELOAD_LOCK:
+        settings_reload = _reload_settings(config_uri, name, relative_to)
+    return settings_reload
+
+
+def install_reload_signal_handler(config_uri, name=None, relative_to=None,
+                                  signal_number=None):
+    """
+    Call :func:`reload_settings` with the arguments passed when the process
+    receives the signal ``signal_number`` (``SIGHUP`` by default).
+
+    The outcome is logged, along with any error, instead of being
+    propagated.
+
+    """
+    if signal_number is None:
+        signal_number = signal.SIGHUP
+
+    def handle_signal(signal_number, frame):
+        # The signal may be received by the thread which is already reloading
+        # the settings, which must not be interrupted by a second reload
+        if not _RELOAD_LOCK.acquire(False):
+            _LOGGER.warning(
+                'Ignoring reload signal: The settings are already being '
+                'reloaded',
+                )
+            return
+
+        try:
+            _reload_settings_logging_outcome(
+                config_uri,
+                name,
+                relative_to,
+                _reload_settings,
+                )
+        finally:
+            _RELOAD_LOCK.release()
+
+    signal.signal(signal_number, handle_signal)
+
+
+def _reload_settings(config_uri, name, relative_to):
+    from paste.deploy import appconfig
+
+    from django_pastedeploy_settings import get_load_context
+
+    app_config = appconfig(config_uri, name=name, relative_to=relative_to)
+    load_context = get_load_context(app_config.global_conf)
+    settings_reload = load_context.reload_settings(app_config.local_conf)
+    return settings_reload
+
+
+def _reload_settings_logging_outcome(config_uri, name, relative_to,
+                                     reload_settings=reload_settings):
+    try:
+        settings_reload = reload_settings(config_uri, name, relative_to)
+    except Exception:
+        _LOGGER.exception('Could not reload settings from %s', config_uri)
+        return
+
+    if settings_reload.reloaded_setting_names:
+        _LOGGER.info(
+            'Reloaded settings from %s: %s',
+            config_uri,
+            ', '.join(settings_reload.reloaded_setting_names),
+            )
+    if settings_reload.is_restart_required:
+        _LOGGER.warning(
+            'The following settings changed in %s but require a restart: %s',
+            config_uri,
+            ', '.join(settings_reload.restart_required_setting_names),
+            )
@@ -0,0 +1,158 @@
+# -*- coding: utf-8 -*-
+##############################################################################
+#
+# Copyright (c) 2016, 2degrees Limited.
+# All Rights Reserved.
+#
+# This file is part of django-pastedeploy-settings
+# <https://github.com/2degrees/django-pastedeploy-settings>, which is subject
+# to the provisions of the BSD at
+# <http://dev.2degreesnetwork.com/p/2degrees-license.html>. A copy of the
+# license should accompany this distribution. THIS SOFTWARE IS PROVIDED "AS IS"
+# AND ANY AND ALL EXPRESS OR IMPLIED WARRANTIES ARE DISCLAIMED, INCLUDING, BUT
+# NOT LIMITED TO, THE IMPLIED WARRANTIES OF TITLE, MERCHANTABILITY, AGAINST
+# INFRINGEMENT, AND FITNESS FOR A PARTICULAR PURPOSE.
+#
+##############################################################################
+"""
+Warm-up of Django applications before they serve requests.
+
+"""
+from logging import getLogger
+from timeit import default_timer
+from wsgiref.util import setup_testing_defaults
+
+from django_pastedeploy_settings.instrumentation import collect_startup_report
+from django_pastedeploy_settings.instrumentation import measure_phase
+
+
+__all__ = ['WARM_UP_ENVIRON_KEY', 'warm_up']
+
+
+_LOGGER = getLogger(__name__)
+
+
+WARM_UP_ENVIRON_KEY = 'django_pastedeploy_settings.warm_up'
+"""
+Key set in the WSGI environment of the requests made during the warm-up,
+so that they can be told apart from real requests (e.g., to skip
+analytics).
+
+"""
+
+
+_DEFAULT_HOST = 'localhost'
+
+
+def warm_up(wsgi_application, paths=(), open_connections=False, host=None):
+    """
+    Make a ``GET`` request to ``wsgi_application`` for each of the
+    ``paths``, and open the connections to the databases and caches if
+    ``open_connections`` is set.
+
+    :param paths: The paths to request, which may include a query string.
+    :param host: The value of the ``Host`` header in the requests. By
+        default, it's the first host in ``ALLOWED_HOSTS`` which isn't a
+        pattern, or ``localhost``.
+
+    This is meant to run the lazy initialisation of the application (e.g.,
+    the compilation of the URL patterns, the loading of the templates)
+    before it serves real requests. The time taken by each request is
+    recorded as a phase of the start-up.
+
+    Failed requests and connections are logged as warnings, since the
+    application may still be able to serve other requests.
+
+    """
+    with collect_startup_report(), measure_phase('warm_up'):
+        if open_connections:
+            with measure_phase('connections'):
+                _open_connections()
+
+        if paths:
+            host = host or _get_default_host()
+            for path in paths:
+                with measure_phase(path):
+                    _make_request(wsgi_application, path, host)
+
+
+def _open_connections():
+    from django.conf import settings
+    from django.core.cache import caches
+    from django.db import connections
+
+    for connection in connections.all():
+        try:
+            connection.ensure_connection()
+        except Exception:
+            _LOGGER.warning(
+                'Could not connect to database %r during warm-up',
+                connection.alias,
+                exc_info=True,
+                )
+
+    for cache_alias in settings.CACHES:
+        try:
+            caches[cache_alias]
+        except Exception:
+            _LOGGER.warning(
+                'Could not set up cache %r during warm-up',
+                cache_alias,
+                exc_info=True,
+                )
+
+
+def _get_default_host():
+    from django.conf import settings
+
+    for allowed_host in settings.ALLOWED_HOSTS:
+        if allowed_host != '*' and not allowed_host.startswith('.'):
+            return allowed_host
+    return _DEFAULT_HOST
+
+
+def _make_request(wsgi_application, path, host):
+    path_info, _, query_string = path.partition('?')
+    environ = {
+        'REQUEST_METHOD': 'GET',
+        'SCRIPT_NAME': '',
+        'PATH_INFO': path_info,
+        'QUERY_STRING': query_string,
+        'HTTP_HOST': host,
+        WARM_UP_ENVIRON_KEY: True,
+        }
+    setup_testing_defaults(environ)
+
+    response_statuses = []
+
+    def start_response(status, headers, exc_info=None):
+        response_statuses.append(status)
+
+    initial_time = default_timer()
+    try:
+        response_body = wsgi_application(environ, start_response)
+        try:
+            for _ in response_body:
+                pass
+        finally:
+            if hasattr(response_body, 'close'):
+                response_body.close()
+    except Exception:
+        _LOGGER.warning('Warm-up request to %s failed', path, exc_info=True)
+        return
+
+    response_status = response_statuses[-1] if response_statuses else None
+    wall_time = default_timer() - initial_time
+    if not response_status or response_status[0] in '45':
+        _LOGGER.warning(
+            'Warm-up request to %s responded with %s',
+            path,
+            response_status,
+            )
+    else:
+        _LOGGER.info(
+            'Warm-up request to %s responded with %s in %.3f seconds',
+            path,
+            response_status,
+            wall_time,
+            )
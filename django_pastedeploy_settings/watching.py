@@ -0,0 +1,364 @@
+# -*- coding: utf-8 -*-
+##############################################################################
+#
+# Copyright (c) 2016, 2degrees Limited.
+# All Rights Reserved.
+#
+# This file is part of django-pastedeploy-settings
+# <https://github.com/2degrees/django-pastedeploy-settings>, which is subject
+# to the provisions of the BSD at
+# <http://dev.2degreesnetwork.com/p/2degrees-license.html>. A copy of the
+# license should accompany this distribution. THIS SOFTWARE IS PROVIDED "AS IS"
+# AND ANY AND ALL EXPRESS OR IMPLIED WARRANTIES ARE DISCLAIMED, INCLUDING, BUT
+# NOT LIMITED TO, THE IMPLIED WARRANTIES OF TITLE, MERCHANTABILITY, AGAINST
+# INFRINGEMENT, AND FITNESS FOR A PARTICULAR PURPOSE.
+#
+##############################################################################
+"""
+Reloading of the settings when the PasteDeploy configuration files change.
+
+"""
+import ctypes
+import ctypes.util
+import errno
+from logging import getLogger
+import os
+import select
+import struct
+import sys
+from threading import Event
+from threading import Thread
+import time
+
+
+__all__ = ['ConfigWatcher', 'start_config_watcher']
+
+
+_LOGGER = getLogger(__name__)
+
+
+def start_config_watcher(config_uri, name=None, relative_to=None, **kwargs):
+    """
+    Start and return a :class:`ConfigWatcher` for the application ``name``
+    in the PasteDeploy configuration at ``config_uri``.
+
+    """
+    config_watcher = ConfigWatcher(config_uri, name, relative_to, **kwargs)
+    config_watcher.start()
+    return config_watcher
+
+
+class ConfigWatcher(object):
+    """
+    Background thread which calls
+    :func:`~django_pastedeploy_settings.reloading.reload_settings` when the
+    PasteDeploy configuration files of an application change.
+
+    The main configuration file is watched along with the files it uses
+    (e.g., with ``use = config:base.ini``).
+
+    :param debounce_delay: The number of seconds without further changes to
+        wait for before reloading the settings, so that a burst of writes
+        triggers a single reload.
+    :param poll_interval: The number of seconds between checks for changes
+        when inotify is not available. It's also the longest time that
+        :meth:`stop` waits for.
+
+    The configuration is read, validated and resolved in the background
+    thread, and nothing is changed if that fails. The files are watched again
+    after each reload, and the settings are reloaded once more if any of them
+    changed in the meantime.
+
+    The files used are found with
+    :func:`~django_pastedeploy_settings.loading.install_loader_cache`, which
+    is installed when watching starts.
+
+    """
+
+    def __init__(self, config_uri, name=None, relative_to=None,
+                 debounce_delay=0.5, poll_interval=1.0):
+        super(ConfigWatcher, self).__init__()
+
+        self.config_uri = config_uri
+        self.name = name
+        self.relative_to = relative_to
+        self.debounce_delay = debounce_delay
+        self.poll_interval = poll_interval
+
+        self._stop_event = Event()
+        self._thread = None
+
+    def start(self):
+        """
+        Start watching the configuration files.
+
+        The configuration is read straightaway, so that any files it uses
+        are watched too.
+
+        """
+        from django_pastedeploy_settings.loading import \
+            _record_config_file_signatures
+        from django_pastedeploy_settings.loading import appconfig
+
+        with _record_config_file_signatures() as config_file_signatures:
+            appconfig(
+                self.config_uri,
+                name=self.name,
+                relative_to=self.relative_to,
+                )
+        file_monitor = _get_file_monitor(self.poll_interval)
+        have_files_changed = \
+            _watch_config_files(file_monitor, config_file_signatures)
+
+        self._stop_event.clear()
+        self._thread = Thread(
+            target=self._watch_files,
+            args=(file_monitor, have_files_changed),
+            name='ConfigWatcher',
+            )
+        self._thread.daemon = True
+        self._thread.start()
+
+    def stop(self):
+        """Stop watching the configuration files."""
+        self._stop_event.set()
+        if self._thread:
+            self._thread.join()
+            self._thread = None
+
+    def _watch_files(self, file_monitor, have_files_changed):
+        try:
+            while not self._stop_event.is_set():
+                if not have_files_changed:
+                    have_files_changed = \
+                        file_monitor.wait_for_changes(self.poll_interval)
+                    continue
+
+                while file_monitor.wait_for_changes(self.debounce_delay):
+                    if self._stop_event.is_set():
+                        return
+
+                have_files_changed = self._reload_settings(file_monitor)
+        finally:
+            file_monitor.close()
+
+    def _reload_settings(self, file_monitor):
+        """
+        Reload the settings and watch the files read in the process.
+
+        Return whether any of those files changed after it was read.
+
+        """
+        from django_pastedeploy_settings.loading import \
+            _record_config_file_signatures
+        from django_pastedeploy_settings.reloading import \
+            _reload_settings_logging_outcome
+
+        with _record_config_file_signatures() as config_file_signatures:
+            _reload_settings_logging_outcome(
+                self.config_uri,
+                self.name,
+                self.relative_to,
+                )
+        return _watch_config_files(file_monitor, config_file_signatures)
+
+
+def _watch_config_files(file_monitor, config_file_signatures):
+    """
+    Make ``file_monitor`` watch the files in ``config_file_signatures``.
+
+    Return whether any of them changed since the signatures were taken,
+    given that such changes are not reported by ``file_monitor``.
+
+    """
+    file_monitor.set_file_paths(sorted(config_file_signatures))
+
+    have_files_changed = any(
+        _get_file_signature(file_path) != file_signature
+        for file_path, file_signature in config_file_signatures.items()
+        )
+    return have_files_changed
+
+
+def _get_file_monitor(poll_interval):
+    if _InotifyFileMonitor.is_supported():
+        file_monitor = _InotifyFileMonitor()
+    else:
+        _LOGGER.debug('inotify is not available; polling for changes')
+        file_monitor = _PollingFileMonitor()
+    return file_monitor
+
+
+class _PollingFileMonitor(object):
+    """
+    Monitor which detects changes in the modification time or size of the
+    files.
+
+    """
+
+    def __init__(self):
+        super(_PollingFileMonitor, self).__init__()
+
+        self._file_signatures = {}
+
+    def set_file_paths(self, file_paths):
+        self._file_signatures = {
+            file_path: _get_file_signature(file_path)
+            for file_path in file_paths
+            }
+
+    def wait_for_changes(self, timeout):
+        time.sleep(timeout)
+
+        have_files_changed = False
+        for file_path, file_signature in self._file_signatures.items():
+            new_file_signature = _get_file_signature(file_path)
+            if new_file_signature != file_signature:
+                self._file_signatures[file_path] = new_file_signature
+                have_files_changed = True
+        return have_files_changed
+
+    def close(self):
+        pass
+
+
+def _get_file_signature(file_path):
+    try:
+        file_stat = os.stat(file_path)
+    except OSError:
+        file_signature = None
+    else:
+        file_signature = (file_stat.st_mtime, file_stat.st_size)
+    return file_signature
+
+
+class _InotifyFileMonitor(object):
+    """
+    Monitor which waits for the kernel to report changes to the files on
+    Linux.
+
+    The directories containing the files are watched, instead of the files
+    themselves, so that files replaced by renaming others are detected.
+
+    """
+
+    _EVENT_HEADER_FORMAT = 'iIII'
+
+    _EVENT_HEADER_SIZE = struct.calcsize(_EVENT_HEADER_FORMAT)
+
+    _IN_CLOEXEC = 0o2000000
+
+    _IN_NONBLOCK = 0o4000
+
+    # IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO |
+    # IN_CREATE | IN_DELETE
+    _EVENT_MASK = 0x2 | 0x4 | 0x8 | 0x40 | 0x80 | 0x100 | 0x200
+
+    _libc = None
+
+    @classmethod
+    def is_supported(cls):
+        if not sys.platform.startswith('linux'):
+            return False
+
+        if cls._libc is None:
+            libc_path = ctypes.util.find_library('c') or 'libc.so.6'
+            try:
+                libc = ctypes.CDLL(libc_path, use_errno=True)
+            except OSError:
+                return False
+            if not hasattr(libc, 'inotify_init1'):
+                return False
+            cls._libc = libc
+        return True
+
+    def __init__(self):
+        super(_InotifyFileMonitor, self).__init__()
+
+        self._file_descriptor = None
+        self._file_names_by_watch_descriptor = {}
+
+    def set_file_paths(self, file_paths):
+        self.close()
+
+        file_descriptor = \
+            self._libc.inotify_init1(self._IN_CLOEXEC | self._IN_NONBLOCK)
+        if file_descriptor < 0:
+            _raise_os_error()
+        self._file_descriptor = file_descriptor
+
+        file_names_by_directory = {}
+        for file_path in file_paths:
+            directory_path, file_name = os.path.split(file_path)
+            file_names_by_directory.setdefault(directory_path, set()) \
+                .add(file_name)
+
+        self._file_names_by_watch_descriptor = {}
+        for directory_path, file_names in file_names_by_directory.items():
+            watch_descriptor = self._libc.inotify_add_watch(
+                file_descriptor,
+                _encode_path(directory_path),
+                self._EVENT_MASK,
+                )
+            if watch_descriptor < 0:
+                if ctypes.get_errno() == errno.ENOENT:
+                    _LOGGER.warning(
+                        'Cannot watch missing directory %s',
+                        directory_path,
+                        )
+                    continue
+                _raise_os_error()
+            self._file_names_by_watch_descriptor[watch_descriptor] = \
+                {_encode_path(file_name) for file_name in file_names}
+
+    def wait_for_changes(self, timeout):
+        readable_file_descriptors = \
+            select.select([self._file_descriptor], [], [], timeout)[0]
+        if not readable_file_descriptors:
+            return False
+
+        have_files_changed = False
+        for watch_descriptor, file_name in self._read_events():
+            file_names = self._file_names_by_watch_descriptor.get(
+                watch_descriptor,
+                (),
+                )
+            if file_name in file_names:
+                have_files_changed = True
+        return have_files_changed
+
+    def close(self):
+        if self._file_descriptor is not None:
+            os.close(self._file_descriptor)
+            self._file_descriptor = None
+
+    def _read_events(self):
+        try:
+            events_data = os.read(self._file_descriptor, 65536)
+        except OSError as exc:
+            if exc.errno == errno.EAGAIN:
+                return
+            raise
+
+        offset = 0
+        while offset < len(events_data):
+            watch_descriptor, _, _, file_name_length = struct.unpack_from(
+                self._EVENT_HEADER_FORMAT,
+                events_data,
+                offset,
+                )
+            offset += self._EVENT_HEADER_SIZE
+            file_name = events_data[offset:offset + file_name_length]
+            offset += file_name_length
+            yield watch_descriptor, file_name.rstrip(b'\0')
+
+
+def _encode_path(path):
+    if not isinstance(path, bytes):
+        path = path.encode(sys.getfilesystemencoding())
+    return path
+
+
+def _raise_os_error():
+    error_number = ctypes.get_errno()
+    raise OSError(error_number, os.strerror(error_number))
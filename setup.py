@@ -63,11 +63,18 @@ setup(
         },
     test_suite="nose.collector",
     entry_points="""\
+        [console_scripts]
+        precompress-media = django_pastedeploy_settings.compression:main
+        paste-manage = django_pastedeploy_settings.management:main
+        paste-compile-settings = django_pastedeploy_settings.compiling:main
+
         [paste.app_factory]
         main = django_pastedeploy_settings:get_configured_django_wsgi_app
+        asgi = django_pastedeploy_settings:get_configured_django_asgi_app
 
         [paste.composite_factory]
         full_django = django_pastedeploy_settings.factories:make_full_django_app
+        dispatcher = django_pastedeploy_settings.factories:make_prefix_dispatcher
 
         [nose.plugins.0.10]
         paste-deploy-config = django_testing:DjangoPastedeployPlugin
@@ -75,5 +82,6 @@ setup(
         [zc.buildout]
         nose = django_testing_recipe:DjangoPastedeployRecipe [nose-buildout]
         django-settings = django_pastedeploy_settings.buildout_options:DecodedConfvarsRecipe [buildout-options]
+        django-compiled-settings = django_pastedeploy_settings.buildout_options:CompiledSettingsRecipe [buildout-options]
         """,
     )
@@ -0,0 +1,20 @@
+# -*- coding: utf-8 -*-
+"""
+Module with settings which can be merged with those in the PasteDeploy
+configuration.
+
+"""
+
+MIDDLEWARE = ['a.Middleware', 'b.Middleware']
+
+DATABASES = {
+    'default': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': 'db.sqlite3',
+        'OPTIONS': {'timeout': 20},
+        },
+    }
+
+NAME = 'name'
+
+FEATURES = {'new_ui': False, 'beta': False}
@@ -0,0 +1,370 @@
+##############################################################################
+#
+# Copyright (c) 2016, 2degrees Limited.
+# All Rights Reserved.
+#
+# This file is part of django-pastedeploy-settings
+# <https://github.com/2degrees/django-pastedeploy-settings>, which is subject
+# to the provisions of the BSD at
+# <http://dev.2degreesnetwork.com/p/2degrees-license.html>. A copy of the
+# license should accompany this distribution. THIS SOFTWARE IS PROVIDED "AS IS"
+# AND ANY AND ALL EXPRESS OR IMPLIED WARRANTIES ARE DISCLAIMED, INCLUDING, BUT
+# NOT LIMITED TO, THE IMPLIED WARRANTIES OF TITLE, MERCHANTABILITY, AGAINST
+# INFRINGEMENT, AND FITNESS FOR A PARTICULAR PURPOSE.
+#
+##############################################################################
+import os
+from threading import Event
+from threading import Thread
+
+from nose.plugins.skip import SkipTest
+from nose.tools import assert_false
+from nose.tools import assert_raises_regexp
+from nose.tools import eq_
+from nose.tools import ok_
+
+from django_pastedeploy_settings import get_configured_django_wsgi_app
+from django_pastedeploy_settings import InvalidSettingValueError
+from django_pastedeploy_settings.background import \
+    BackgroundLoadingApplication
+from django_pastedeploy_settings.factories import make_full_django_app
+from django_pastedeploy_settings.media import StaticMediaApplication
+
+from tests.utils import BaseDjangoTestCase
+from tests.utils import get_global_conf
+from tests.utils import get_local_conf
+from tests.utils import MOCK_WSGI_APP
+
+
+class TestBackgroundLoadingApplication(BaseDjangoTestCase):
+
+    setup_fixture = False
+
+    def setup(self):
+        super(TestBackgroundLoadingApplication, self).setup()
+
+        self.loading_allowed_event = Event()
+
+    def teardown(self):
+        self.loading_allowed_event.set()
+
+        super(TestBackgroundLoadingApplication, self).teardown()
+
+    def test_loaded_application(self):
+        app = self._make_app()
+        self.loading_allowed_event.set()
+
+        ok_(app.wait(5))
+        eq_(('200 OK', b'loaded'), _make_request(app, '/'))
+
+    def test_request_whilst_loading(self):
+        app = self._make_app()
+
+        eq_('503 Service Unavailable', _make_request(app, '/')[0])
+        assert_false(app.is_loaded)
+
+    def test_retry_after(self):
+        app = self._make_app(retry_after=5)
+
+        headers = {}
+        _make_request(app, '/', headers)
+
+        eq_('5', headers['Retry-After'])
+
+    def test_no_retry_after(self):
+        app = self._make_app()
+
+        headers = {}
+        _make_request(app, '/', headers)
+
+        ok_('Retry-After' not in headers)
+
+    def test_request_held(self):
+        app = self._make_app(timeout=5)
+
+        responses = []
+        request_thread = Thread(
+            target=lambda: responses.append(_make_request(app, '/')),
+            )
+        request_thread.start()
+        self.loading_allowed_event.set()
+        request_thread.join(5)
+
+        eq_([('200 OK', b'loaded')], responses)
+
+    def test_health_check_path(self):
+        app = self._make_app(health_check_paths=['/health/'])
+
+        eq_(('200 OK', b'200 OK'), _make_request(app, '/health/'))
+        eq_('503 Service Unavailable', _make_request(app, '/')[0])
+
+    def test_health_check_path_once_loaded(self):
+        app = self._make_app(health_check_paths=['/health/'])
+        self.loading_allowed_event.set()
+        app.wait(5)
+
+        eq_(('200 OK', b'loaded'), _make_request(app, '/health/'))
+
+    def test_health_check_before_loading(self):
+        app = BackgroundLoadingApplication(
+            lambda: _loaded_app,
+            health_check_paths=['/health/'],
+            )
+
+        _make_request(app, '/health/')
+
+        ok_(app.wait(5))
+
+    def test_loading_on_first_request(self):
+        app = BackgroundLoadingApplication(lambda: _loaded_app, timeout=5)
+
+        assert_false(app.wait(0.1))
+        eq_(('200 OK', b'loaded'), _make_request(app, '/'))
+
+    def test_loading_after_fork(self):
+        if not hasattr(os, 'fork'):
+            raise SkipTest('Processes cannot be forked on this platform')
+
+        parent_process_id = os.getpid()
+
+        def load_application():
+            if os.getpid() == parent_process_id:
+                self.loading_allowed_event.wait(5)
+            return _loaded_app
+
+        app = BackgroundLoadingApplication(load_application, timeout=5)
+        app.start()
+
+        read_fd, write_fd = os.pipe()
+        child_process_id = os.fork()
+        if not child_process_id:
+            try:
+                os.close(read_fd)
+                status = _make_request(app, '/')[0]
+                os.write(write_fd, status.encode('ascii'))
+            finally:
+                os._exit(0)
+
+        os.close(write_fd)
+        try:
+            child_status = os.read(read_fd, 100)
+        finally:
+            os.close(read_fd)
+            os.waitpid(child_process_id, 0)
+
+        eq_(b'200 OK', child_status)
+        assert_false(app.is_loaded)
+
+    def test_loading_after_fork_without_request(self):
+        if not hasattr(os, 'register_at_fork'):
+            raise SkipTest('Code cannot be run after forks in this version')
+
+        parent_process_id = os.getpid()
+
+        def load_application():
+            if os.getpid() == parent_process_id:
+                self.loading_allowed_event.wait(5)
+            return _loaded_app
+
+        app = BackgroundLoadingApplication(load_application)
+        app.start()
+
+        read_fd, write_fd = os.pipe()
+        child_process_id = os.fork()
+        if not child_process_id:
+            try:
+                os.close(read_fd)
+                is_loaded = app.wait(5)
+                os.write(write_fd, str(is_loaded).encode('ascii'))
+            finally:
+                os._exit(0)
+
+        os.close(write_fd)
+        try:
+            child_outcome = os.read(read_fd, 100)
+        finally:
+            os.close(read_fd)
+            os.waitpid(child_process_id, 0)
+
+        eq_(b'True', child_outcome)
+
+    def test_application_wrapper(self):
+        app = BackgroundLoadingApplication(lambda: _loaded_app)
+        app.wrap_application(lambda application: (application, 'wrapped'))
+        app.start()
+
+        ok_(app.wait(5))
+        eq_((_loaded_app, 'wrapped'), app.application)
+
+    def test_application_wrapper_whilst_loading(self):
+        app = self._make_app()
+        app.wrap_application(lambda application: (application, 'wrapped'))
+        self.loading_allowed_event.set()
+
+        ok_(app.wait(5))
+        eq_((_loaded_app, 'wrapped'), app.application)
+
+    def test_application_wrapper_once_loaded(self):
+        app = BackgroundLoadingApplication(lambda: _loaded_app)
+        app.start()
+        app.wait(5)
+
+        app.wrap_application(lambda application: (application, 'wrapped'))
+
+        eq_((_loaded_app, 'wrapped'), app.application)
+
+    def test_loading_error(self):
+        def load_application():
+            raise ValueError('Invalid settings')
+
+        app = BackgroundLoadingApplication(load_application)
+        app.start()
+
+        ok_(app.wait(5))
+        ok_(isinstance(app.loading_error, ValueError))
+        eq_('500 Internal Server Error', _make_request(app, '/')[0])
+        eq_(['Could not load the application'], self.logs['error'])
+
+    def _make_app(self, **kwargs):
+        def load_application():
+            self.loading_allowed_event.wait(5)
+            return _loaded_app
+
+        app = BackgroundLoadingApplication(load_application, **kwargs)
+        app.start()
+        return app
+
+
+class TestBackgroundLoadingOptions(BaseDjangoTestCase):
+
+    setup_fixture = False
+
+    def test_enabled(self):
+        global_conf = get_global_conf(
+            'settings5',
+            django_background_loading='true',
+            django_background_loading_timeout='1.5',
+            django_background_loading_retry_after='10',
+            django_background_loading_health_check_paths='/health/ /ping/',
+            )
+        local_conf = get_local_conf(
+            WSGI_APPLICATION='tests.utils.MOCK_WSGI_APP',
+            )
+        app = get_configured_django_wsgi_app(global_conf, **local_conf)
+
+        ok_(isinstance(app, BackgroundLoadingApplication))
+        eq_(1.5, app.timeout)
+        eq_(10, app.retry_after)
+        eq_(frozenset(['/health/', '/ping/']), app.health_check_paths)
+        ok_(app.wait(5))
+        ok_(app.application is MOCK_WSGI_APP)
+
+    def test_disabled(self):
+        global_conf = get_global_conf(
+            'settings5',
+            django_background_loading='false',
+            )
+        local_conf = get_local_conf(
+            WSGI_APPLICATION='tests.utils.MOCK_WSGI_APP',
+            )
+        app = get_configured_django_wsgi_app(global_conf, **local_conf)
+
+        ok_(app is MOCK_WSGI_APP)
+
+    def test_settings_error(self):
+        global_conf = get_global_conf(
+            'settings5',
+            django_background_loading='true',
+            )
+        app = get_configured_django_wsgi_app(global_conf, DEBUG='true')
+
+        ok_(app.wait(5))
+        ok_(app.loading_error is not None)
+
+    def test_invalid_timeout(self):
+        global_conf = get_global_conf(
+            'settings5',
+            django_background_loading='true',
+            django_background_loading_timeout='soon',
+            )
+
+        assert_raises_regexp(
+            InvalidSettingValueError,
+            '^Invalid background loading option',
+            get_configured_django_wsgi_app,
+            global_conf,
+            )
+
+    def test_full_django_app(self):
+        global_conf = get_global_conf(
+            'empty_module2',
+            django_background_loading='true',
+            django_background_loading_timeout='5',
+            )
+        local_conf = get_local_conf(
+            MEDIA_URL='/media',
+            MEDIA_ROOT=os.path.dirname(__file__),
+            ADMIN_MEDIA_PREFIX='/admin-media',
+            WSGI_APPLICATION='tests.utils.MOCK_WSGI_APP',
+            )
+        django_app = get_configured_django_wsgi_app(global_conf, **local_conf)
+
+        app = make_full_django_app(
+            _MockLoader(django_app),
+            global_conf,
+            django_app='main',
+            media_server='builtin',
+            )
+
+        ok_(app is django_app)
+        ok_(app.wait(5))
+        ok_(app.loading_error is None)
+        ok_(isinstance(app.application['/media'], StaticMediaApplication))
+        ok_(app.application['/'] is MOCK_WSGI_APP)
+
+    def test_prefork(self):
+        global_conf = get_global_conf(
+            'settings5',
+            django_background_loading='true',
+            django_prefork='true',
+            )
+
+        assert_raises_regexp(
+            InvalidSettingValueError,
+            'cannot be enabled at once$',
+            get_configured_django_wsgi_app,
+            global_conf,
+            )
+
+
+class _MockLoader(object):
+
+    def __init__(self, app):
+        super(_MockLoader, self).__init__()
+
+        self.app = app
+
+    def get_app(self, name, global_conf=None):
+        return self.app
+
+
+def _loaded_app(environ, start_response):
+    start_response('200 OK', [])
+    return [b'loaded']
+
+
+def _make_request(app, path, headers=None):
+    statuses = []
+
+    def start_response(status, response_headers, exc_info=None):
+        statuses.append(status)
+        if headers is not None:
+            headers.update(response_headers)
+
+    environ = {
+        'REQUEST_METHOD': 'GET',
+        'SCRIPT_NAME': '',
+        'PATH_INFO': path,
+        }
+    response_body = b''.join(app(environ, start_response))
+    return statuses[0], response_body
@@ -0,0 +1,220 @@
+##############################################################################
+#
+# Copyright (c) 2016, 2degrees Limited.
+# All Rights Reserved.
+#
+# This file is part of django-pastedeploy-settings
+# <https://github.com/2degrees/django-pastedeploy-settings>, which is subject
+# to the provisions of the BSD at
+# <http://dev.2degreesnetwork.com/p/2degrees-license.html>. A copy of the
+# license should accompany this distribution. THIS SOFTWARE IS PROVIDED "AS IS"
+# AND ANY AND ALL EXPRESS OR IMPLIED WARRANTIES ARE DISCLAIMED, INCLUDING, BUT
+# NOT LIMITED TO, THE IMPLIED WARRANTIES OF TITLE, MERCHANTABILITY, AGAINST
+# INFRINGEMENT, AND FITNESS FOR A PARTICULAR PURPOSE.
+#
+##############################################################################
+import os
+from shutil import rmtree
+from tempfile import mkdtemp
+from threading import Lock
+
+from nose.tools import eq_
+from nose.tools import ok_
+
+from django_pastedeploy_settings import LazilyDecodedOptions
+from django_pastedeploy_settings import resolve_local_conf_options
+from django_pastedeploy_settings.caching import get_settings_cache_key
+from django_pastedeploy_settings.caching import SettingsCache
+
+from tests.utils import get_global_conf
+from tests.utils import get_local_conf
+
+
+class TestSettingsCache(object):
+
+    def setup(self):
+        self.cache_directory = mkdtemp()
+        self.cache = SettingsCache(self.cache_directory)
+
+    def teardown(self):
+        rmtree(self.cache_directory)
+
+    def test_missing_entry(self):
+        eq_(None, self.cache.get('key'))
+
+    def test_stored_entry(self):
+        options = {'SETTING': [1, 2]}
+        self.cache.set('key', options)
+
+        eq_(options, self.cache.get('key'))
+
+    def test_corrupt_entry(self):
+        cache_file_path = os.path.join(self.cache_directory, 'key.pickle')
+        with open(cache_file_path, 'wb') as cache_file:
+            cache_file.write(b'corrupt')
+
+        eq_(None, self.cache.get('key'))
+
+    def test_unpicklable_entry(self):
+        self.cache.set('key', {'SETTING': Lock()})
+
+        eq_(None, self.cache.get('key'))
+        eq_([], os.listdir(self.cache_directory))
+
+    def test_missing_directory(self):
+        cache_directory = os.path.join(self.cache_directory, 'sub')
+        cache = SettingsCache(cache_directory)
+        cache.set('key', {})
+
+        eq_({}, cache.get('key'))
+
+
+class TestSettingsCacheKey(object):
+
+    def test_same_input(self):
+        global_conf = get_global_conf('read_only_empty_module')
+        local_conf = get_local_conf()
+
+        eq_(
+            get_settings_cache_key(global_conf, local_conf),
+            get_settings_cache_key(dict(global_conf), dict(local_conf)),
+            )
+
+    def test_different_local_conf(self):
+        global_conf = get_global_conf('read_only_empty_module')
+
+        ok_(
+            get_settings_cache_key(global_conf, get_local_conf(A=1)) !=
+                get_settings_cache_key(global_conf, get_local_conf(A=2)),
+            )
+
+    def test_different_settings_module(self):
+        local_conf = get_local_conf()
+
+        ok_(
+            get_settings_cache_key(get_global_conf('settings'), local_conf) !=
+                get_settings_cache_key(get_global_conf('settings2'), local_conf),
+            )
+
+    def test_relocatable_key(self):
+        eq_(
+            _get_relocatable_key('/srv/app', ['/srv/app', '/srv/app/static']),
+            _get_relocatable_key('/opt/app', ['/opt/app', '/opt/app/static']),
+            )
+
+    def test_relocatable_key_with_sibling_directory(self):
+        eq_(
+            _get_relocatable_key('/srv/app', ['/srv/app2/static']),
+            _get_relocatable_key('/opt/app', ['/srv/app2/static']),
+            )
+
+    def test_relocatable_key_with_short_directory(self):
+        eq_(
+            _get_relocatable_key('/a', ['/srv/a/static']),
+            _get_relocatable_key('/b', ['/srv/a/static']),
+            )
+
+    def test_relocatable_key_with_root_directory(self):
+        eq_(
+            _get_relocatable_key('/', ['/srv/static']),
+            _get_relocatable_key('/opt', ['/srv/static']),
+            )
+
+    def test_different_configuration_file_contents(self):
+        temporary_directory = mkdtemp()
+        try:
+            config_file_path = os.path.join(temporary_directory, 'config.ini')
+            global_conf = get_global_conf(
+                'read_only_empty_module',
+                __file__=config_file_path,
+                )
+            local_conf = get_local_conf()
+
+            with open(config_file_path, 'w') as config_file:
+                config_file.write('[app:main]\n')
+            original_key = get_settings_cache_key(global_conf, local_conf)
+
+            with open(config_file_path, 'w') as config_file:
+                config_file.write('[app:main]\nuse = egg:foo\n')
+            new_key = get_settings_cache_key(global_conf, local_conf)
+        finally:
+            rmtree(temporary_directory)
+
+        ok_(original_key != new_key)
+
+
+def _get_relocatable_key(config_directory_path, paths):
+    global_conf = get_global_conf(
+        'read_only_empty_module',
+        here=config_directory_path,
+        )
+    local_conf = get_local_conf(PATHS=paths)
+    return get_settings_cache_key(global_conf, local_conf, relocatable=True)
+
+
+class TestCachedResolution(object):
+
+    def setup(self):
+        self.cache_directory = mkdtemp()
+
+    def teardown(self):
+        rmtree(self.cache_directory)
+
+    def test_cache_disabled(self):
+        global_conf = get_global_conf('read_only_empty_module')
+        resolve_local_conf_options(global_conf, get_local_conf())
+
+        eq_([], os.listdir(self.cache_directory))
+
+    def test_cache_miss(self):
+        global_conf = get_global_conf(
+            'read_only_empty_module',
+            django_settings_cache_dir=self.cache_directory,
+            )
+        local_conf = get_local_conf(SETTING1='value')
+
+        local_conf_resolved = \
+            resolve_local_conf_options(global_conf, local_conf)
+
+        cache = SettingsCache(self.cache_directory)
+        cache_key = get_settings_cache_key(global_conf, local_conf)
+        eq_(local_conf_resolved, cache.get(cache_key))
+
+    def test_cache_hit(self):
+        global_conf = get_global_conf(
+            'read_only_empty_module',
+            django_settings_cache_dir=self.cache_directory,
+            )
+        local_conf = get_local_conf(SETTING1='value')
+
+        cached_options = {'SETTING1': 'cached value'}
+        cache = SettingsCache(self.cache_directory)
+        cache.set(get_settings_cache_key(global_conf, local_conf), cached_options)
+
+        local_conf_resolved = \
+            resolve_local_conf_options(global_conf, local_conf)
+
+        eq_(cached_options, local_conf_resolved)
+
+    def test_lazy_frozen_settings(self):
+        global_conf = get_global_conf(
+            'read_only_empty_module',
+            django_settings_cache_dir=self.cache_directory,
+            django_lazy_settings='true',
+            django_frozen_settings='true',
+            )
+        local_conf = get_local_conf(SETTING1=['a'], SETTING2=['a'])
+
+        options_on_miss = resolve_local_conf_options(global_conf, local_conf)
+        options_on_hit = resolve_local_conf_options(global_conf, local_conf)
+
+        eq_(1, len(os.listdir(self.cache_directory)))
+        for options in (options_on_miss, options_on_hit):
+            ok_(isinstance(options, LazilyDecodedOptions))
+            eq_(('a', ), options['SETTING1'])
+            ok_(options['SETTING1'] is options['SETTING2'])
+
+        cache = SettingsCache(self.cache_directory)
+        cached_options = cache.get(get_settings_cache_key(global_conf, local_conf))
+        eq_(dict, type(cached_options))
+        eq_('["a"]', cached_options['SETTING1'])
@@ -0,0 +1,285 @@
+##############################################################################
+#
+# Copyright (c) 2016, 2degrees Limited.
+# All Rights Reserved.
+#
+# This file is part of django-pastedeploy-settings
+# <https://github.com/2degrees/django-pastedeploy-settings>, which is subject
+# to the provisions of the BSD at
+# <http://dev.2degreesnetwork.com/p/2degrees-license.html>. A copy of the
+# license should accompany this distribution. THIS SOFTWARE IS PROVIDED "AS IS"
+# AND ANY AND ALL EXPRESS OR IMPLIED WARRANTIES ARE DISCLAIMED, INCLUDING, BUT
+# NOT LIMITED TO, THE IMPLIED WARRANTIES OF TITLE, MERCHANTABILITY, AGAINST
+# INFRINGEMENT, AND FITNESS FOR A PARTICULAR PURPOSE.
+#
+##############################################################################
+import os
+from shutil import rmtree
+from tempfile import mkdtemp
+
+try:
+    from importlib.util import cache_from_source
+except ImportError:  # Python 2
+    def cache_from_source(file_path):
+        return file_path + 'c'
+
+from nose.tools import assert_in
+from nose.tools import assert_not_in
+from nose.tools import assert_raises_regexp
+from nose.tools import eq_
+from nose.tools import ok_
+from paste.deploy import loadwsgi
+
+from django_pastedeploy_settings import InvalidSettingValueError
+from django_pastedeploy_settings import loading
+from django_pastedeploy_settings import resolve_local_conf_options
+from django_pastedeploy_settings.compiling import compile_settings
+from django_pastedeploy_settings.compiling import load_compiled_options
+from django_pastedeploy_settings.compiling import main
+from django_pastedeploy_settings.interning import FrozenDict
+from django_pastedeploy_settings.instrumentation import \
+    get_last_startup_report
+from django_pastedeploy_settings.loading import appconfig
+
+from tests.utils import BaseDjangoTestCase
+
+
+_CONFIG_TEMPLATE = """\
+[DEFAULT]
+debug = true
+django_settings_module = tests.mock_django_settings.empty_module
+%(global_options)s
+
+[app:main]
+paste.app_factory = django_pastedeploy_settings:get_configured_django_wsgi_app
+SECRET_KEY = "secret"
+TIMEOUT = 20
+TEMPLATE_DIRS = [${TEMPLATES_DIR}]
+TEMPLATES_DIR = "/srv/templates"
+LOGGING = {"handlers": ${LOGGING_HANDLERS}}
+LOGGING_HANDLERS = ["console", "file"]
+%(local_options)s
+"""
+
+
+_COMPILED_SETTINGS_OPTION = \
+    'django_compiled_settings = %(here)s/compiled_settings.py'
+
+
+class TestSettingsCompilation(BaseDjangoTestCase):
+
+    setup_fixture = False
+
+    def setup(self):
+        super(TestSettingsCompilation, self).setup()
+
+        self.temporary_directory_path = mkdtemp()
+        self.config_file_path = \
+            os.path.join(self.temporary_directory_path, 'config.ini')
+        self.compiled_settings_path = os.path.join(
+            self.temporary_directory_path,
+            'compiled_settings.py',
+            )
+
+    def teardown(self):
+        rmtree(self.temporary_directory_path)
+
+        super(TestSettingsCompilation, self).teardown()
+
+    def test_compiled_options(self):
+        self._write_config(_COMPILED_SETTINGS_OPTION)
+
+        output_path = compile_settings(self.config_file_path)
+
+        eq_(self.compiled_settings_path, output_path)
+        compiled_options = self._load_compiled_options()
+        eq_(20, compiled_options['TIMEOUT'])
+        eq_(['/srv/templates'], compiled_options['TEMPLATE_DIRS'])
+        eq_(True, compiled_options['DEBUG'])
+        eq_(
+            self.config_file_path,
+            compiled_options['paste_configuration_file'],
+            )
+
+    def test_byte_compilation(self):
+        self._write_config(_COMPILED_SETTINGS_OPTION)
+
+        compile_settings(self.config_file_path)
+
+        ok_(os.path.isfile(cache_from_source(self.compiled_settings_path)))
+
+    def test_explicit_output_path(self):
+        self._write_config()
+        output_path = \
+            os.path.join(self.temporary_directory_path, 'other_settings.py')
+
+        eq_(output_path, compile_settings(self.config_file_path, output_path))
+
+        ok_(os.path.isfile(output_path))
+
+    def test_missing_output_path(self):
+        self._write_config()
+
+        with assert_raises_regexp(InvalidSettingValueError, 'not set'):
+            compile_settings(self.config_file_path)
+
+    def test_application_name(self):
+        self._write_config(
+            _COMPILED_SETTINGS_OPTION,
+            '\n[app:other]\nuse = main\nTIMEOUT = 30',
+            )
+
+        compile_settings(self.config_file_path, name='other')
+
+        eq_(30, self._load_compiled_options('other')['TIMEOUT'])
+
+    def test_loader_cache_not_installed(self):
+        self._write_config(_COMPILED_SETTINGS_OPTION)
+
+        compile_settings(self.config_file_path)
+
+        ok_(loadwsgi._loaders['config'] is not loading._load_config)
+
+    def test_non_literal_value(self):
+        self._write_config(_COMPILED_SETTINGS_OPTION, 'LIMIT = Infinity')
+
+        with assert_raises_regexp(InvalidSettingValueError, 'LIMIT'):
+            compile_settings(self.config_file_path)
+
+    def test_command_line_interface(self):
+        self._write_config()
+        output_path = \
+            os.path.join(self.temporary_directory_path, 'other_settings.py')
+
+        main([self.config_file_path, '--output', output_path])
+
+        ok_(os.path.isfile(output_path))
+
+    def test_options_resolved_from_compiled_settings(self):
+        self._write_config(_COMPILED_SETTINGS_OPTION)
+        compile_settings(self.config_file_path)
+        with open(self.compiled_settings_path) as compiled_settings_file:
+            compiled_settings = compiled_settings_file.read()
+        with open(self.compiled_settings_path, 'w') as compiled_settings_file:
+            compiled_settings_file.write(
+                compiled_settings.replace("'TIMEOUT': 20", "'TIMEOUT': 2000"),
+                )
+        os.remove(cache_from_source(self.compiled_settings_path))
+
+        options = self._resolve_options()
+
+        eq_(2000, options['TIMEOUT'])
+        startup_report = get_last_startup_report()
+        phase_names = [
+            phase_measurement.name
+            for phase_measurement in startup_report.phase_measurements
+            ]
+        assert_in('compiled_settings_lookup', phase_names)
+        assert_not_in('dereferencing', phase_names)
+
+    def test_frozen_settings(self):
+        self._write_config(
+            _COMPILED_SETTINGS_OPTION + '\ndjango_frozen_settings = true',
+            )
+        compile_settings(self.config_file_path)
+
+        options = self._resolve_options()
+
+        eq_(FrozenDict, type(options['LOGGING']))
+        ok_(options['LOGGING']['handlers'] is options['LOGGING_HANDLERS'])
+        eq_([], self.logs['warning'])
+
+    def test_outdated_compiled_settings(self):
+        self._write_config(_COMPILED_SETTINGS_OPTION)
+        compile_settings(self.config_file_path)
+        self._write_config(_COMPILED_SETTINGS_OPTION, 'TIMEOUT2 = 40')
+
+        options = self._resolve_options()
+
+        eq_(40, options['TIMEOUT2'])
+        eq_(1, len(self.logs['warning']))
+        assert_in('configuration changed', self.logs['warning'][0])
+
+    def test_relocated_configuration(self):
+        self._write_config(
+            _COMPILED_SETTINGS_OPTION,
+            'STATIC_ROOT = "%(here)s/static"',
+            )
+        compile_settings(self.config_file_path)
+        self._move_temporary_directory()
+
+        compiled_options = self._load_compiled_options()
+
+        eq_(
+            os.path.join(self.temporary_directory_path, 'static'),
+            compiled_options['STATIC_ROOT'],
+            )
+        eq_(
+            self.config_file_path,
+            compiled_options['paste_configuration_file'],
+            )
+        eq_([], self.logs['warning'])
+
+    def test_relocated_configuration_with_sibling_directory(self):
+        sibling_directory_path = self.temporary_directory_path + '2'
+        self._write_config(
+            _COMPILED_SETTINGS_OPTION,
+            'STATIC_ROOT = "%s/static"' % sibling_directory_path,
+            )
+        compile_settings(self.config_file_path)
+        self._move_temporary_directory()
+
+        compiled_options = self._load_compiled_options()
+
+        eq_(
+            sibling_directory_path + '/static',
+            compiled_options['STATIC_ROOT'],
+            )
+        eq_([], self.logs['warning'])
+
+    def test_missing_compiled_settings(self):
+        self._write_config(_COMPILED_SETTINGS_OPTION)
+
+        options = self._resolve_options()
+
+        eq_(20, options['TIMEOUT'])
+        eq_(1, len(self.logs['warning']))
+        assert_in('do not exist', self.logs['warning'][0])
+
+    def _move_temporary_directory(self):
+        original_directory_path = self.temporary_directory_path
+        self.temporary_directory_path = mkdtemp()
+        os.rmdir(self.temporary_directory_path)
+        os.rename(original_directory_path, self.temporary_directory_path)
+        self.config_file_path = \
+            os.path.join(self.temporary_directory_path, 'config.ini')
+        self.compiled_settings_path = os.path.join(
+            self.temporary_directory_path,
+            'compiled_settings.py',
+            )
+
+    def _write_config(self, global_options='', local_options=''):
+        config = _CONFIG_TEMPLATE % {
+            'global_options': global_options,
+            'local_options': local_options,
+            }
+        with open(self.config_file_path, 'w') as config_file:
+            config_file.write(config)
+
+    def _get_app_config(self, name=None):
+        return appconfig('config:' + self.config_file_path, name=name)
+
+    def _resolve_options(self):
+        app_config = self._get_app_config()
+        return resolve_local_conf_options(
+            app_config.global_conf,
+            app_config.local_conf,
+            )
+
+    def _load_compiled_options(self, name=None):
+        app_config = self._get_app_config(name)
+        return load_compiled_options(
+            self.compiled_settings_path,
+            app_config.global_conf,
+            app_config.local_conf,
+            )
@@ -0,0 +1,169 @@
+##############################################################################
+#
+# Copyright (c) 2016, 2degrees Limited.
+# All Rights Reserved.
+#
+# This file is part of django-pastedeploy-settings
+# <https://github.com/2degrees/django-pastedeploy-settings>, which is subject
+# to the provisions of the BSD at
+# <http://dev.2degreesnetwork.com/p/2degrees-license.html>. A copy of the
+# license should accompany this distribution. THIS SOFTWARE IS PROVIDED "AS IS"
+# AND ANY AND ALL EXPRESS OR IMPLIED WARRANTIES ARE DISCLAIMED, INCLUDING, BUT
+# NOT LIMITED TO, THE IMPLIED WARRANTIES OF TITLE, MERCHANTABILITY, AGAINST
+# INFRINGEMENT, AND FITNESS FOR A PARTICULAR PURPOSE.
+#
+##############################################################################
+from gzip import GzipFile
+from io import BytesIO
+import os
+from shutil import rmtree
+from tempfile import mkdtemp
+
+from nose.tools import eq_
+from nose.tools import ok_
+
+from django_pastedeploy_settings.compression import compress
+from django_pastedeploy_settings.compression import \
+    is_compressible_content_type
+from django_pastedeploy_settings.compression import main
+from django_pastedeploy_settings.compression import precompress_directory
+
+
+_FILE_CONTENTS = b'body { color: red; }\n' * 20
+
+
+def test_compression():
+    compressed_data = compress(_FILE_CONTENTS)
+
+    eq_(_FILE_CONTENTS, GzipFile(fileobj=BytesIO(compressed_data)).read())
+
+
+def test_deterministic_compression():
+    eq_(compress(_FILE_CONTENTS), compress(_FILE_CONTENTS))
+
+
+class TestCompressibleContentTypes(object):
+
+    def test_text(self):
+        ok_(is_compressible_content_type('text/css'))
+
+    def test_javascript(self):
+        ok_(is_compressible_content_type('application/javascript'))
+
+    def test_xml_based(self):
+        ok_(is_compressible_content_type('image/svg+xml'))
+
+    def test_image(self):
+        ok_(not is_compressible_content_type('image/png'))
+
+    def test_archive(self):
+        ok_(not is_compressible_content_type('application/zip'))
+
+
+class TestPrecompression(object):
+
+    def setup(self):
+        self.media_directory = mkdtemp()
+        self.file_path = _write_file(self.media_directory, 'style.css')
+
+    def teardown(self):
+        rmtree(self.media_directory)
+
+    def test_compressible_file(self):
+        compressed_file_paths = precompress_directory(self.media_directory, 1)
+
+        eq_([self.file_path], compressed_file_paths)
+        eq_(
+            compress(_FILE_CONTENTS),
+            _read_file(self.file_path + '.gz'),
+            )
+
+    def test_file_in_subdirectory(self):
+        file_path = \
+            _write_file(os.path.join(self.media_directory, 'css'), 'site.css')
+
+        compressed_file_paths = precompress_directory(self.media_directory, 1)
+
+        eq_(sorted([self.file_path, file_path]), compressed_file_paths)
+
+    def test_modification_time(self):
+        precompress_directory(self.media_directory, 1)
+
+        eq_(
+            int(os.stat(self.file_path).st_mtime),
+            int(os.stat(self.file_path + '.gz').st_mtime),
+            )
+
+    def test_up_to_date_file(self):
+        precompress_directory(self.media_directory, 1)
+
+        eq_([], precompress_directory(self.media_directory, 1))
+
+    def test_outdated_file(self):
+        precompress_directory(self.media_directory, 1)
+        file_stat = os.stat(self.file_path)
+        os.utime(
+            self.file_path,
+            (file_stat.st_atime, file_stat.st_mtime + 10),
+            )
+
+        eq_([self.file_path], precompress_directory(self.media_directory, 1))
+
+    def test_small_file(self):
+        _write_file(self.media_directory, 'small.css', b'body {}')
+
+        eq_([self.file_path], precompress_directory(self.media_directory, 1))
+
+    def test_min_file_size(self):
+        compressed_file_paths = precompress_directory(
+            self.media_directory,
+            1,
+            len(_FILE_CONTENTS) + 1,
+            )
+
+        eq_([], compressed_file_paths)
+
+    def test_incompressible_content_type(self):
+        _write_file(self.media_directory, 'image.png')
+
+        eq_([self.file_path], precompress_directory(self.media_directory, 1))
+
+    def test_incompressible_contents(self):
+        _write_file(self.media_directory, 'random.txt', os.urandom(1024))
+
+        eq_([self.file_path], precompress_directory(self.media_directory, 1))
+
+    def test_outdated_copy_of_incompressible_file(self):
+        file_path = _write_file(self.media_directory, 'random.txt')
+        precompress_directory(self.media_directory, 1)
+        _write_file(self.media_directory, 'random.txt', os.urandom(1024))
+        file_stat = os.stat(file_path)
+        os.utime(file_path, (file_stat.st_atime, file_stat.st_mtime + 10))
+
+        precompress_directory(self.media_directory, 1)
+
+        ok_(not os.path.exists(file_path + '.gz'))
+
+    def test_empty_directory(self):
+        os.remove(self.file_path)
+
+        eq_([], precompress_directory(self.media_directory, 1))
+
+    def test_command(self):
+        main([self.media_directory, '--processes', '1'])
+
+        ok_(os.path.isfile(self.file_path + '.gz'))
+
+
+def _write_file(directory, file_name, contents=_FILE_CONTENTS):
+    if not os.path.isdir(directory):
+        os.makedirs(directory)
+    file_path = os.path.join(directory, file_name)
+    with open(file_path, 'wb') as file_:
+        file_.write(contents)
+    return file_path
+
+
+def _read_file(file_path):
+    with open(file_path, 'rb') as file_:
+        return file_.read()
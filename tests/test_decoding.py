@@ -0,0 +1,312 @@
+# -*- coding: utf-8 -*-
+##############################################################################
+#
+# Copyright (c) 2016, 2degrees Limited.
+# All Rights Reserved.
+#
+# This file is part of django-pastedeploy-settings
+# <https://github.com/2degrees/django-pastedeploy-settings>, which is subject
+# to the provisions of the BSD at
+# <http://dev.2degreesnetwork.com/p/2degrees-license.html>. A copy of the
+# license should accompany this distribution. THIS SOFTWARE IS PROVIDED "AS IS"
+# AND ANY AND ALL EXPRESS OR IMPLIED WARRANTIES ARE DISCLAIMED, INCLUDING, BUT
+# NOT LIMITED TO, THE IMPLIED WARRANTIES OF TITLE, MERCHANTABILITY, AGAINST
+# INFRINGEMENT, AND FITNESS FOR A PARTICULAR PURPOSE.
+#
+##############################################################################
+from contextlib import contextmanager
+import json
+import math
+import sys
+from types import ModuleType
+
+from nose.tools import assert_raises
+from nose.tools import assert_raises_regexp
+from nose.tools import eq_
+from nose.tools import ok_
+
+from django_pastedeploy_settings import InvalidSettingValueError
+from django_pastedeploy_settings import resolve_local_conf_options
+from django_pastedeploy_settings.decoding import get_available_backend_names
+from django_pastedeploy_settings.decoding import JSONDecoder
+
+from tests.utils import get_global_conf
+from tests.utils import get_local_conf
+
+
+_SCALAR_LITERALS = (
+    'true',
+    'false',
+    'null',
+    '0',
+    '-0',
+    '42',
+    '-42',
+    '123456789012345678901234567890',
+    '0.5',
+    '-1.25',
+    '1e3',
+    '1E-3',
+    '2.5e+2',
+    '""',
+    '"en-gb"',
+    '"/srv/media/"',
+    '"caf\xc3\xa9"' if str is bytes else u'"caf\xe9"',
+    )
+
+
+_NON_SCALAR_LITERALS = (
+    '"escaped \\" quote"',
+    '"\\u00e9"',
+    '[1, 2]',
+    '{"key": "value"}',
+    'NaN',
+    '-Infinity',
+    ' 1',
+    )
+
+
+_INVALID_LITERALS = (
+    '',
+    'True',
+    '01',
+    '1.',
+    '.5',
+    '+1',
+    '"unterminated',
+    '"tab\tcharacter"',
+    'unquoted string',
+    'admin@domain.com',
+    )
+
+
+class TestJSONDecoder(object):
+
+    def test_scalar_literals(self):
+        with _substitute_json_backends(simplejson=_make_failing_backend()):
+            json_decoder = JSONDecoder('simplejson')
+
+            for literal in _SCALAR_LITERALS:
+                _assert_decoded_like_stdlib(json_decoder, literal)
+
+    def test_non_scalar_literals(self):
+        json_decoder = JSONDecoder('json')
+
+        for literal in _NON_SCALAR_LITERALS:
+            _assert_decoded_like_stdlib(json_decoder, literal)
+
+    def test_invalid_literals(self):
+        json_decoder = JSONDecoder('json')
+
+        for literal in _INVALID_LITERALS:
+            assert_raises(ValueError, json_decoder.decode, literal)
+
+    def test_scalar_types(self):
+        json_decoder = JSONDecoder('json')
+
+        eq_(int, type(json_decoder.decode('1')))
+        eq_(float, type(json_decoder.decode('1.0')))
+        eq_(type(u''), type(json_decoder.decode('"string"')))
+        ok_(json_decoder.decode('true') is True)
+
+    def test_backend(self):
+        backend = _make_recording_backend()
+        with _substitute_json_backends(simplejson=backend):
+            json_decoder = JSONDecoder('simplejson')
+
+            eq_([1, 2], json_decoder.decode('[1, 2]'))
+            eq_(True, json_decoder.decode('true'))
+
+        eq_(['[1, 2]'], backend.decoded_values)
+
+    def test_value_rejected_by_backend(self):
+        with _substitute_json_backends(simplejson=_make_failing_backend()):
+            json_decoder = JSONDecoder('simplejson')
+
+            ok_(math.isnan(json_decoder.decode('NaN')))
+            eq_({'key': [1]}, json_decoder.decode('{"key": [1]}'))
+
+    def test_strict_decoding(self):
+        json_decoder = JSONDecoder('json', strict=True)
+
+        assert_raises_regexp(
+            ValueError,
+            'not valid JSON',
+            json_decoder.decode,
+            'unquoted string',
+            )
+
+    def test_lenient_decoding(self):
+        json_decoder = JSONDecoder('json', strict=False)
+
+        eq_('unquoted string', json_decoder.decode('unquoted string'))
+        eq_([1], json_decoder.decode('[1]'))
+
+    def test_automatic_backend(self):
+        with _substitute_json_backends(
+            orjson=None,
+            simplejson=_make_recording_backend(),
+        ):
+            eq_('simplejson', JSONDecoder().backend_name)
+            eq_('simplejson', JSONDecoder('auto').backend_name)
+
+    def test_automatic_backend_fallback(self):
+        with _substitute_json_backends(orjson=None, simplejson=None):
+            eq_('json', JSONDecoder().backend_name)
+
+    def test_explicit_backend(self):
+        with _substitute_json_backends(simplejson=_make_recording_backend()):
+            eq_('json', JSONDecoder('json').backend_name)
+
+    def test_unknown_backend(self):
+        assert_raises_regexp(
+            ValueError,
+            'Unknown',
+            JSONDecoder,
+            'yaml',
+            )
+
+    def test_missing_backend(self):
+        with _substitute_json_backends(simplejson=None):
+            assert_raises_regexp(
+                ValueError,
+                'not installed',
+                JSONDecoder,
+                'simplejson',
+                )
+
+
+class TestAvailableBackendNames(object):
+
+    def test_stdlib_only(self):
+        with _substitute_json_backends(orjson=None, simplejson=None):
+            eq_(['json'], get_available_backend_names())
+
+    def test_accelerated_backends(self):
+        with _substitute_json_backends(
+            orjson=_make_recording_backend(),
+            simplejson=_make_recording_backend(),
+        ):
+            eq_(
+                ['orjson', 'simplejson', 'json'],
+                get_available_backend_names(),
+                )
+
+
+class TestJSONDecodingOptions(object):
+
+    def test_default_options(self):
+        global_conf = get_global_conf('read_only_empty_module')
+        local_conf = get_local_conf(SETTING=[1])
+
+        local_conf_resolved = \
+            resolve_local_conf_options(global_conf, local_conf)
+
+        eq_([1], local_conf_resolved['SETTING'])
+
+    def test_explicit_backend(self):
+        global_conf = get_global_conf(
+            'read_only_empty_module',
+            django_json_backend='json',
+            )
+        local_conf = get_local_conf(SETTING=[1])
+
+        local_conf_resolved = \
+            resolve_local_conf_options(global_conf, local_conf)
+
+        eq_([1], local_conf_resolved['SETTING'])
+
+    def test_invalid_backend(self):
+        global_conf = get_global_conf(
+            'read_only_empty_module',
+            django_json_backend='yaml',
+            )
+
+        assert_raises_regexp(
+            InvalidSettingValueError,
+            'django_json_backend',
+            resolve_local_conf_options,
+            global_conf,
+            get_local_conf(),
+            )
+
+    def test_strict_decoding(self):
+        global_conf = get_global_conf('read_only_empty_module')
+        local_conf = get_local_conf()
+        local_conf['SETTING'] = 'unquoted string'
+
+        assert_raises_regexp(
+            InvalidSettingValueError,
+            'SETTING',
+            resolve_local_conf_options,
+            global_conf,
+            local_conf,
+            )
+
+    def test_lenient_decoding(self):
+        global_conf = get_global_conf(
+            'read_only_empty_module',
+            django_json_strict='false',
+            )
+        local_conf = get_local_conf()
+        local_conf['SETTING'] = 'unquoted string'
+
+        local_conf_resolved = \
+            resolve_local_conf_options(global_conf, local_conf)
+
+        eq_('unquoted string', local_conf_resolved['SETTING'])
+
+
+def _assert_decoded_like_stdlib(json_decoder, literal):
+    expected_value = json.loads(literal)
+    decoded_value = json_decoder.decode(literal)
+
+    if isinstance(expected_value, float) and math.isnan(expected_value):
+        ok_(math.isnan(decoded_value))
+    else:
+        eq_(expected_value, decoded_value)
+        eq_(type(expected_value), type(decoded_value))
+
+
+def _make_recording_backend():
+    backend = ModuleType('json_backend')
+    backend.decoded_values = []
+
+    def loads(value):
+        backend.decoded_values.append(value)
+        return json.loads(value)
+
+    backend.loads = loads
+    return backend
+
+
+def _make_failing_backend():
+    backend = ModuleType('json_backend')
+
+    def loads(value):
+        raise ValueError('Rejected value')
+
+    backend.loads = loads
+    return backend
+
+
+@contextmanager
+def _substitute_json_backends(**backends_by_name):
+    """
+    Make the modules in ``backends_by_name`` importable under their name,
+    or make them unimportable if the module is :data:`None`.
+
+    """
+    original_modules = {
+        backend_name: sys.modules.get(backend_name)
+        for backend_name in backends_by_name
+        }
+    sys.modules.update(backends_by_name)
+    try:
+        yield
+    finally:
+        for backend_name, original_module in original_modules.items():
+            if original_module is None:
+                del sys.modules[backend_name]
+            else:
+                sys.modules[backend_name] = original_module
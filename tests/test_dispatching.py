@@ -0,0 +1,382 @@
+##############################################################################
+#
+# Copyright (c) 2016, 2degrees Limited.
+# All Rights Reserved.
+#
+# This file is part of django-pastedeploy-settings
+# <https://github.com/2degrees/django-pastedeploy-settings>, which is subject
+# to the provisions of the BSD at
+# <http://dev.2degreesnetwork.com/p/2degrees-license.html>. A copy of the
+# license should accompany this distribution. THIS SOFTWARE IS PROVIDED "AS IS"
+# AND ANY AND ALL EXPRESS OR IMPLIED WARRANTIES ARE DISCLAIMED, INCLUDING, BUT
+# NOT LIMITED TO, THE IMPLIED WARRANTIES OF TITLE, MERCHANTABILITY, AGAINST
+# INFRINGEMENT, AND FITNESS FOR A PARTICULAR PURPOSE.
+#
+##############################################################################
+from nose.tools import assert_in
+from nose.tools import assert_not_in
+from nose.tools import assert_raises
+from nose.tools import eq_
+from nose.tools import ok_
+from paste.urlmap import URLMap
+
+from django_pastedeploy_settings.dispatching import PrefixDispatcher
+from django_pastedeploy_settings.factories import make_prefix_dispatcher
+
+
+class TestPrefixDispatcher(object):
+
+    def setup(self):
+        self.dispatcher = PrefixDispatcher()
+        self.root_app = _MockApp('root')
+        self.media_app = _MockApp('media')
+        self.dispatcher['/'] = self.root_app
+        self.dispatcher['/media'] = self.media_app
+
+    def test_root(self):
+        eq_(('root', '', '/about/'), _dispatch(self.dispatcher, '/about/'))
+
+    def test_prefix(self):
+        eq_(
+            ('media', '/media', '/css/site.css'),
+            _dispatch(self.dispatcher, '/media/css/site.css'),
+            )
+
+    def test_exact_prefix(self):
+        eq_(('media', '/media', ''), _dispatch(self.dispatcher, '/media'))
+
+    def test_trailing_slash(self):
+        eq_(('media', '/media', '/'), _dispatch(self.dispatcher, '/media/'))
+
+    def test_partial_segment(self):
+        eq_(
+            ('root', '', '/mediafiles'),
+            _dispatch(self.dispatcher, '/mediafiles'),
+            )
+
+    def test_longest_prefix(self):
+        self.dispatcher['/media/admin'] = _MockApp('admin')
+
+        eq_(
+            ('admin', '/media/admin', '/css/base.css'),
+            _dispatch(self.dispatcher, '/media/admin/css/base.css'),
+            )
+
+    def test_longest_prefix_not_matching(self):
+        self.dispatcher['/media/admin/css'] = _MockApp('admin')
+
+        eq_(
+            ('media', '/media', '/admin/js/base.js'),
+            _dispatch(self.dispatcher, '/media/admin/js/base.js'),
+            )
+
+    def test_multiple_slashes(self):
+        eq_(
+            ('media', '/media', '/site.css'),
+            _dispatch(self.dispatcher, '//media//site.css'),
+            )
+
+    def test_script_name(self):
+        eq_(
+            ('media', '/app/media', '/site.css'),
+            _dispatch(self.dispatcher, '/media/site.css', SCRIPT_NAME='/app'),
+            )
+
+    def test_not_found(self):
+        dispatcher = PrefixDispatcher()
+        dispatcher['/media'] = self.media_app
+
+        status = _get_response_status(dispatcher, '/about/')
+
+        ok_(status.startswith('404'))
+
+    def test_custom_not_found_app(self):
+        dispatcher = PrefixDispatcher(_MockApp('not found'))
+
+        eq_(('not found', '', '/about/'), _dispatch(dispatcher, '/about/'))
+
+    def test_replacement(self):
+        self.dispatcher['/media/'] = _MockApp('new media')
+
+        eq_(
+            ('new media', '/media', '/site.css'),
+            _dispatch(self.dispatcher, '/media/site.css'),
+            )
+        eq_(2, len(self.dispatcher))
+
+    def test_deletion(self):
+        del self.dispatcher['/media']
+
+        eq_(
+            ('root', '', '/media/site.css'),
+            _dispatch(self.dispatcher, '/media/site.css'),
+            )
+        assert_not_in('/media', self.dispatcher)
+
+    def test_deletion_with_none(self):
+        self.dispatcher['/media'] = None
+
+        assert_not_in('/media', self.dispatcher)
+
+    def test_unknown_deletion(self):
+        with assert_raises(KeyError):
+            del self.dispatcher['/static']
+
+    def test_mapping(self):
+        eq_(self.media_app, self.dispatcher['/media/'])
+        assert_in('/media', self.dispatcher)
+        eq_(
+            sorted([(None, ''), (None, '/media')]),
+            sorted(self.dispatcher.keys()),
+            )
+
+    def test_invalid_url(self):
+        with assert_raises(ValueError):
+            self.dispatcher['media'] = self.media_app
+
+
+class TestHostDispatching(object):
+
+    def setup(self):
+        self.dispatcher = PrefixDispatcher()
+        self.dispatcher['/'] = _MockApp('root')
+        self.dispatcher['/media/css'] = _MockApp('css')
+        self.dispatcher['http://example.com/media'] = _MockApp('example')
+        self.dispatcher[('example.org:8080', '/')] = _MockApp('example.org')
+
+    def test_host(self):
+        eq_(
+            ('example', '/media', '/css/site.css'),
+            _dispatch(
+                self.dispatcher,
+                '/media/css/site.css',
+                HTTP_HOST='Example.com',
+                ),
+            )
+
+    def test_host_with_port(self):
+        eq_(
+            ('example', '/media', '/site.css'),
+            _dispatch(
+                self.dispatcher,
+                '/media/site.css',
+                HTTP_HOST='example.com:8000',
+                ),
+            )
+
+    def test_port(self):
+        eq_(
+            ('example.org', '', '/media/site.css'),
+            _dispatch(
+                self.dispatcher,
+                '/media/site.css',
+                HTTP_HOST='example.org:8080',
+                ),
+            )
+
+    def test_default_port(self):
+        dispatcher = PrefixDispatcher()
+        dispatcher['http://example.com:80/'] = _MockApp('example')
+
+        eq_(
+            ('example', '', '/'),
+            _dispatch(dispatcher, '/', HTTP_HOST='example.com'),
+            )
+
+    def test_default_port_in_host(self):
+        dispatcher = PrefixDispatcher()
+        dispatcher['https://example.com:443/'] = _MockApp('example')
+
+        eq_(
+            ('example', '', '/'),
+            _dispatch(dispatcher, '/', HTTP_HOST='example.com'),
+            )
+
+    def test_upper_case_host(self):
+        dispatcher = PrefixDispatcher()
+        dispatcher['http://Example.COM/media'] = _MockApp('example')
+        dispatcher[('Example.ORG', '/')] = _MockApp('example.org')
+
+        eq_(
+            ('example', '/media', '/site.css'),
+            _dispatch(dispatcher, '/media/site.css', HTTP_HOST='example.com'),
+            )
+        eq_(
+            ('example.org', '', '/'),
+            _dispatch(dispatcher, '/', HTTP_HOST='EXAMPLE.org'),
+            )
+        assert_in('http://example.com/media', dispatcher)
+
+    def test_server_name(self):
+        eq_(
+            ('example', '/media', '/site.css'),
+            _dispatch(self.dispatcher, '/media/site.css', HTTP_HOST=''),
+            )
+
+    def test_other_host(self):
+        eq_(
+            ('css', '/media/css', '/site.css'),
+            _dispatch(
+                self.dispatcher,
+                '/media/css/site.css',
+                HTTP_HOST='example.net',
+                ),
+            )
+
+    def test_fallback_for_host(self):
+        eq_(
+            ('root', '', '/about/'),
+            _dispatch(self.dispatcher, '/about/', HTTP_HOST='example.com'),
+            )
+
+
+def test_equivalence_with_urlmap():
+    urls = [
+        '/',
+        '/media',
+        '/media/admin',
+        '/media/admin/css/',
+        '/static',
+        'http://example.com/media',
+        'http://example.com/static/img',
+        ]
+    paths = [
+        '',
+        '/',
+        '/media',
+        '/media/',
+        '/mediafiles',
+        '/media/admin/css/base.css',
+        '/media/admin/js/base.js',
+        '/static/img/logo.png',
+        '//static//img',
+        ]
+    hosts = ['example.com', 'example.com:443', 'example.net']
+
+    dispatcher = PrefixDispatcher()
+    urlmap = URLMap()
+    for url in urls:
+        dispatcher[url] = urlmap[url] = _MockApp(url)
+
+    for host in hosts:
+        for path in paths:
+            dispatcher_outcome = \
+                _get_outcome(dispatcher, path, HTTP_HOST=host)
+            urlmap_outcome = _get_outcome(urlmap, path, HTTP_HOST=host)
+            eq_(urlmap_outcome, dispatcher_outcome, (host, path))
+
+
+class TestFactory(object):
+
+    def setup(self):
+        self.loader = _MockLoader()
+
+    def test_paths(self):
+        dispatcher = make_prefix_dispatcher(
+            self.loader,
+            {},
+            **{'/': 'django', '/media': 'media'}
+            )
+
+        eq_(
+            ('media', '/media', '/site.css'),
+            _dispatch(dispatcher, '/media/site.css'),
+            )
+        eq_(('django', '', '/about/'), _dispatch(dispatcher, '/about/'))
+
+    def test_host_and_port(self):
+        dispatcher = make_prefix_dispatcher(
+            self.loader,
+            {},
+            **{'domain example.com port 8080 /media': 'media'}
+            )
+
+        eq_(
+            ('media', '/media', '/site.css'),
+            _dispatch(
+                dispatcher,
+                '/media/site.css',
+                HTTP_HOST='example.com:8080',
+                ),
+            )
+
+    def test_not_found_app(self):
+        dispatcher = make_prefix_dispatcher(
+            self.loader,
+            {},
+            not_found_app='not-found',
+            **{'/media': 'media'}
+            )
+
+        eq_(('not-found', '', '/about/'), _dispatch(dispatcher, '/about/'))
+        eq_(1, len(dispatcher))
+
+    def test_global_not_found_app(self):
+        dispatcher = make_prefix_dispatcher(
+            self.loader,
+            {'not_found_app': 'not-found'},
+            **{'/media': 'media'}
+            )
+
+        eq_(('not-found', '', '/about/'), _dispatch(dispatcher, '/about/'))
+
+
+class _MockApp(object):
+
+    def __init__(self, name):
+        super(_MockApp, self).__init__()
+
+        self.name = name
+
+    def __call__(self, environ, start_response):
+        start_response('200 OK', [])
+        return [(self.name, environ['SCRIPT_NAME'], environ['PATH_INFO'])]
+
+
+class _MockLoader(object):
+
+    def get_app(self, name, global_conf=None):
+        return _MockApp(name)
+
+
+def _dispatch(app, path, **environ_items):
+    environ = _make_environ(path, **environ_items)
+    return app(environ, lambda status, headers: None)[0]
+
+
+def _get_response_status(app, path, **environ_items):
+    statuses = []
+
+    def start_response(status, headers, exc_info=None):
+        statuses.append(status)
+
+    app(_make_environ(path, **environ_items), start_response)
+    return statuses[0]
+
+
+def _get_outcome(app, path, **environ_items):
+    response_body = []
+
+    def start_response(status, headers, exc_info=None):
+        response_body.append(status)
+
+    outcome = app(_make_environ(path, **environ_items), start_response)
+    if response_body[0].startswith('404'):
+        outcome = None
+    else:
+        outcome = outcome[0]
+    return outcome
+
+
+def _make_environ(path, **environ_items):
+    environ = {
+        'REQUEST_METHOD': 'GET',
+        'SCRIPT_NAME': '',
+        'PATH_INFO': path,
+        'SERVER_NAME': 'example.com',
+        'SERVER_PORT': '80',
+        'HTTP_HOST': 'example.com',
+        'wsgi.url_scheme': 'http',
+        }
+    environ.update(environ_items)
+    return environ
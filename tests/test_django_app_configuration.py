@@ -14,6 +14,8 @@
 #
 ##############################################################################
 import os
+import sys
+from types import ModuleType
 
 from django.core.handlers.wsgi import WSGIHandler
 from nose.tools import assert_false
@@ -24,7 +26,9 @@ from nose.tools import assert_raises_regexp
 from nose.tools import eq_
 from nose.tools import ok_
 
+from django_pastedeploy_settings import get_configured_django_asgi_app
 from django_pastedeploy_settings import get_configured_django_wsgi_app
+from django_pastedeploy_settings import InvalidSettingValueError
 
 from tests.utils import BaseDjangoTestCase
 from tests.utils import get_global_conf
@@ -55,6 +59,65 @@ class TestWSGIAppRetrieval(BaseDjangoTestCase):
         ok_(isinstance(app, MockApp))
 
 
+class TestASGIAppRetrieval(BaseDjangoTestCase):
+
+    setup_fixture = False
+
+    def setup(self):
+        super(TestASGIAppRetrieval, self).setup()
+
+        # Django only supports ASGI from version 3.0
+        self.original_asgi_module = sys.modules.get('django.core.asgi')
+        asgi_module = ModuleType('django.core.asgi')
+        asgi_module.get_asgi_application = _get_mock_asgi_app
+        sys.modules['django.core.asgi'] = asgi_module
+
+    def teardown(self):
+        if self.original_asgi_module:
+            sys.modules['django.core.asgi'] = self.original_asgi_module
+        else:
+            del sys.modules['django.core.asgi']
+
+        super(TestASGIAppRetrieval, self).teardown()
+
+    def test_application(self):
+        global_conf = get_global_conf('settings5')
+        app = get_configured_django_asgi_app(global_conf)
+
+        eq_(_MOCK_ASGI_APP, app)
+
+    def test_settings(self):
+        global_conf = get_global_conf('empty_module2')
+        local_conf = get_local_conf(setting1='String')
+        get_configured_django_asgi_app(global_conf, **local_conf)
+
+        from tests.mock_django_settings import empty_module2
+
+        eq_('String', empty_module2.setting1)
+
+    def test_settings_set_before_retrieval(self):
+        global_conf = get_global_conf('empty_module2')
+        local_conf = get_local_conf(SETTING1='String')
+
+        def get_asgi_application():
+            from django.conf import settings
+            eq_('String', settings.SETTING1)
+            return _MOCK_ASGI_APP
+
+        sys.modules['django.core.asgi'].get_asgi_application = \
+            get_asgi_application
+        app = get_configured_django_asgi_app(global_conf, **local_conf)
+
+        eq_(_MOCK_ASGI_APP, app)
+
+
+_MOCK_ASGI_APP = object()
+
+
+def _get_mock_asgi_app():
+    return _MOCK_ASGI_APP
+
+
 class TestSettingsStorage(BaseDjangoTestCase):
 
     setup_fixture = False
@@ -98,6 +161,90 @@ class TestSettingsStorage(BaseDjangoTestCase):
         eq_(iterables_module.LIST, (1, 2, 3, 8, 9))
         eq_(iterables_module.TUPLE, (1, 2, 3, 6, 7))
 
+    def test_duplicated_sequence_items(self):
+        global_conf = get_global_conf('mergeable_module')
+        local_conf = get_local_conf(
+            MIDDLEWARE=['b.Middleware', 'c.Middleware'],
+            )
+        get_configured_django_wsgi_app(global_conf, **local_conf)
+
+        from tests.mock_django_settings import mergeable_module
+
+        eq_(
+            ('a.Middleware', 'b.Middleware', 'c.Middleware'),
+            mergeable_module.MIDDLEWARE,
+            )
+
+    def test_dict_option_in_settings_module(self):
+        global_conf = get_global_conf('mergeable_module')
+        local_conf = get_local_conf(
+            DATABASES={'default': {'NAME': 'other.sqlite3'}},
+            )
+        get_configured_django_wsgi_app(global_conf, **local_conf)
+
+        from tests.mock_django_settings import mergeable_module
+
+        eq_(
+            {
+                'default': {
+                    'ENGINE': 'django.db.backends.sqlite3',
+                    'NAME': 'other.sqlite3',
+                    'OPTIONS': {'timeout': 20},
+                    },
+                },
+            mergeable_module.DATABASES,
+            )
+        eq_([], self.logs['warning'])
+
+    def test_configured_merge_strategies(self):
+        global_conf = get_global_conf(
+            'mergeable_module',
+            django_merge_strategies='MIDDLEWARE:append NAME:replace',
+            )
+        local_conf = get_local_conf(
+            MIDDLEWARE=['a.Middleware'],
+            NAME='new name',
+            )
+        get_configured_django_wsgi_app(global_conf, **local_conf)
+
+        from tests.mock_django_settings import mergeable_module
+
+        eq_(
+            ('a.Middleware', 'b.Middleware', 'a.Middleware'),
+            mergeable_module.MIDDLEWARE,
+            )
+        eq_('new name', mergeable_module.NAME)
+
+    def test_inapplicable_merge_strategy(self):
+        global_conf = get_global_conf(
+            'mergeable_module',
+            django_merge_strategies='NAME:merge',
+            )
+        local_conf = get_local_conf(NAME='new name')
+        get_configured_django_wsgi_app(global_conf, **local_conf)
+
+        from tests.mock_django_settings import mergeable_module
+
+        eq_('name', mergeable_module.NAME)
+        eq_(
+            '"NAME" will not be overridden in ' \
+                'tests.mock_django_settings.mergeable_module',
+            self.logs['warning'][0],
+            )
+
+    def test_invalid_merge_strategies(self):
+        global_conf = get_global_conf(
+            'mergeable_module',
+            django_merge_strategies='NAME:unknown',
+            )
+
+        assert_raises_regexp(
+            InvalidSettingValueError,
+            r'^Invalid option "django_merge_strategies": Unknown merge ',
+            get_configured_django_wsgi_app,
+            global_conf,
+            )
+
 
 class TestSettingsModuleSpecification(BaseDjangoTestCase):
 
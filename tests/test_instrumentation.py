@@ -0,0 +1,202 @@
+##############################################################################
+#
+# Copyright (c) 2016, 2degrees Limited.
+# All Rights Reserved.
+#
+# This file is part of django-pastedeploy-settings
+# <https://github.com/2degrees/django-pastedeploy-settings>, which is subject
+# to the provisions of the BSD at
+# <http://dev.2degreesnetwork.com/p/2degrees-license.html>. A copy of the
+# license should accompany this distribution. THIS SOFTWARE IS PROVIDED "AS IS"
+# AND ANY AND ALL EXPRESS OR IMPLIED WARRANTIES ARE DISCLAIMED, INCLUDING, BUT
+# NOT LIMITED TO, THE IMPLIED WARRANTIES OF TITLE, MERCHANTABILITY, AGAINST
+# INFRINGEMENT, AND FITNESS FOR A PARTICULAR PURPOSE.
+#
+##############################################################################
+from time import sleep
+
+from nose.tools import assert_in
+from nose.tools import assert_raises_regexp
+from nose.tools import eq_
+from nose.tools import ok_
+
+from django_pastedeploy_settings import InvalidSettingValueError
+from django_pastedeploy_settings import get_configured_django_wsgi_app
+from django_pastedeploy_settings import resolve_local_conf_options
+from django_pastedeploy_settings.instrumentation import add_phase_hook
+from django_pastedeploy_settings.instrumentation import collect_startup_report
+from django_pastedeploy_settings.instrumentation import \
+    get_last_startup_report
+from django_pastedeploy_settings.instrumentation import measure_phase
+from django_pastedeploy_settings.instrumentation import remove_phase_hook
+
+try:
+    import tracemalloc
+except ImportError:
+    tracemalloc = None
+
+from tests.utils import BaseDjangoTestCase
+from tests.utils import get_global_conf
+from tests.utils import get_local_conf
+
+
+class TestPhaseMeasurement(object):
+
+    def test_outside_report_collection(self):
+        with measure_phase('phase'):
+            pass
+
+        with collect_startup_report() as startup_report:
+            pass
+
+        eq_([], startup_report.phase_measurements)
+
+    def test_measurement(self):
+        with collect_startup_report() as startup_report:
+            with measure_phase('phase'):
+                pass
+
+        eq_(1, len(startup_report.phase_measurements))
+        phase_measurement = startup_report.phase_measurements[0]
+        eq_('phase', phase_measurement.name)
+        eq_(None, phase_measurement.parent_name)
+        ok_(0 <= phase_measurement.wall_time)
+        ok_(0 <= phase_measurement.cpu_time)
+
+    def test_nested_phases(self):
+        with collect_startup_report() as startup_report:
+            with measure_phase('parent'):
+                with measure_phase('child'):
+                    pass
+
+        child_measurement, parent_measurement = \
+            startup_report.phase_measurements
+        eq_('child', child_measurement.name)
+        eq_('parent', child_measurement.parent_name)
+        eq_('parent', parent_measurement.name)
+        ok_(parent_measurement.wall_time <= startup_report.total_wall_time)
+
+    def test_total_wall_time_outside_phases(self):
+        with collect_startup_report() as startup_report:
+            sleep(0.01)
+            with measure_phase('phase'):
+                pass
+        total_wall_time = startup_report.total_wall_time
+
+        ok_(0.01 <= total_wall_time)
+        eq_(total_wall_time, startup_report.total_wall_time)
+
+    def test_nested_report_collection(self):
+        with collect_startup_report() as outer_startup_report:
+            with collect_startup_report() as inner_startup_report:
+                pass
+
+        ok_(outer_startup_report is inner_startup_report)
+
+    def test_last_report(self):
+        with collect_startup_report() as startup_report:
+            pass
+
+        eq_(startup_report, get_last_startup_report())
+
+    def test_allocations(self):
+        if not tracemalloc:
+            return
+
+        tracemalloc.start()
+        try:
+            with collect_startup_report() as startup_report:
+                with measure_phase('phase'):
+                    allocated_object = [0] * 10000
+        finally:
+            tracemalloc.stop()
+
+        ok_(len(allocated_object) * 8 <=
+            startup_report.phase_measurements[0].allocated_bytes)
+
+    def test_allocations_without_tracing(self):
+        with collect_startup_report() as startup_report:
+            with measure_phase('phase'):
+                pass
+
+        if not tracemalloc or not tracemalloc.is_tracing():
+            eq_(None, startup_report.phase_measurements[0].allocated_bytes)
+
+
+class TestPhaseHooks(object):
+
+    def setup(self):
+        self.phase_measurements = []
+
+    def teardown(self):
+        remove_phase_hook(self.phase_measurements.append)
+
+    def test_hook_called(self):
+        add_phase_hook(self.phase_measurements.append)
+
+        with collect_startup_report() as startup_report:
+            with measure_phase('phase'):
+                pass
+
+        eq_(startup_report.phase_measurements, self.phase_measurements)
+
+
+class TestStartupReport(BaseDjangoTestCase):
+
+    setup_fixture = False
+
+    def test_settings_resolution(self):
+        global_conf = get_global_conf('read_only_empty_module')
+        resolve_local_conf_options(global_conf, get_local_conf())
+
+        phase_names = _get_phase_names(get_last_startup_report())
+        eq_(['validation', 'dereferencing', 'parsing'], phase_names[-3:])
+
+    def test_wsgi_application_retrieval(self):
+        global_conf = get_global_conf('settings5')
+        get_configured_django_wsgi_app(global_conf)
+
+        phase_names = _get_phase_names(get_last_startup_report())
+        for phase_name in ('storage', 'wsgi_application', 'validation'):
+            assert_in(phase_name, phase_names)
+
+    def test_threshold_not_set(self):
+        global_conf = get_global_conf('settings5')
+        get_configured_django_wsgi_app(global_conf)
+
+        eq_([], self.logs['warning'])
+
+    def test_threshold_exceeded(self):
+        global_conf = get_global_conf(
+            'settings5',
+            django_startup_report_threshold='0',
+            )
+        get_configured_django_wsgi_app(global_conf)
+
+        eq_(1, len(self.logs['warning']))
+        ok_(self.logs['warning'][0].startswith('Start-up took'))
+        assert_in('wsgi_application: ', self.logs['warning'][0])
+
+    def test_threshold_not_exceeded(self):
+        global_conf = get_global_conf(
+            'settings5',
+            django_startup_report_threshold='60',
+            )
+        get_configured_django_wsgi_app(global_conf)
+
+        eq_([], self.logs['warning'])
+
+    def test_invalid_threshold(self):
+        global_conf = get_global_conf(
+            'settings5',
+            django_startup_report_threshold='five',
+            )
+        with assert_raises_regexp(InvalidSettingValueError, 'threshold'):
+            get_configured_django_wsgi_app(global_conf)
+
+
+def _get_phase_names(startup_report):
+    return [
+        phase_measurement.name
+        for phase_measurement in startup_report.phase_measurements
+        ]
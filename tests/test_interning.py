@@ -0,0 +1,288 @@
+##############################################################################
+#
+# Copyright (c) 2016, 2degrees Limited.
+# All Rights Reserved.
+#
+# This file is part of django-pastedeploy-settings
+# <https://github.com/2degrees/django-pastedeploy-settings>, which is subject
+# to the provisions of the BSD at
+# <http://dev.2degreesnetwork.com/p/2degrees-license.html>. A copy of the
+# license should accompany this distribution. THIS SOFTWARE IS PROVIDED "AS IS"
+# AND ANY AND ALL EXPRESS OR IMPLIED WARRANTIES ARE DISCLAIMED, INCLUDING, BUT
+# NOT LIMITED TO, THE IMPLIED WARRANTIES OF TITLE, MERCHANTABILITY, AGAINST
+# INFRINGEMENT, AND FITNESS FOR A PARTICULAR PURPOSE.
+#
+##############################################################################
+from copy import deepcopy
+from math import copysign
+import pickle
+
+from nose.tools import assert_false
+from nose.tools import assert_is_none
+from nose.tools import assert_raises
+from nose.tools import eq_
+from nose.tools import ok_
+
+from django_pastedeploy_settings import get_load_context
+from django_pastedeploy_settings import LazilyDecodedOptions
+from django_pastedeploy_settings import resolve_local_conf_options
+from django_pastedeploy_settings.interning import FrozenDict
+from django_pastedeploy_settings.interning import ValueInterner
+
+from tests.utils import BaseDjangoTestCase
+from tests.utils import get_global_conf
+from tests.utils import get_local_conf
+
+
+class TestFrozenDict(object):
+
+    def test_reading(self):
+        frozen_dict = FrozenDict({'key': 'value'})
+
+        eq_('value', frozen_dict['key'])
+        eq_({'key': 'value'}, frozen_dict)
+
+    def test_modification(self):
+        frozen_dict = FrozenDict({'key': 'value'})
+
+        assert_raises(TypeError, frozen_dict.__setitem__, 'key', 'other')
+        assert_raises(TypeError, frozen_dict.__delitem__, 'key')
+        assert_raises(TypeError, frozen_dict.clear)
+        assert_raises(TypeError, frozen_dict.pop, 'key')
+        assert_raises(TypeError, frozen_dict.popitem)
+        assert_raises(TypeError, frozen_dict.setdefault, 'key', 'other')
+        assert_raises(TypeError, frozen_dict.update, {'key': 'other'})
+        eq_({'key': 'value'}, frozen_dict)
+
+    def test_copy(self):
+        frozen_dict = FrozenDict({'key': 'value'})
+
+        dict_copy = frozen_dict.copy()
+        dict_copy['key'] = 'other'
+
+        eq_(dict, type(dict_copy))
+        eq_('value', frozen_dict['key'])
+
+    def test_pickling(self):
+        frozen_dict = FrozenDict({'key': 'value'})
+
+        unpickled_frozen_dict = pickle.loads(pickle.dumps(frozen_dict))
+
+        eq_(FrozenDict, type(unpickled_frozen_dict))
+        eq_(frozen_dict, unpickled_frozen_dict)
+
+    def test_deep_copy(self):
+        frozen_dict = FrozenDict({'key': ('value', )})
+
+        frozen_dict_copy = deepcopy(frozen_dict)
+
+        eq_(FrozenDict, type(frozen_dict_copy))
+        eq_(frozen_dict, frozen_dict_copy)
+
+
+class TestValueInterner(object):
+
+    def test_scalars(self):
+        value_interner = ValueInterner()
+
+        for value in (u'string', 1, 1.5, True, None):
+            eq_(value, value_interner.intern(value))
+
+    def test_strings(self):
+        value_interner = ValueInterner()
+
+        string1 = value_interner.intern(u''.join([u'long ', u'string']))
+        string2 = value_interner.intern(u''.join([u'long ', u'string']))
+
+        ok_(string1 is string2)
+
+    def test_scalars_of_different_types(self):
+        value_interner = ValueInterner()
+
+        eq_(1, value_interner.intern(1))
+        ok_(value_interner.intern(True) is True)
+        eq_(float, type(value_interner.intern(1.0)))
+
+    def test_signed_zeros(self):
+        value_interner = ValueInterner()
+
+        positive_zero = value_interner.intern(0.0)
+        negative_zero = value_interner.intern(-0.0)
+
+        eq_(1.0, copysign(1, positive_zero))
+        eq_(-1.0, copysign(1, negative_zero))
+
+    def test_clearing(self):
+        value_interner = ValueInterner()
+        value1 = value_interner.intern([u'a'])
+
+        value_interner.clear()
+
+        value2 = value_interner.intern([u'a'])
+        eq_(value1, value2)
+        ok_(value1 is not value2)
+        eq_(4, value_interner.report.unique_value_count)
+
+    def test_lists(self):
+        value_interner = ValueInterner()
+
+        value1 = value_interner.intern([u'a', [u'b', u'c']])
+        value2 = value_interner.intern([u'a', [u'b', u'c']])
+
+        eq_((u'a', (u'b', u'c')), value1)
+        ok_(value1 is value2)
+
+    def test_dictionaries(self):
+        value_interner = ValueInterner()
+
+        value1 = value_interner.intern({u'key': [u'a']})
+        value2 = value_interner.intern({u'key': [u'a']})
+
+        eq_(FrozenDict, type(value1))
+        eq_({u'key': (u'a', )}, value1)
+        ok_(value1 is value2)
+
+    def test_shared_subtrees(self):
+        value_interner = ValueInterner()
+
+        value1 = value_interner.intern({u'hosts': [u'a', u'b'], u'port': 1})
+        value2 = value_interner.intern({u'hosts': [u'a', u'b'], u'port': 2})
+
+        assert_false(value1 is value2)
+        ok_(value1[u'hosts'] is value2[u'hosts'])
+
+    def test_different_values(self):
+        value_interner = ValueInterner()
+
+        value1 = value_interner.intern([1, 2])
+        value2 = value_interner.intern([2, 1])
+
+        eq_((1, 2), value1)
+        eq_((2, 1), value2)
+
+    def test_report(self):
+        value_interner = ValueInterner()
+        value_interner.intern([u'a', u'b'])
+        value_interner.intern([u'a', u'b'])
+
+        report = value_interner.report
+
+        eq_(6, report.value_count)
+        eq_(3, report.unique_value_count)
+        eq_(report.total_size, 2 * report.unique_size)
+        eq_(report.unique_size, report.saved_size)
+
+    def test_empty_report(self):
+        report = ValueInterner().report
+
+        eq_(0, report.value_count)
+        eq_(0, report.saved_size)
+
+
+class TestFrozenSettings(BaseDjangoTestCase):
+
+    setup_fixture = False
+
+    def test_frozen_settings_disabled(self):
+        global_conf = get_global_conf('read_only_empty_module')
+        local_conf = get_local_conf(SETTING=[1])
+
+        local_conf_resolved = \
+            resolve_local_conf_options(global_conf, local_conf)
+
+        eq_([1], local_conf_resolved['SETTING'])
+        assert_is_none(get_load_context(global_conf).value_interner)
+
+    def test_frozen_settings_enabled(self):
+        global_conf = get_global_conf(
+            'read_only_empty_module',
+            django_frozen_settings='true',
+            )
+        local_conf = get_local_conf(
+            SETTING1={'hosts': ['a', 'b']},
+            SETTING2=['a', 'b'],
+            )
+
+        local_conf_resolved = \
+            resolve_local_conf_options(global_conf, local_conf)
+
+        eq_(FrozenDict, type(local_conf_resolved['SETTING1']))
+        ok_(
+            local_conf_resolved['SETTING1']['hosts'] is
+            local_conf_resolved['SETTING2']
+            )
+        report = get_load_context(global_conf).value_interner.report
+        ok_(0 < report.saved_size)
+
+    def test_signed_zeros(self):
+        global_conf = get_global_conf(
+            'read_only_empty_module',
+            django_frozen_settings='true',
+            )
+        local_conf = get_local_conf(SETTING=[0.0, -0.0])
+
+        local_conf_resolved = \
+            resolve_local_conf_options(global_conf, local_conf)
+
+        eq_(
+            [1.0, -1.0],
+            [copysign(1, value) for value in local_conf_resolved['SETTING']],
+            )
+
+    def test_values_forgotten_after_resolution(self):
+        global_conf = get_global_conf(
+            'read_only_empty_module',
+            django_frozen_settings='true',
+            )
+        local_conf = get_local_conf(SETTING=['a'])
+
+        resolve_local_conf_options(global_conf, local_conf)
+
+        value_interner = get_load_context(global_conf).value_interner
+        eq_({}, value_interner._unique_values)
+        ok_(0 < value_interner.report.unique_value_count)
+
+    def test_mutable_settings(self):
+        global_conf = get_global_conf(
+            'read_only_empty_module',
+            django_frozen_settings='true',
+            )
+        local_conf = get_local_conf(DATABASES={'default': {}})
+
+        local_conf_resolved = \
+            resolve_local_conf_options(global_conf, local_conf)
+
+        eq_(dict, type(local_conf_resolved['DATABASES']))
+
+    def test_lazy_settings(self):
+        global_conf = get_global_conf(
+            'read_only_empty_module',
+            django_frozen_settings='true',
+            django_lazy_settings='true',
+            )
+        local_conf = get_local_conf(SETTING1=['a'], SETTING2=['a'])
+
+        local_conf_resolved = \
+            resolve_local_conf_options(global_conf, local_conf)
+
+        ok_(isinstance(local_conf_resolved, LazilyDecodedOptions))
+        ok_(local_conf_resolved['SETTING1'] is local_conf_resolved['SETTING2'])
+
+    def test_merged_settings(self):
+        global_conf = get_global_conf(
+            'mergeable_module',
+            django_frozen_settings='true',
+            )
+        local_conf = get_local_conf(
+            MIDDLEWARE=['c.Middleware'],
+            FEATURES={'beta': True},
+            )
+        get_load_context(global_conf).set_up_settings(local_conf)
+
+        from tests.mock_django_settings import mergeable_module
+
+        eq_(
+            ('a.Middleware', 'b.Middleware', 'c.Middleware'),
+            mergeable_module.MIDDLEWARE,
+            )
+        eq_({'new_ui': False, 'beta': True}, mergeable_module.FEATURES)
@@ -0,0 +1,234 @@
+##############################################################################
+#
+# Copyright (c) 2016, 2degrees Limited.
+# All Rights Reserved.
+#
+# This file is part of django-pastedeploy-settings
+# <https://github.com/2degrees/django-pastedeploy-settings>, which is subject
+# to the provisions of the BSD at
+# <http://dev.2degreesnetwork.com/p/2degrees-license.html>. A copy of the
+# license should accompany this distribution. THIS SOFTWARE IS PROVIDED "AS IS"
+# AND ANY AND ALL EXPRESS OR IMPLIED WARRANTIES ARE DISCLAIMED, INCLUDING, BUT
+# NOT LIMITED TO, THE IMPLIED WARRANTIES OF TITLE, MERCHANTABILITY, AGAINST
+# INFRINGEMENT, AND FITNESS FOR A PARTICULAR PURPOSE.
+#
+##############################################################################
+import sys
+from types import ModuleType
+
+from nose.plugins.skip import SkipTest
+from nose.tools import assert_false
+from nose.tools import assert_in
+from nose.tools import assert_not_in
+from nose.tools import assert_raises
+from nose.tools import assert_raises_regexp
+from nose.tools import eq_
+from nose.tools import ok_
+
+from django_pastedeploy_settings import get_configured_django_wsgi_app
+from django_pastedeploy_settings import InvalidSettingValueError
+from django_pastedeploy_settings import LazilyDecodedOptions
+from django_pastedeploy_settings import resolve_local_conf_options
+from django_pastedeploy_settings import _get_stored_settings
+
+from tests.utils import BaseDjangoTestCase
+from tests.utils import get_global_conf
+from tests.utils import get_local_conf
+
+
+class TestLazilyDecodedOptions(object):
+
+    def test_decoding_on_retrieval(self):
+        options = LazilyDecodedOptions({'SETTING': '[1, 2]'})
+
+        assert_false(options.is_decoded('SETTING'))
+        eq_([1, 2], options['SETTING'])
+        ok_(options.is_decoded('SETTING'))
+
+    def test_memoization(self):
+        options = LazilyDecodedOptions({'SETTING': '[1, 2]'})
+
+        ok_(options['SETTING'] is options['SETTING'])
+
+    def test_invalid_value(self):
+        options = LazilyDecodedOptions({'SETTING': 'unquoted string'})
+
+        assert_raises_regexp(
+            InvalidSettingValueError,
+            'SETTING',
+            options.__getitem__,
+            'SETTING',
+            )
+
+    def test_non_existing_option(self):
+        options = LazilyDecodedOptions({})
+
+        assert_raises(KeyError, options.__getitem__, 'SETTING')
+
+    def test_setting_value(self):
+        options = LazilyDecodedOptions({'SETTING': '1'})
+        options['SETTING'] = 'raw value'
+
+        eq_('raw value', options['SETTING'])
+
+    def test_deleting_values(self):
+        options = LazilyDecodedOptions({'SETTING1': '1', 'SETTING2': '2'})
+        options['SETTING1']
+
+        del options['SETTING1']
+        del options['SETTING2']
+
+        eq_(0, len(options))
+
+    def test_comparison_to_dictionary(self):
+        options = LazilyDecodedOptions({'SETTING1': '1', 'SETTING2': '"a"'})
+
+        eq_({'SETTING1': 1, 'SETTING2': 'a'}, options)
+
+    def test_decoding_all_values(self):
+        options = LazilyDecodedOptions({'SETTING1': '1', 'SETTING2': '"a"'})
+        options.decode_all()
+
+        ok_(options.is_decoded('SETTING1'))
+        ok_(options.is_decoded('SETTING2'))
+
+    def test_decoding_all_values_with_invalid_value(self):
+        options = LazilyDecodedOptions({'SETTING': 'unquoted string'})
+
+        assert_raises(InvalidSettingValueError, options.decode_all)
+
+
+class TestLazyResolution(object):
+
+    def test_lazy_decoding_disabled(self):
+        global_conf = get_global_conf('read_only_empty_module')
+        local_conf_resolved = \
+            resolve_local_conf_options(global_conf, get_local_conf())
+
+        eq_(dict, type(local_conf_resolved))
+
+    def test_lazy_decoding_enabled(self):
+        global_conf = get_global_conf(
+            'read_only_empty_module',
+            django_lazy_settings='true',
+            )
+        local_conf = get_local_conf(SETTING='value')
+
+        local_conf_resolved = \
+            resolve_local_conf_options(global_conf, local_conf)
+
+        ok_(isinstance(local_conf_resolved, LazilyDecodedOptions))
+        assert_false(local_conf_resolved.is_decoded('SETTING'))
+        eq_('value', local_conf_resolved['SETTING'])
+        eq_(True, local_conf_resolved['DEBUG'])
+        assert_in('paste_configuration_file', local_conf_resolved)
+
+    def test_invalid_value_without_validation(self):
+        global_conf = get_global_conf(
+            'read_only_empty_module',
+            django_lazy_settings='true',
+            )
+        local_conf = get_local_conf()
+        local_conf['SETTING'] = 'unquoted string'
+
+        local_conf_resolved = \
+            resolve_local_conf_options(global_conf, local_conf)
+
+        assert_raises(
+            InvalidSettingValueError,
+            local_conf_resolved.__getitem__,
+            'SETTING',
+            )
+
+    def test_invalid_value_with_validation(self):
+        global_conf = get_global_conf(
+            'read_only_empty_module',
+            django_lazy_settings='true',
+            django_lazy_settings_validate='true',
+            )
+        local_conf = get_local_conf()
+        local_conf['SETTING'] = 'unquoted string'
+
+        assert_raises(
+            InvalidSettingValueError,
+            resolve_local_conf_options,
+            global_conf,
+            local_conf,
+            )
+
+
+class TestLazySettingsStorage(BaseDjangoTestCase):
+
+    setup_fixture = False
+
+    def test_new_setting(self):
+        global_conf = get_global_conf('empty_module', django_lazy_settings='1')
+        local_conf = get_local_conf(setting1=['a', 'b'])
+        get_configured_django_wsgi_app(global_conf, **local_conf)
+
+        from tests.mock_django_settings import empty_module
+
+        if (3, 5) <= sys.version_info:
+            assert_not_in('setting1', vars(empty_module))
+        assert_in('setting1', dir(empty_module))
+        eq_(['a', 'b'], empty_module.setting1)
+        eq_(['a', 'b'], empty_module.setting1)
+
+    def test_existing_setting(self):
+        global_conf = \
+            get_global_conf('iterables_module', django_lazy_settings='1')
+        local_conf = get_local_conf(LIST=[8, 9])
+        get_configured_django_wsgi_app(global_conf, **local_conf)
+
+        from tests.mock_django_settings import iterables_module
+
+        eq_((1, 2, 3, 8, 9), iterables_module.LIST)
+
+    def test_django_settings(self):
+        global_conf = get_global_conf('empty_module', django_lazy_settings='1')
+        local_conf = get_local_conf(SETTING1={'key': 'value'})
+        get_configured_django_wsgi_app(global_conf, **local_conf)
+
+        from django.conf import settings
+
+        eq_({'key': 'value'}, settings.SETTING1)
+        eq_(True, settings.DEBUG)
+
+    def test_settings_decoded_by_django(self):
+        """
+        Django's settings object, which is set up along with the WSGI
+        application, decodes the upper case settings, so only the lower case
+        ones remain undecoded.
+
+        """
+        if sys.version_info < (3, 5):
+            raise SkipTest('Settings are decoded up-front on this version')
+
+        global_conf = get_global_conf('empty_module', django_lazy_settings='1')
+        local_conf = get_local_conf(SETTING1=[1, 2], setting2=[3, 4])
+        get_configured_django_wsgi_app(global_conf, **local_conf)
+
+        from tests.mock_django_settings import empty_module
+
+        eq_([1, 2], vars(empty_module)['SETTING1'])
+        assert_not_in('setting2', vars(empty_module))
+        eq_(['setting2'], list(vars(empty_module)['__lazy_settings__']))
+
+    def test_original_module_class_restored(self):
+        if sys.version_info < (3, 5):
+            raise SkipTest('Settings are decoded up-front on this version')
+
+        global_conf = get_global_conf('empty_module', django_lazy_settings='1')
+        local_conf = get_local_conf(setting1=[1, 2], setting2=[3, 4])
+        get_configured_django_wsgi_app(global_conf, **local_conf)
+
+        from tests.mock_django_settings import empty_module
+
+        stored_settings = _get_stored_settings(empty_module)
+        stored_settings.restore_original_value('setting1')
+        ok_(type(empty_module) is not ModuleType)
+
+        stored_settings.restore_original_value('setting2')
+        ok_(type(empty_module) is ModuleType)
+        assert_not_in('__lazy_settings__', vars(empty_module))
+        assert_not_in('setting2', dir(empty_module))
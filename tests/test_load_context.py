@@ -0,0 +1,136 @@
+##############################################################################
+#
+# Copyright (c) 2016, 2degrees Limited.
+# All Rights Reserved.
+#
+# This file is part of django-pastedeploy-settings
+# <https://github.com/2degrees/django-pastedeploy-settings>, which is subject
+# to the provisions of the BSD at
+# <http://dev.2degreesnetwork.com/p/2degrees-license.html>. A copy of the
+# license should accompany this distribution. THIS SOFTWARE IS PROVIDED "AS IS"
+# AND ANY AND ALL EXPRESS OR IMPLIED WARRANTIES ARE DISCLAIMED, INCLUDING, BUT
+# NOT LIMITED TO, THE IMPLIED WARRANTIES OF TITLE, MERCHANTABILITY, AGAINST
+# INFRINGEMENT, AND FITNESS FOR A PARTICULAR PURPOSE.
+#
+##############################################################################
+import os
+import sys
+
+from nose.tools import assert_false
+from nose.tools import assert_raises_regexp
+from nose.tools import eq_
+from nose.tools import ok_
+
+from django_pastedeploy_settings import BadDebugFlagError
+from django_pastedeploy_settings import get_configured_django_wsgi_app
+from django_pastedeploy_settings import get_load_context
+from django_pastedeploy_settings import LoadContext
+
+from tests.utils import BaseDjangoTestCase
+from tests.utils import get_global_conf
+from tests.utils import get_local_conf
+
+
+class TestLoadContextRetrieval(BaseDjangoTestCase):
+
+    setup_fixture = False
+
+    def test_same_global_conf(self):
+        load_context1 = get_load_context(get_global_conf('empty_module'))
+        load_context2 = get_load_context(get_global_conf('empty_module'))
+
+        ok_(load_context1 is load_context2)
+
+    def test_different_global_conf(self):
+        load_context1 = get_load_context(get_global_conf('empty_module'))
+        load_context2 = \
+            get_load_context(get_global_conf('empty_module', debug=False))
+
+        assert_false(load_context1 is load_context2)
+        ok_(
+            load_context1.django_settings_module is
+                load_context2.django_settings_module,
+            )
+
+    def test_reloaded_settings_module(self):
+        global_conf = get_global_conf('empty_module')
+        load_context1 = get_load_context(global_conf)
+
+        del sys.modules[load_context1.django_settings_module.__name__]
+
+        load_context2 = get_load_context(global_conf)
+
+        assert_false(load_context1 is load_context2)
+        assert_false(
+            load_context1.django_settings_module is
+                load_context2.django_settings_module,
+            )
+
+    def test_unhashable_global_option(self):
+        global_conf = get_global_conf('empty_module', unhashable=[])
+
+        load_context1 = get_load_context(global_conf)
+        load_context2 = get_load_context(global_conf)
+
+        assert_false(load_context1 is load_context2)
+
+
+class TestLoadContext(BaseDjangoTestCase):
+
+    setup_fixture = False
+
+    def test_settings_module(self):
+        load_context = LoadContext(get_global_conf('empty_module'))
+
+        from tests.mock_django_settings import empty_module
+
+        eq_(empty_module, load_context.django_settings_module)
+
+    def test_settings_module_with_debug(self):
+        assert_raises_regexp(
+            BadDebugFlagError,
+            r'Settings modules must not define "DEBUG"',
+            LoadContext,
+            get_global_conf('debug_settings'),
+            )
+
+    def test_option_resolution(self):
+        load_context = LoadContext(get_global_conf('empty_module'))
+        local_conf_resolved = \
+            load_context.resolve_local_conf_options(get_local_conf(A=1))
+
+        eq_(1, local_conf_resolved['A'])
+
+    def test_settings_set_up(self):
+        load_context = LoadContext(get_global_conf('empty_module'))
+        load_context.set_up_settings(get_local_conf(setting1='value'))
+
+        eq_('value', load_context.django_settings_module.setting1)
+        eq_(
+            'tests.mock_django_settings.empty_module',
+            os.environ['DJANGO_SETTINGS_MODULE'],
+            )
+
+
+class TestMultipleApplications(BaseDjangoTestCase):
+
+    setup_fixture = False
+
+    def test_shared_settings_module(self):
+        """
+        Several applications can be loaded from the same settings module.
+
+        """
+        get_configured_django_wsgi_app(
+            get_global_conf('empty_module2'),
+            **get_local_conf(setting1='value1')
+            )
+        get_configured_django_wsgi_app(
+            get_global_conf('empty_module2', debug=False),
+            **get_local_conf(setting2='value2')
+            )
+
+        from tests.mock_django_settings import empty_module2
+
+        eq_('value1', empty_module2.setting1)
+        eq_('value2', empty_module2.setting2)
@@ -0,0 +1,257 @@
+##############################################################################
+#
+# Copyright (c) 2016, 2degrees Limited.
+# All Rights Reserved.
+#
+# This file is part of django-pastedeploy-settings
+# <https://github.com/2degrees/django-pastedeploy-settings>, which is subject
+# to the provisions of the BSD at
+# <http://dev.2degreesnetwork.com/p/2degrees-license.html>. A copy of the
+# license should accompany this distribution. THIS SOFTWARE IS PROVIDED "AS IS"
+# AND ANY AND ALL EXPRESS OR IMPLIED WARRANTIES ARE DISCLAIMED, INCLUDING, BUT
+# NOT LIMITED TO, THE IMPLIED WARRANTIES OF TITLE, MERCHANTABILITY, AGAINST
+# INFRINGEMENT, AND FITNESS FOR A PARTICULAR PURPOSE.
+#
+##############################################################################
+import os
+from shutil import rmtree
+from tempfile import mkdtemp
+
+from nose.tools import assert_not_in
+from nose.tools import assert_raises
+from nose.tools import eq_
+from nose.tools import ok_
+from paste.deploy import loadwsgi
+
+from django_pastedeploy_settings import get_configured_django_wsgi_app
+from django_pastedeploy_settings import loading
+from django_pastedeploy_settings.loading import appconfig
+from django_pastedeploy_settings.loading import install_loader_cache
+from django_pastedeploy_settings.loading import loadapp
+from django_pastedeploy_settings.loading import uninstall_loader_cache
+
+from tests.utils import BaseDjangoTestCase
+from tests.utils import get_global_conf
+
+
+_BASE_CONFIG = """\
+[DEFAULT]
+shared = base
+
+[app:base]
+use = egg:Paste#test
+option = value
+"""
+
+
+_STATIC_CONFIG = """\
+[app:static]
+use = egg:Paste#static
+document_root = %(here)s
+"""
+
+
+_COMPOSITE_CONFIG = """\
+[DEFAULT]
+shared = composite
+
+[app:app1]
+use = config:base.ini#base
+
+[app:app2]
+use = config:base.ini#base
+option = overridden
+"""
+
+
+class _BaseLoaderCacheTestCase(object):
+
+    def setup(self):
+        self.config_directory = mkdtemp()
+        self.base_config_path = \
+            self._write_config_file('base.ini', _BASE_CONFIG)
+        self.composite_config_path = \
+            self._write_config_file('composite.ini', _COMPOSITE_CONFIG)
+
+        self.parsed_file_paths = []
+        self._original_config_file_parser = loading._parse_config_file
+        loading._parse_config_file = self._parse_config_file
+
+    def teardown(self):
+        loading._parse_config_file = self._original_config_file_parser
+        uninstall_loader_cache()
+        rmtree(self.config_directory)
+
+    def _parse_config_file(self, filename):
+        self.parsed_file_paths.append(filename)
+        return self._original_config_file_parser(filename)
+
+    def _write_config_file(self, file_name, contents):
+        config_file_path = os.path.join(self.config_directory, file_name)
+        with open(config_file_path, 'w') as config_file:
+            config_file.write(contents)
+        return config_file_path
+
+
+class TestInstallation(_BaseLoaderCacheTestCase):
+
+    def test_installation(self):
+        install_loader_cache()
+
+        eq_(loading._load_config, loadwsgi._loaders['config'])
+        eq_(loading._load_egg, loadwsgi._loaders['egg'])
+
+    def test_uninstallation(self):
+        install_loader_cache()
+        appconfig('config:' + self.base_config_path, name='base')
+        uninstall_loader_cache()
+
+        ok_(loadwsgi._loaders['config'] is not loading._load_config)
+        ok_(loadwsgi._loaders['egg'] is not loading._load_egg)
+        eq_({}, loading._CONFIG_PARSERS)
+        eq_({}, loading._EGG_ENTRY_POINTS)
+
+
+class TestConfigFileCache(_BaseLoaderCacheTestCase):
+
+    def test_file_parsed_once(self):
+        config_uri = 'config:' + self.composite_config_path
+        appconfig(config_uri, name='app1')
+        appconfig(config_uri, name='app2')
+
+        eq_(
+            [self.composite_config_path, self.base_config_path],
+            self.parsed_file_paths,
+            )
+
+    def test_changed_file(self):
+        config_uri = 'config:' + self.base_config_path
+        appconfig(config_uri, name='base')
+        self._write_config_file(
+            'base.ini',
+            _BASE_CONFIG.replace('option = value', 'option = new value'),
+            )
+        app_config = appconfig(config_uri, name='base')
+
+        eq_(2, len(self.parsed_file_paths))
+        eq_('new value', app_config['option'])
+
+    def test_local_options(self):
+        config_uri = 'config:' + self.composite_config_path
+        app1_config = appconfig(config_uri, name='app1')
+        app2_config = appconfig(config_uri, name='app2')
+
+        eq_('value', app1_config.local_conf['option'])
+        eq_('overridden', app2_config.local_conf['option'])
+
+    def test_global_options(self):
+        config_uri = 'config:' + self.composite_config_path
+        app_config = appconfig(config_uri, name='app1')
+
+        eq_('composite', app_config.global_conf['shared'])
+        eq_(self.composite_config_path, app_config.global_conf['__file__'])
+        eq_(self.config_directory, app_config.global_conf['here'])
+
+    def test_global_options_not_shared(self):
+        config_uri = 'config:' + self.base_config_path
+        appconfig(config_uri, name='base', global_conf={'extra': 'value'})
+        app_config = appconfig(config_uri, name='base')
+
+        assert_not_in('extra', app_config.global_conf)
+
+    def test_relative_uri(self):
+        app_config = appconfig(
+            'config:base.ini',
+            name='base',
+            relative_to=self.config_directory,
+            )
+
+        eq_('value', app_config['option'])
+
+
+class TestConfigFileSignatureRecording(_BaseLoaderCacheTestCase):
+
+    def test_files_used(self):
+        appconfig('config:' + self.base_config_path, name='base')
+        with loading._record_config_file_signatures() as \
+                config_file_signatures:
+            appconfig('config:' + self.composite_config_path, name='app1')
+
+        eq_(
+            [self.base_config_path, self.composite_config_path],
+            sorted(config_file_signatures),
+            )
+        base_config_file_stat = os.stat(self.base_config_path)
+        eq_(
+            (base_config_file_stat.st_mtime, base_config_file_stat.st_size),
+            config_file_signatures[self.base_config_path],
+            )
+
+    def test_other_files_cached(self):
+        appconfig('config:' + self.composite_config_path, name='app1')
+        with loading._record_config_file_signatures() as \
+                config_file_signatures:
+            appconfig('config:' + self.base_config_path, name='base')
+
+        eq_([self.base_config_path], list(config_file_signatures))
+
+    def test_missing_file(self):
+        missing_config_path = \
+            os.path.join(self.config_directory, 'missing.ini')
+        install_loader_cache()
+        with loading._record_config_file_signatures() as \
+                config_file_signatures:
+            assert_raises(
+                OSError,
+                appconfig,
+                'config:' + missing_config_path,
+                )
+
+        eq_({missing_config_path: None}, config_file_signatures)
+
+    def test_outside_recording(self):
+        with loading._record_config_file_signatures() as \
+                config_file_signatures:
+            pass
+        appconfig('config:' + self.base_config_path, name='base')
+
+        eq_({}, config_file_signatures)
+
+
+class TestEntryPointCache(_BaseLoaderCacheTestCase):
+
+    def test_entry_point_reused(self):
+        config_file_path = \
+            self._write_config_file('static.ini', _STATIC_CONFIG)
+        config_uri = 'config:' + config_file_path
+        app1 = loadapp(config_uri, name='static')
+        app2 = loadapp(config_uri, name='static')
+
+        eq_(1, len(loading._EGG_ENTRY_POINTS))
+        ok_(app1 is not app2)
+
+
+class TestFactoryIntegration(BaseDjangoTestCase):
+
+    def test_cache_not_installed_by_default(self):
+        get_configured_django_wsgi_app(get_global_conf('settings5'))
+
+        ok_(loadwsgi._loaders['config'] is not loading._load_config)
+
+    def test_cache_installed(self):
+        global_conf = get_global_conf(
+            'settings5',
+            django_config_loader_cache='true',
+            )
+        get_configured_django_wsgi_app(global_conf)
+
+        eq_(loading._load_config, loadwsgi._loaders['config'])
+
+    def test_cache_disabled(self):
+        global_conf = get_global_conf(
+            'settings5',
+            django_config_loader_cache='false',
+            )
+        get_configured_django_wsgi_app(global_conf)
+
+        ok_(loadwsgi._loaders['config'] is not loading._load_config)
@@ -0,0 +1,246 @@
+##############################################################################
+#
+# Copyright (c) 2016, 2degrees Limited.
+# All Rights Reserved.
+#
+# This file is part of django-pastedeploy-settings
+# <https://github.com/2degrees/django-pastedeploy-settings>, which is subject
+# to the provisions of the BSD at
+# <http://dev.2degreesnetwork.com/p/2degrees-license.html>. A copy of the
+# license should accompany this distribution. THIS SOFTWARE IS PROVIDED "AS IS"
+# AND ANY AND ALL EXPRESS OR IMPLIED WARRANTIES ARE DISCLAIMED, INCLUDING, BUT
+# NOT LIMITED TO, THE IMPLIED WARRANTIES OF TITLE, MERCHANTABILITY, AGAINST
+# INFRINGEMENT, AND FITNESS FOR A PARTICULAR PURPOSE.
+#
+##############################################################################
+from contextlib import contextmanager
+import os
+from shutil import rmtree
+import sys
+from tempfile import mkdtemp
+
+try:
+    from StringIO import StringIO
+except ImportError:
+    from io import StringIO
+
+import django
+import django.conf
+from django.core import management
+from paste.deploy import loadwsgi
+from nose.tools import assert_in
+from nose.tools import assert_not_in
+from nose.tools import assert_raises
+from nose.tools import eq_
+from nose.tools import ok_
+
+import django_pastedeploy_settings
+from django_pastedeploy_settings import loading
+from django_pastedeploy_settings.management import call_management_commands
+from django_pastedeploy_settings.management import main
+from django_pastedeploy_settings.management import set_up_django
+
+from tests.utils import BaseDjangoTestCase
+
+
+_CONFIG = """\
+[DEFAULT]
+debug = true
+django_settings_module = tests.mock_django_settings.empty_module2
+
+[app:main]
+paste.app_factory = django_pastedeploy_settings:get_configured_django_wsgi_app
+SECRET_KEY = "secret"
+FEATURE_FLAG = true
+
+[app:other]
+use = main
+FEATURE_FLAG = false
+"""
+
+
+class _BaseManagementTestCase(BaseDjangoTestCase):
+
+    setup_fixture = False
+
+    def setup(self):
+        super(_BaseManagementTestCase, self).setup()
+
+        self.temporary_directory_path = mkdtemp()
+        self.config_file_path = \
+            os.path.join(self.temporary_directory_path, 'config.ini')
+        with open(self.config_file_path, 'w') as config_file:
+            config_file.write(_CONFIG)
+        self.config_uri = 'config:' + self.config_file_path
+
+        # The settings object is imported by the management package, so it
+        # would otherwise be the one left by a previous test
+        self.original_management_settings = management.settings
+        management.settings = django.conf.settings
+
+    def teardown(self):
+        management.settings = self.original_management_settings
+        rmtree(self.temporary_directory_path)
+
+        super(_BaseManagementTestCase, self).teardown()
+
+
+class TestDjangoSetUp(_BaseManagementTestCase):
+
+    def test_settings(self):
+        set_up_django(self.config_uri)
+
+        from tests.mock_django_settings import empty_module2
+
+        eq_(True, empty_module2.FEATURE_FLAG)
+        eq_(
+            'tests.mock_django_settings.empty_module2',
+            os.environ['DJANGO_SETTINGS_MODULE'],
+            )
+
+    def test_application_name(self):
+        set_up_django(self.config_uri, name='other')
+
+        from tests.mock_django_settings import empty_module2
+
+        eq_(False, empty_module2.FEATURE_FLAG)
+
+    def test_config_file_path(self):
+        original_working_directory_path = os.getcwd()
+        os.chdir(self.temporary_directory_path)
+        try:
+            set_up_django('config.ini')
+        finally:
+            os.chdir(original_working_directory_path)
+
+        from tests.mock_django_settings import empty_module2
+
+        eq_(True, empty_module2.FEATURE_FLAG)
+
+    def test_django_set_up(self):
+        with _record_django_set_ups() as django_set_up_count:
+            set_up_django(self.config_uri)
+
+        eq_(1, len(django_set_up_count))
+
+    def test_loader_cache_not_installed(self):
+        set_up_django(self.config_uri)
+
+        ok_(loadwsgi._loaders['config'] is not loading._load_config)
+
+    def test_wsgi_application_not_built(self):
+        original_get_django_wsgi_app = \
+            django_pastedeploy_settings._get_django_wsgi_app
+        django_pastedeploy_settings._get_django_wsgi_app = _fail
+        try:
+            set_up_django(self.config_uri)
+        finally:
+            django_pastedeploy_settings._get_django_wsgi_app = \
+                original_get_django_wsgi_app
+
+
+class TestManagementCommands(_BaseManagementTestCase):
+
+    def test_single_command(self):
+        with _capture_output() as (stdout, stderr):
+            exit_status = \
+                call_management_commands(self.config_uri, [['version']])
+
+        eq_(0, exit_status)
+        eq_(django.get_version() + '\n', stdout.getvalue())
+
+    def test_multiple_commands(self):
+        commands = [['version'], ['check']]
+        with _capture_output() as (stdout, stderr):
+            exit_status = call_management_commands(self.config_uri, commands)
+
+        eq_(0, exit_status)
+        assert_in(django.get_version() + '\n', stdout.getvalue())
+        assert_in('System check identified no issues', stdout.getvalue())
+
+    def test_failing_command(self):
+        commands = [['check', '--tag', 'non-existing'], ['version']]
+        with _capture_output() as (stdout, stderr):
+            exit_status = call_management_commands(self.config_uri, commands)
+
+        eq_(1, exit_status)
+        assert_in('non-existing', stderr.getvalue())
+        assert_not_in(django.get_version(), stdout.getvalue())
+
+    def test_unknown_command(self):
+        with _capture_output() as (stdout, stderr):
+            exit_status = \
+                call_management_commands(self.config_uri, [['non-existing']])
+
+        eq_(1, exit_status)
+        assert_in('Unknown command', stderr.getvalue())
+
+
+class TestCommandLineInterface(_BaseManagementTestCase):
+
+    def test_command_arguments(self):
+        with _capture_output() as (stdout, stderr):
+            exit_status = main([self.config_file_path, 'check', '--deploy'])
+
+        eq_(0, exit_status)
+        assert_in('System check identified', stderr.getvalue())
+
+    def test_command_options(self):
+        with _capture_output() as (stdout, stderr):
+            exit_status = main([
+                '-c',
+                'version',
+                '--command',
+                'check --tag non-existing',
+                self.config_file_path,
+                ])
+
+        eq_(1, exit_status)
+        assert_in(django.get_version(), stdout.getvalue())
+        assert_in('non-existing', stderr.getvalue())
+
+    def test_application_name(self):
+        with _capture_output():
+            main(['--app-name', 'other', self.config_file_path, 'version'])
+
+        from tests.mock_django_settings import empty_module2
+
+        eq_(False, empty_module2.FEATURE_FLAG)
+
+    def test_no_command(self):
+        with _capture_output():
+            with assert_raises(SystemExit):
+                main([self.config_file_path])
+
+
+def _fail():
+    raise AssertionError('The WSGI application should not be built')
+
+
+@contextmanager
+def _record_django_set_ups():
+    django_set_up_count = []
+    original_set_up = django.setup
+
+    def set_up(*args, **kwargs):
+        django_set_up_count.append(True)
+        return original_set_up(*args, **kwargs)
+
+    django.setup = set_up
+    try:
+        yield django_set_up_count
+    finally:
+        django.setup = original_set_up
+
+
+@contextmanager
+def _capture_output():
+    original_stdout = sys.stdout
+    original_stderr = sys.stderr
+    sys.stdout = StringIO()
+    sys.stderr = StringIO()
+    try:
+        yield sys.stdout, sys.stderr
+    finally:
+        sys.stdout = original_stdout
+        sys.stderr = original_stderr
@@ -0,0 +1,968 @@
+##############################################################################
+#
+# Copyright (c) 2016, 2degrees Limited.
+# All Rights Reserved.
+#
+# This file is part of django-pastedeploy-settings
+# <https://github.com/2degrees/django-pastedeploy-settings>, which is subject
+# to the provisions of the BSD at
+# <http://dev.2degreesnetwork.com/p/2degrees-license.html>. A copy of the
+# license should accompany this distribution. THIS SOFTWARE IS PROVIDED "AS IS"
+# AND ANY AND ALL EXPRESS OR IMPLIED WARRANTIES ARE DISCLAIMED, INCLUDING, BUT
+# NOT LIMITED TO, THE IMPLIED WARRANTIES OF TITLE, MERCHANTABILITY, AGAINST
+# INFRINGEMENT, AND FITNESS FOR A PARTICULAR PURPOSE.
+#
+##############################################################################
+from binascii import hexlify
+from contextlib import contextmanager
+from gzip import GzipFile
+from io import BytesIO
+import json
+import os
+from shutil import rmtree
+from tempfile import mkdtemp
+import time
+
+from nose.tools import assert_in
+from nose.tools import assert_not_in
+from nose.tools import assert_raises_regexp
+from nose.tools import eq_
+from nose.tools import ok_
+from paste.urlmap import URLMap
+from paste.urlparser import StaticURLParser
+
+from django_pastedeploy_settings import get_configured_django_wsgi_app
+from django_pastedeploy_settings import media as media_module
+from django_pastedeploy_settings.compression import compress
+from django_pastedeploy_settings.dispatching import PrefixDispatcher
+from django_pastedeploy_settings.factories import add_media_to_app
+from django_pastedeploy_settings.media import StaticMediaApplication
+
+from tests.utils import BaseDjangoTestCase
+from tests.utils import get_global_conf
+from tests.utils import get_local_conf
+
+
+_FILE_CONTENTS = b'body { color: red; }\n'
+
+
+class _BaseMediaTestCase(object):
+
+    def setup(self):
+        self.media_directory = mkdtemp()
+        self.file_path = _write_file(self.media_directory, 'style.css')
+
+    def teardown(self):
+        rmtree(self.media_directory)
+
+
+class TestStaticMediaApplication(_BaseMediaTestCase):
+
+    def setup(self):
+        super(TestStaticMediaApplication, self).setup()
+
+        self.app = StaticMediaApplication(self.media_directory)
+
+    def test_file(self):
+        response = _make_request(self.app, '/style.css')
+
+        eq_('200 OK', response.status)
+        eq_(_FILE_CONTENTS, response.body)
+        eq_('text/css', response.headers['Content-Type'])
+        eq_(str(len(_FILE_CONTENTS)), response.headers['Content-Length'])
+        assert_in('ETag', response.headers)
+        assert_in('Last-Modified', response.headers)
+        assert_not_in('Cache-Control', response.headers)
+
+    def test_file_in_subdirectory(self):
+        _write_file(os.path.join(self.media_directory, 'css'), 'site.css')
+
+        response = _make_request(self.app, '/css/site.css')
+
+        eq_('200 OK', response.status)
+
+    def test_head_request(self):
+        response = _make_request(self.app, '/style.css', method='HEAD')
+
+        eq_('200 OK', response.status)
+        eq_(b'', response.body)
+        eq_(str(len(_FILE_CONTENTS)), response.headers['Content-Length'])
+
+    def test_unsupported_method(self):
+        response = _make_request(self.app, '/style.css', method='POST')
+
+        eq_('405 Method Not Allowed', response.status)
+        eq_('GET, HEAD', response.headers['Allow'])
+
+    def test_missing_file(self):
+        response = _make_request(self.app, '/missing.css')
+
+        eq_('404 Not Found', response.status)
+
+    def test_directory(self):
+        os.mkdir(os.path.join(self.media_directory, 'css'))
+
+        eq_('404 Not Found', _make_request(self.app, '/css').status)
+        eq_('404 Not Found', _make_request(self.app, '/').status)
+
+    def test_path_traversal(self):
+        sub_directory = os.path.join(self.media_directory, 'sub')
+        os.mkdir(sub_directory)
+        app = StaticMediaApplication(sub_directory)
+
+        response = _make_request(app, '/../style.css')
+
+        eq_('404 Not Found', response.status)
+
+    def test_file_wrapper(self):
+        wrapped_files = []
+
+        def file_wrapper(file_, block_size):
+            wrapped_files.append(file_)
+            return iter(lambda: file_.read(block_size), b'')
+
+        response = _make_request(
+            self.app,
+            '/style.css',
+            **{'wsgi.file_wrapper': file_wrapper}
+            )
+
+        eq_(_FILE_CONTENTS, response.body)
+        eq_(1, len(wrapped_files))
+
+    def test_changed_file(self):
+        etag = _make_request(self.app, '/style.css').headers['ETag']
+        _write_file(self.media_directory, 'style.css', b'new contents')
+
+        response = _make_request(self.app, '/style.css')
+
+        eq_(b'new contents', response.body)
+        ok_(etag != response.headers['ETag'])
+
+    def test_etag_of_copy(self):
+        """The ETag of a file doesn't depend on where it's stored."""
+        other_media_directory = mkdtemp()
+        try:
+            other_file_path = _write_file(other_media_directory, 'style.css')
+            # Whole seconds are set, as fractions may be rounded differently
+            modification_time = int(time.time())
+            for file_path in (self.file_path, other_file_path):
+                os.utime(file_path, (modification_time, modification_time))
+            other_app = StaticMediaApplication(other_media_directory)
+
+            other_response = _make_request(other_app, '/style.css')
+        finally:
+            rmtree(other_media_directory)
+
+        response = _make_request(self.app, '/style.css')
+        eq_(response.headers['ETag'], other_response.headers['ETag'])
+
+    def test_cache_max_age(self):
+        app = StaticMediaApplication(self.media_directory, cache_max_age=60)
+
+        response = _make_request(app, '/style.css')
+
+        eq_('public, max-age=60', response.headers['Cache-Control'])
+
+    def test_hashed_file_name(self):
+        _write_file(self.media_directory, 'style.0123456789ab.css')
+        app = StaticMediaApplication(
+            self.media_directory,
+            hashed_file_max_age=31536000,
+            )
+
+        response = _make_request(app, '/style.0123456789ab.css')
+
+        eq_(
+            'public, max-age=31536000, immutable',
+            response.headers['Cache-Control'],
+            )
+
+    def test_hashed_file_name_without_max_age(self):
+        _write_file(self.media_directory, 'style.0123456789ab.css')
+
+        response = _make_request(self.app, '/style.0123456789ab.css')
+
+        assert_not_in('Cache-Control', response.headers)
+
+    def test_name_with_other_number(self):
+        _write_file(self.media_directory, 'invoice.12345678.css')
+        app = StaticMediaApplication(
+            self.media_directory,
+            cache_max_age=60,
+            hashed_file_max_age=31536000,
+            )
+
+        response = _make_request(app, '/invoice.12345678.css')
+
+        eq_('public, max-age=60', response.headers['Cache-Control'])
+
+
+class TestStaticFileIndex(_BaseMediaTestCase):
+
+    def setup(self):
+        super(TestStaticFileIndex, self).setup()
+
+        self.app = StaticMediaApplication(self.media_directory, index=True)
+
+    def test_indexed_file(self):
+        response = _make_request(self.app, '/style.css')
+
+        eq_('200 OK', response.status)
+        eq_(_FILE_CONTENTS, response.body)
+
+    def test_file_in_subdirectory(self):
+        _write_file(os.path.join(self.media_directory, 'css'), 'site.css')
+        app = StaticMediaApplication(self.media_directory, index=True)
+
+        eq_('200 OK', _make_request(app, '/css/site.css').status)
+
+    def test_no_file_system_access(self):
+        stat_file_paths = []
+        original_stat = os.stat
+
+        def stat(file_path):
+            stat_file_paths.append(file_path)
+            return original_stat(file_path)
+
+        os.stat = stat
+        try:
+            head_response = \
+                _make_request(self.app, '/style.css', method='HEAD')
+            missing_file_response = _make_request(self.app, '/missing.css')
+        finally:
+            os.stat = original_stat
+
+        eq_('200 OK', head_response.status)
+        eq_('404 Not Found', missing_file_response.status)
+        eq_([], stat_file_paths)
+
+    def test_refresh(self):
+        _write_file(self.media_directory, 'new.css')
+        os.remove(self.file_path)
+
+        eq_('404 Not Found', _make_request(self.app, '/new.css').status)
+
+        self.app.file_index.refresh()
+
+        eq_('200 OK', _make_request(self.app, '/new.css').status)
+        eq_('404 Not Found', _make_request(self.app, '/style.css').status)
+
+    def test_unchanged_file_on_refresh(self):
+        file_record = self.app.file_index.get_file_record('style.css')
+        self.app.file_index.refresh()
+
+        ok_(file_record is self.app.file_index.get_file_record('style.css'))
+
+    def test_ttl(self):
+        app = StaticMediaApplication(
+            self.media_directory,
+            index=True,
+            index_ttl=0,
+            )
+        _write_file(self.media_directory, 'new.css')
+
+        _make_request(app, '/new.css')
+        _wait_for(lambda: app.file_index.get_file_record('new.css'))
+
+        eq_('200 OK', _make_request(app, '/new.css').status)
+
+    def test_precompressed_variants(self):
+        _write_file(self.media_directory, 'style.css.gz')
+        app = StaticMediaApplication(self.media_directory, index=True)
+
+        file_record = app.file_index.get_file_record('style.css')
+
+        eq_(
+            {'gzip': self.file_path + '.gz'},
+            file_record.precompressed_file_paths,
+            )
+
+
+class TestStaticFileIndexManifest(_BaseMediaTestCase):
+
+    def setup(self):
+        super(TestStaticFileIndexManifest, self).setup()
+
+        _write_file(self.media_directory, 'style.0123456789ab.css')
+        _write_file(self.media_directory, 'unlisted.css')
+        manifest = {
+            'paths': {
+                'style.css': 'style.0123456789ab.css',
+                'missing.css': 'missing.0123456789ab.css',
+                },
+            'version': '1.0',
+            }
+        _write_file(
+            self.media_directory,
+            'staticfiles.json',
+            json.dumps(manifest).encode('utf-8'),
+            )
+
+        self.app = StaticMediaApplication(
+            self.media_directory,
+            index_manifest='staticfiles.json',
+            )
+
+    def test_listed_files(self):
+        eq_('200 OK', _make_request(self.app, '/style.css').status)
+        eq_(
+            '200 OK',
+            _make_request(self.app, '/style.0123456789ab.css').status,
+            )
+
+    def test_unlisted_file(self):
+        eq_('404 Not Found', _make_request(self.app, '/unlisted.css').status)
+
+    def test_missing_listed_file(self):
+        eq_('404 Not Found', _make_request(self.app, '/missing.css').status)
+
+    def test_files_recorded_on_first_access(self):
+        eq_(None, self.app.file_index._file_records['style.css'])
+
+        _make_request(self.app, '/style.css')
+
+        ok_(self.app.file_index._file_records['style.css'])
+
+
+class TestResponseCache(_BaseMediaTestCase):
+
+    def setup(self):
+        super(TestResponseCache, self).setup()
+
+        self.app = StaticMediaApplication(
+            self.media_directory,
+            response_cache_size=len(_FILE_CONTENTS) * 2,
+            )
+
+    def test_disabled_by_default(self):
+        app = StaticMediaApplication(self.media_directory)
+
+        eq_(None, app.response_cache)
+
+    def test_cached_file(self):
+        _make_request(self.app, '/style.css')
+
+        opened_file_paths = []
+        with _track_opened_files(opened_file_paths):
+            response = _make_request(self.app, '/style.css')
+
+        eq_('200 OK', response.status)
+        eq_(_FILE_CONTENTS, response.body)
+        eq_(
+            str(len(_FILE_CONTENTS)),
+            response.headers['Content-Length'],
+            )
+        eq_([], opened_file_paths)
+
+    def test_cached_file_in_index(self):
+        app = StaticMediaApplication(
+            self.media_directory,
+            index=True,
+            response_cache_size=1024,
+            )
+        _make_request(app, '/style.css')
+
+        stat_file_paths = []
+        opened_file_paths = []
+        original_stat = os.stat
+
+        def stat(file_path):
+            stat_file_paths.append(file_path)
+            return original_stat(file_path)
+
+        os.stat = stat
+        try:
+            with _track_opened_files(opened_file_paths):
+                response = _make_request(app, '/style.css')
+        finally:
+            os.stat = original_stat
+
+        eq_(_FILE_CONTENTS, response.body)
+        eq_([], stat_file_paths)
+        eq_([], opened_file_paths)
+
+    def test_range_of_cached_file(self):
+        _make_request(self.app, '/style.css')
+
+        response = _make_request(self.app, '/style.css', HTTP_RANGE='bytes=0-3')
+
+        eq_('206 Partial Content', response.status)
+        eq_(_FILE_CONTENTS[:4], response.body)
+
+    def test_changed_file(self):
+        _make_request(self.app, '/style.css')
+        _write_file(self.media_directory, 'style.css', b'new contents')
+
+        response = _make_request(self.app, '/style.css')
+
+        eq_(b'new contents', response.body)
+        eq_(len(b'new contents'), self.app.response_cache.size)
+
+    def test_large_file(self):
+        large_file_contents = _FILE_CONTENTS * 3
+        _write_file(self.media_directory, 'large.css', large_file_contents)
+
+        response = _make_request(self.app, '/large.css')
+
+        eq_(large_file_contents, response.body)
+        eq_(0, len(self.app.response_cache))
+
+    def test_max_file_size(self):
+        app = StaticMediaApplication(
+            self.media_directory,
+            response_cache_size=1024,
+            response_cache_max_file_size=len(_FILE_CONTENTS) - 1,
+            )
+
+        _make_request(app, '/style.css')
+
+        eq_(0, len(app.response_cache))
+
+    def test_least_recently_used_file_evicted(self):
+        _write_file(self.media_directory, 'first.css')
+        _write_file(self.media_directory, 'second.css')
+
+        _make_request(self.app, '/first.css')
+        _make_request(self.app, '/style.css')
+        _make_request(self.app, '/first.css')
+        _make_request(self.app, '/second.css')
+
+        opened_file_paths = []
+        with _track_opened_files(opened_file_paths):
+            _make_request(self.app, '/first.css')
+            _make_request(self.app, '/style.css')
+
+        eq_([self.file_path], opened_file_paths)
+        eq_(len(_FILE_CONTENTS) * 2, self.app.response_cache.size)
+
+    def test_head_request(self):
+        _make_request(self.app, '/style.css', method='HEAD')
+
+        eq_(0, len(self.app.response_cache))
+
+
+class TestContentEncoding(_BaseMediaTestCase):
+
+    def setup(self):
+        super(TestContentEncoding, self).setup()
+
+        self.compressible_file_contents = _FILE_CONTENTS * 20
+        self.compressible_file_path = _write_file(
+            self.media_directory,
+            'site.css',
+            self.compressible_file_contents,
+            )
+        self.app = StaticMediaApplication(self.media_directory)
+
+    def test_precompressed_variant(self):
+        compressed_file_contents = compress(_FILE_CONTENTS)
+        _write_file(
+            self.media_directory,
+            'style.css.gz',
+            compressed_file_contents,
+            )
+
+        response = _make_request(
+            self.app,
+            '/style.css',
+            HTTP_ACCEPT_ENCODING='gzip, deflate',
+            )
+
+        eq_('200 OK', response.status)
+        eq_(compressed_file_contents, response.body)
+        eq_('gzip', response.headers['Content-Encoding'])
+        eq_('text/css', response.headers['Content-Type'])
+        eq_('Accept-Encoding', response.headers['Vary'])
+        eq_(
+            str(len(compressed_file_contents)),
+            response.headers['Content-Length'],
+            )
+
+    def test_preferred_precompressed_variant(self):
+        _write_file(self.media_directory, 'style.css.gz', b'gzip')
+        _write_file(self.media_directory, 'style.css.br', b'brotli')
+
+        response = _make_request(
+            self.app,
+            '/style.css',
+            HTTP_ACCEPT_ENCODING='gzip, br',
+            )
+
+        eq_('br', response.headers['Content-Encoding'])
+        eq_(b'brotli', response.body)
+
+    def test_precompressed_variant_not_accepted(self):
+        _write_file(self.media_directory, 'style.css.gz', b'gzip')
+
+        response = _make_request(self.app, '/style.css')
+
+        eq_(_FILE_CONTENTS, response.body)
+        assert_not_in('Content-Encoding', response.headers)
+        eq_('Accept-Encoding', response.headers['Vary'])
+
+    def test_rejected_content_encoding(self):
+        _write_file(self.media_directory, 'style.css.gz', b'gzip')
+
+        response = _make_request(
+            self.app,
+            '/style.css',
+            HTTP_ACCEPT_ENCODING='*, gzip;q=0',
+            )
+
+        eq_(_FILE_CONTENTS, response.body)
+
+    def test_outdated_precompressed_variant(self):
+        compressed_file_path = _write_file(
+            self.media_directory,
+            'style.css.gz',
+            b'gzip',
+            )
+        _make_file_older(compressed_file_path, self.file_path)
+
+        response = _make_request(
+            self.app,
+            '/style.css',
+            HTTP_ACCEPT_ENCODING='gzip',
+            )
+
+        eq_(_FILE_CONTENTS, response.body)
+        assert_not_in('Content-Encoding', response.headers)
+
+    def test_outdated_precompressed_variant_in_index(self):
+        compressed_file_path = _write_file(
+            self.media_directory,
+            'style.css.gz',
+            b'gzip',
+            )
+        _make_file_older(compressed_file_path, self.file_path)
+        app = StaticMediaApplication(self.media_directory, index=True)
+
+        response = _make_request(
+            app,
+            '/style.css',
+            HTTP_ACCEPT_ENCODING='gzip',
+            )
+
+        eq_(_FILE_CONTENTS, response.body)
+
+    def test_precompressed_variant_etag(self):
+        _write_file(self.media_directory, 'style.css.gz', b'gzip')
+        uncompressed_response = _make_request(self.app, '/style.css')
+
+        compressed_response = _make_request(
+            self.app,
+            '/style.css',
+            HTTP_ACCEPT_ENCODING='gzip',
+            HTTP_IF_NONE_MATCH=uncompressed_response.headers['ETag'],
+            )
+
+        eq_('200 OK', compressed_response.status)
+
+    def test_file_without_variants(self):
+        response = _make_request(
+            self.app,
+            '/site.css',
+            HTTP_ACCEPT_ENCODING='gzip',
+            )
+
+        eq_(self.compressible_file_contents, response.body)
+        assert_not_in('Vary', response.headers)
+
+    def test_compression(self):
+        app = StaticMediaApplication(self.media_directory, compress=True)
+
+        response = _make_request(app, '/site.css', HTTP_ACCEPT_ENCODING='gzip')
+
+        eq_('gzip', response.headers['Content-Encoding'])
+        eq_('Accept-Encoding', response.headers['Vary'])
+        eq_(self.compressible_file_contents, _decompress(response.body))
+        eq_(str(len(response.body)), response.headers['Content-Length'])
+
+    def test_compression_not_accepted(self):
+        app = StaticMediaApplication(self.media_directory, compress=True)
+
+        response = _make_request(app, '/site.css')
+
+        eq_(self.compressible_file_contents, response.body)
+        eq_('Accept-Encoding', response.headers['Vary'])
+
+    def test_compressed_file_cached(self):
+        app = StaticMediaApplication(self.media_directory, compress=True)
+        _make_request(app, '/site.css', HTTP_ACCEPT_ENCODING='gzip')
+
+        opened_file_paths = []
+        with _track_opened_files(opened_file_paths):
+            response = \
+                _make_request(app, '/site.css', HTTP_ACCEPT_ENCODING='gzip')
+
+        eq_(self.compressible_file_contents, _decompress(response.body))
+        eq_([], opened_file_paths)
+        eq_(1, len(app.compression_cache))
+
+    def test_compressed_file_changed(self):
+        app = StaticMediaApplication(self.media_directory, compress=True)
+        _make_request(app, '/site.css', HTTP_ACCEPT_ENCODING='gzip')
+        new_file_contents = _FILE_CONTENTS * 30
+        _write_file(self.media_directory, 'site.css', new_file_contents)
+
+        response = \
+            _make_request(app, '/site.css', HTTP_ACCEPT_ENCODING='gzip')
+
+        eq_(new_file_contents, _decompress(response.body))
+
+    def test_compression_cache_size(self):
+        # Hexadecimal digits are only compressed by about half
+        file_contents = hexlify(os.urandom(300))
+        _write_file(self.media_directory, 'first.css', file_contents)
+        _write_file(self.media_directory, 'second.css', file_contents)
+        app = StaticMediaApplication(
+            self.media_directory,
+            compress=True,
+            compression_cache_size=len(file_contents),
+            )
+
+        _make_request(app, '/first.css', HTTP_ACCEPT_ENCODING='gzip')
+        _make_request(app, '/second.css', HTTP_ACCEPT_ENCODING='gzip')
+
+        eq_(1, len(app.compression_cache))
+        ok_(app.compression_cache.size <= len(file_contents))
+
+    def test_small_file_not_compressed(self):
+        app = StaticMediaApplication(self.media_directory, compress=True)
+
+        response = \
+            _make_request(app, '/style.css', HTTP_ACCEPT_ENCODING='gzip')
+
+        eq_(_FILE_CONTENTS, response.body)
+        assert_not_in('Vary', response.headers)
+
+    def test_incompressible_content_type(self):
+        _write_file(self.media_directory, 'image.png', _FILE_CONTENTS * 20)
+        app = StaticMediaApplication(self.media_directory, compress=True)
+
+        response = \
+            _make_request(app, '/image.png', HTTP_ACCEPT_ENCODING='gzip')
+
+        assert_not_in('Content-Encoding', response.headers)
+
+    def test_range_of_compressed_file(self):
+        app = StaticMediaApplication(self.media_directory, compress=True)
+        compressed_file_contents = _make_request(
+            app,
+            '/site.css',
+            HTTP_ACCEPT_ENCODING='gzip',
+            ).body
+
+        response = _make_request(
+            app,
+            '/site.css',
+            HTTP_ACCEPT_ENCODING='gzip',
+            HTTP_RANGE='bytes=0-9',
+            )
+
+        eq_('206 Partial Content', response.status)
+        eq_(compressed_file_contents[:10], response.body)
+
+
+class TestConditionalRequests(_BaseMediaTestCase):
+
+    def setup(self):
+        super(TestConditionalRequests, self).setup()
+
+        self.app = StaticMediaApplication(self.media_directory)
+        response = _make_request(self.app, '/style.css')
+        self.etag = response.headers['ETag']
+        self.last_modified = response.headers['Last-Modified']
+
+    def test_matching_etag(self):
+        response = _make_request(
+            self.app,
+            '/style.css',
+            HTTP_IF_NONE_MATCH='"other", ' + self.etag,
+            )
+
+        eq_('304 Not Modified', response.status)
+        eq_(b'', response.body)
+        eq_(self.etag, response.headers['ETag'])
+
+    def test_non_matching_etag(self):
+        response = _make_request(
+            self.app,
+            '/style.css',
+            HTTP_IF_NONE_MATCH='"other"',
+            HTTP_IF_MODIFIED_SINCE=self.last_modified,
+            )
+
+        eq_('200 OK', response.status)
+
+    def test_not_modified_since(self):
+        response = _make_request(
+            self.app,
+            '/style.css',
+            HTTP_IF_MODIFIED_SINCE=self.last_modified,
+            )
+
+        eq_('304 Not Modified', response.status)
+
+    def test_modified_since(self):
+        response = _make_request(
+            self.app,
+            '/style.css',
+            HTTP_IF_MODIFIED_SINCE='Thu, 01 Jan 1970 00:00:00 GMT',
+            )
+
+        eq_('200 OK', response.status)
+
+
+class TestByteRanges(_BaseMediaTestCase):
+
+    def setup(self):
+        super(TestByteRanges, self).setup()
+
+        self.app = StaticMediaApplication(self.media_directory)
+
+    def test_range(self):
+        response = _make_request(self.app, '/style.css', HTTP_RANGE='bytes=0-3')
+
+        eq_('206 Partial Content', response.status)
+        eq_(b'body', response.body)
+        eq_('4', response.headers['Content-Length'])
+        eq_(
+            'bytes 0-3/%d' % len(_FILE_CONTENTS),
+            response.headers['Content-Range'],
+            )
+
+    def test_open_ended_range(self):
+        response = _make_request(self.app, '/style.css', HTTP_RANGE='bytes=5-')
+
+        eq_(_FILE_CONTENTS[5:], response.body)
+
+    def test_suffix_range(self):
+        response = _make_request(self.app, '/style.css', HTTP_RANGE='bytes=-2')
+
+        eq_(_FILE_CONTENTS[-2:], response.body)
+
+    def test_range_beyond_end(self):
+        response = \
+            _make_request(self.app, '/style.css', HTTP_RANGE='bytes=5-1000')
+
+        eq_(_FILE_CONTENTS[5:], response.body)
+
+    def test_unsatisfiable_range(self):
+        response = \
+            _make_request(self.app, '/style.css', HTTP_RANGE='bytes=1000-')
+
+        eq_('416 Requested Range Not Satisfiable', response.status)
+        eq_(
+            'bytes */%d' % len(_FILE_CONTENTS),
+            response.headers['Content-Range'],
+            )
+
+    def test_multiple_ranges(self):
+        response = \
+            _make_request(self.app, '/style.css', HTTP_RANGE='bytes=0-1,3-4')
+
+        eq_('200 OK', response.status)
+        eq_(_FILE_CONTENTS, response.body)
+
+    def test_matching_if_range(self):
+        etag = _make_request(self.app, '/style.css').headers['ETag']
+
+        response = _make_request(
+            self.app,
+            '/style.css',
+            HTTP_RANGE='bytes=0-3',
+            HTTP_IF_RANGE=etag,
+            )
+
+        eq_('206 Partial Content', response.status)
+
+    def test_non_matching_if_range(self):
+        response = _make_request(
+            self.app,
+            '/style.css',
+            HTTP_RANGE='bytes=0-3',
+            HTTP_IF_RANGE='"other"',
+            )
+
+        eq_('200 OK', response.status)
+        eq_(_FILE_CONTENTS, response.body)
+
+
+class TestMediaMounting(BaseDjangoTestCase, _BaseMediaTestCase):
+
+    setup_fixture = False
+
+    def setup(self):
+        BaseDjangoTestCase.setup(self)
+        _BaseMediaTestCase.setup(self)
+
+        local_conf = get_local_conf(
+            MEDIA_URL='/media',
+            MEDIA_ROOT=self.media_directory,
+            ADMIN_MEDIA_PREFIX='/admin-media',
+            )
+        self.django_app = get_configured_django_wsgi_app(
+            get_global_conf('empty_module2'),
+            **local_conf
+            )
+
+    def teardown(self):
+        _BaseMediaTestCase.teardown(self)
+        BaseDjangoTestCase.teardown(self)
+
+    def test_default_media_server(self):
+        app = add_media_to_app(self.django_app)
+
+        ok_(isinstance(app['/media'], StaticURLParser))
+        ok_(isinstance(app['/admin-media'], StaticURLParser))
+
+    def test_builtin_media_server(self):
+        app = add_media_to_app(self.django_app, 'builtin')
+
+        ok_(isinstance(app['/media'], StaticMediaApplication))
+        ok_(isinstance(app['/admin-media'], StaticMediaApplication))
+
+    def test_default_dispatcher(self):
+        app = add_media_to_app(self.django_app)
+
+        ok_(isinstance(app, URLMap))
+        ok_(app['/'] is self.django_app)
+
+    def test_prefix_dispatcher(self):
+        app = add_media_to_app(self.django_app, dispatcher='prefix')
+
+        ok_(isinstance(app, PrefixDispatcher))
+        ok_(app['/'] is self.django_app)
+
+    def test_unknown_dispatcher(self):
+        assert_raises_regexp(
+            ValueError,
+            "^Unknown dispatcher 'unknown'$",
+            add_media_to_app,
+            self.django_app,
+            dispatcher='unknown',
+            )
+
+    def test_unknown_media_server(self):
+        assert_raises_regexp(
+            ValueError,
+            "^Unknown media server 'unknown'$",
+            add_media_to_app,
+            self.django_app,
+            'unknown',
+            )
+
+    def test_media_app_options(self):
+        app = add_media_to_app(
+            self.django_app,
+            'builtin',
+            media_app_options={'cache_max_age': 60},
+            admin_media_app_options={'cache_max_age': 120},
+            )
+
+        eq_(60, app['/media'].cache_max_age)
+        eq_(120, app['/admin-media'].cache_max_age)
+
+    def test_response_cache_options(self):
+        app = add_media_to_app(
+            self.django_app,
+            'builtin',
+            media_app_options={'response_cache_size': 1024},
+            )
+
+        eq_(1024, app['/media'].response_cache.max_size)
+        eq_(None, app['/admin-media'].response_cache)
+
+    def test_media_request(self):
+        app = add_media_to_app(self.django_app, 'builtin', dispatcher='prefix')
+
+        response = _make_request(app, '/media/style.css')
+
+        eq_(_FILE_CONTENTS, response.body)
+
+
+class _Response(object):
+
+    def __init__(self, status, headers, body):
+        self.status = status
+        self.headers = dict(headers)
+        self.body = body
+
+
+def _make_request(app, path, method='GET', **environ_items):
+    environ = _make_environ(path, method, **environ_items)
+
+    start_response_arguments = []
+
+    def start_response(status, headers, exc_info=None):
+        start_response_arguments.extend((status, headers))
+
+    response_body = app(environ, start_response)
+    try:
+        body = b''.join(response_body)
+    finally:
+        if hasattr(response_body, 'close'):
+            response_body.close()
+
+    status, headers = start_response_arguments
+    return _Response(status, headers, body)
+
+
+def _make_environ(path, method='GET', **environ_items):
+    environ = {
+        'REQUEST_METHOD': method,
+        'SCRIPT_NAME': '',
+        'PATH_INFO': path,
+        'SERVER_NAME': 'example.com',
+        'SERVER_PORT': '80',
+        'wsgi.url_scheme': 'http',
+        }
+    environ.update(environ_items)
+    return environ
+
+
+def _write_file(directory, file_name, contents=_FILE_CONTENTS):
+    if not os.path.isdir(directory):
+        os.makedirs(directory)
+    file_path = os.path.join(directory, file_name)
+    with open(file_path, 'wb') as file_:
+        file_.write(contents)
+    return file_path
+
+
+def _make_file_older(file_path, reference_file_path):
+    reference_file_stat = os.stat(reference_file_path)
+    os.utime(
+        file_path,
+        (reference_file_stat.st_atime, reference_file_stat.st_mtime - 10),
+        )
+
+
+def _decompress(data):
+    gzip_file = GzipFile(fileobj=BytesIO(data))
+    try:
+        return gzip_file.read()
+    finally:
+        gzip_file.close()
+
+
+@contextmanager
+def _track_opened_files(opened_file_paths):
+    def open_(file_path, *args, **kwargs):
+        opened_file_paths.append(file_path)
+        return open(file_path, *args, **kwargs)
+
+    # Shadow the built-in function in the module
+    media_module.open = open_
+    try:
+        yield
+    finally:
+        del media_module.open
+
+
+def _wait_for(condition, timeout=5):
+    deadline = time.time() + timeout
+    while not condition() and time.time() < deadline:
+        time.sleep(0.01)
@@ -0,0 +1,121 @@
+##############################################################################
+#
+# Copyright (c) 2016, 2degrees Limited.
+# All Rights Reserved.
+#
+# This file is part of django-pastedeploy-settings
+# <https://github.com/2degrees/django-pastedeploy-settings>, which is subject
+# to the provisions of the BSD at
+# <http://dev.2degreesnetwork.com/p/2degrees-license.html>. A copy of the
+# license should accompany this distribution. THIS SOFTWARE IS PROVIDED "AS IS"
+# AND ANY AND ALL EXPRESS OR IMPLIED WARRANTIES ARE DISCLAIMED, INCLUDING, BUT
+# NOT LIMITED TO, THE IMPLIED WARRANTIES OF TITLE, MERCHANTABILITY, AGAINST
+# INFRINGEMENT, AND FITNESS FOR A PARTICULAR PURPOSE.
+#
+##############################################################################
+from nose.tools import assert_raises_regexp
+from nose.tools import eq_
+from nose.tools import ok_
+
+from django_pastedeploy_settings.merging import append_sequences
+from django_pastedeploy_settings.merging import \
+    get_default_merge_strategy_name
+from django_pastedeploy_settings.merging import merge_mappings
+from django_pastedeploy_settings.merging import merge_sequences_uniquely
+from django_pastedeploy_settings.merging import parse_merge_strategies
+
+
+class TestSequenceMerging(object):
+
+    def test_unique_items(self):
+        eq_((1, 2, 3, 4), merge_sequences_uniquely([1, 2], (3, 4)))
+
+    def test_duplicated_items(self):
+        eq_((3, 1, 2, 4), merge_sequences_uniquely([3, 1, 3], [2, 1, 4]))
+
+    def test_unhashable_items(self):
+        eq_(
+            ([1], {'a': 1}, 2),
+            merge_sequences_uniquely([[1], {'a': 1}], [2, [1]]),
+            )
+
+    def test_non_sequence(self):
+        eq_(NotImplemented, merge_sequences_uniquely([1], 'string'))
+
+    def test_appending(self):
+        eq_((1, 2, 2, 1), append_sequences([1, 2], [2, 1]))
+
+
+class TestMappingMerging(object):
+
+    def test_new_keys(self):
+        eq_({'a': 1, 'b': 2}, merge_mappings({'a': 1}, {'b': 2}))
+
+    def test_overridden_keys(self):
+        eq_({'a': 2}, merge_mappings({'a': 1}, {'a': 2}))
+
+    def test_nested_mappings(self):
+        existing_value = {'a': {'b': 1, 'c': 2}}
+
+        merged_value = merge_mappings(existing_value, {'a': {'c': 3}})
+
+        eq_({'a': {'b': 1, 'c': 3}}, merged_value)
+        eq_({'a': {'b': 1, 'c': 2}}, existing_value)
+
+    def test_structural_sharing(self):
+        untouched_value = {'b': 1}
+        existing_value = {'a': untouched_value, 'c': {'d': 1}}
+
+        merged_value = merge_mappings(existing_value, {'c': {'d': 2}})
+
+        ok_(merged_value['a'] is untouched_value)
+
+    def test_nested_non_mapping(self):
+        eq_({'a': [2]}, merge_mappings({'a': {'b': 1}}, {'a': [2]}))
+
+    def test_non_mapping(self):
+        eq_(NotImplemented, merge_mappings({}, []))
+
+
+class TestDefaultMergeStrategy(object):
+
+    def test_sequences(self):
+        eq_('union', get_default_merge_strategy_name([]))
+        eq_('union', get_default_merge_strategy_name(()))
+
+    def test_mapping(self):
+        eq_('merge', get_default_merge_strategy_name({}))
+
+    def test_scalar(self):
+        eq_(None, get_default_merge_strategy_name('string'))
+
+
+class TestMergeStrategiesParsing(object):
+
+    def test_empty_spec(self):
+        eq_({}, parse_merge_strategies(''))
+
+    def test_multiple_strategies(self):
+        merge_strategy_names = \
+            parse_merge_strategies('A:append\n  B:replace C:keep')
+
+        eq_(
+            {'A': 'append', 'B': 'replace', 'C': 'keep'},
+            merge_strategy_names,
+            )
+
+    def test_malformed_pair(self):
+        assert_raises_regexp(
+            ValueError,
+            r'^Merge strategy \S+ is not in the form "SETTING:strategy"$',
+            parse_merge_strategies,
+            'A',
+            )
+
+    def test_unknown_strategy(self):
+        assert_raises_regexp(
+            ValueError,
+            r"^Unknown merge strategy \S+ for setting \S+$",
+            parse_merge_strategies,
+            'A:unknown',
+            )
@@ -0,0 +1,102 @@
+##############################################################################
+#
+# Copyright (c) 2016, 2degrees Limited.
+# All Rights Reserved.
+#
+# This file is part of django-pastedeploy-settings
+# <https://github.com/2degrees/django-pastedeploy-settings>, which is subject
+# to the provisions of the BSD at
+# <http://dev.2degreesnetwork.com/p/2degrees-license.html>. A copy of the
+# license should accompany this distribution. THIS SOFTWARE IS PROVIDED "AS IS"
+# AND ANY AND ALL EXPRESS OR IMPLIED WARRANTIES ARE DISCLAIMED, INCLUDING, BUT
+# NOT LIMITED TO, THE IMPLIED WARRANTIES OF TITLE, MERCHANTABILITY, AGAINST
+# INFRINGEMENT, AND FITNESS FOR A PARTICULAR PURPOSE.
+#
+##############################################################################
+import gc
+
+from nose.tools import eq_
+from nose.tools import ok_
+
+from django_pastedeploy_settings import get_configured_django_wsgi_app
+from django_pastedeploy_settings import prefork
+
+from tests.utils import BaseDjangoTestCase
+from tests.utils import get_global_conf
+
+
+class TestPreforkOption(BaseDjangoTestCase):
+
+    setup_fixture = False
+
+    def setup(self):
+        super(TestPreforkOption, self).setup()
+
+        self.original_prepare_for_fork = prefork.prepare_for_fork
+        self.prepare_for_fork_calls = []
+        prefork.prepare_for_fork = \
+            lambda: self.prepare_for_fork_calls.append(True)
+
+    def teardown(self):
+        prefork.prepare_for_fork = self.original_prepare_for_fork
+
+        super(TestPreforkOption, self).teardown()
+
+    def test_enabled(self):
+        global_conf = get_global_conf('settings5', django_prefork='true')
+        get_configured_django_wsgi_app(global_conf)
+
+        eq_([True], self.prepare_for_fork_calls)
+
+    def test_disabled(self):
+        global_conf = get_global_conf('settings5', django_prefork='false')
+        get_configured_django_wsgi_app(global_conf)
+
+        eq_([], self.prepare_for_fork_calls)
+
+    def test_unset(self):
+        global_conf = get_global_conf('settings5')
+        get_configured_django_wsgi_app(global_conf)
+
+        eq_([], self.prepare_for_fork_calls)
+
+
+class TestForkPreparation(BaseDjangoTestCase):
+
+    django_settings_module = 'tests.mock_django_settings.settings5'
+
+    def teardown(self):
+        if hasattr(gc, 'unfreeze'):
+            gc.unfreeze()
+
+        super(TestForkPreparation, self).teardown()
+
+    def test_garbage_collector_frozen(self):
+        prefork.prepare_for_fork()
+
+        if hasattr(gc, 'get_freeze_count'):
+            ok_(0 < gc.get_freeze_count())
+
+
+class TestPostForkHooks(BaseDjangoTestCase):
+
+    django_settings_module = 'tests.mock_django_settings.settings5'
+
+    def setup(self):
+        super(TestPostForkHooks, self).setup()
+
+        self.original_post_fork_hooks = list(prefork._POST_FORK_HOOKS)
+
+    def teardown(self):
+        prefork._POST_FORK_HOOKS[:] = self.original_post_fork_hooks
+
+        super(TestPostForkHooks, self).teardown()
+
+    def test_hooks_called(self):
+        hook_calls = []
+        prefork.add_post_fork_hook(lambda: hook_calls.append(1))
+        prefork.add_post_fork_hook(lambda: hook_calls.append(2))
+
+        prefork.reset_after_fork()
+
+        eq_([1, 2], hook_calls)
@@ -0,0 +1,238 @@
+##############################################################################
+#
+# Copyright (c) 2016, 2degrees Limited.
+# All Rights Reserved.
+#
+# This file is part of django-pastedeploy-settings
+# <https://github.com/2degrees/django-pastedeploy-settings>, which is subject
+# to the provisions of the BSD at
+# <http://dev.2degreesnetwork.com/p/2degrees-license.html>. A copy of the
+# license should accompany this distribution. THIS SOFTWARE IS PROVIDED "AS IS"
+# AND ANY AND ALL EXPRESS OR IMPLIED WARRANTIES ARE DISCLAIMED, INCLUDING, BUT
+# NOT LIMITED TO, THE IMPLIED WARRANTIES OF TITLE, MERCHANTABILITY, AGAINST
+# INFRINGEMENT, AND FITNESS FOR A PARTICULAR PURPOSE.
+#
+##############################################################################
+import os
+from shutil import rmtree
+import signal
+from tempfile import mkdtemp
+
+from nose.tools import assert_false
+from nose.tools import eq_
+from nose.tools import ok_
+
+from django_pastedeploy_settings import get_configured_django_wsgi_app
+from django_pastedeploy_settings import get_load_context
+from django_pastedeploy_settings import reloading
+from django_pastedeploy_settings.loading import loadapp
+from django_pastedeploy_settings.reloading import \
+    install_reload_signal_handler
+from django_pastedeploy_settings.reloading import reload_settings
+from django_pastedeploy_settings.reloading import setting_reloaded
+
+from tests.utils import BaseDjangoTestCase
+from tests.utils import get_global_conf
+from tests.utils import get_local_conf
+
+
+_CONFIG_TEMPLATE = """\
+[DEFAULT]
+debug = true
+django_settings_module = tests.mock_django_settings.empty_module2
+
+[app:main]
+paste.app_factory = django_pastedeploy_settings:get_configured_django_wsgi_app
+SECRET_KEY = "secret"
+FEATURE_FLAG = %s
+"""
+
+
+class TestSettingsReload(BaseDjangoTestCase):
+
+    setup_fixture = False
+
+    def test_changed_option(self):
+        settings_reload = _reload_settings(
+            'empty_module2',
+            {'FEATURE_FLAG': False},
+            {'FEATURE_FLAG': True},
+            )
+
+        from tests.mock_django_settings import empty_module2
+
+        ok_(empty_module2.FEATURE_FLAG)
+        eq_(['FEATURE_FLAG'], settings_reload.reloaded_setting_names)
+        assert_false(settings_reload.is_restart_required)
+
+    def test_new_option(self):
+        settings_reload = \
+            _reload_settings('empty_module2', {}, {'TIMEOUT': 10})
+
+        from tests.mock_django_settings import empty_module2
+
+        eq_(10, empty_module2.TIMEOUT)
+        eq_(['TIMEOUT'], settings_reload.reloaded_setting_names)
+
+    def test_unchanged_option(self):
+        settings_reload = _reload_settings(
+            'empty_module2',
+            {'FEATURE_FLAG': True},
+            {'FEATURE_FLAG': True},
+            )
+
+        eq_([], settings_reload.reloaded_setting_names)
+        eq_([], settings_reload.restart_required_setting_names)
+
+    def test_restart_required_option(self):
+        settings_reload = _reload_settings(
+            'empty_module2',
+            {'ROOT_URLCONF': 'urls1'},
+            {'ROOT_URLCONF': 'urls2'},
+            )
+
+        from tests.mock_django_settings import empty_module2
+
+        eq_('urls1', empty_module2.ROOT_URLCONF)
+        eq_([], settings_reload.reloaded_setting_names)
+        eq_(['ROOT_URLCONF'], settings_reload.restart_required_setting_names)
+        ok_(settings_reload.is_restart_required)
+
+    def test_removed_option(self):
+        settings_reload = \
+            _reload_settings('empty_module2', {'FEATURE_FLAG': True}, {})
+
+        from tests.mock_django_settings import empty_module2
+
+        ok_(empty_module2.FEATURE_FLAG)
+        eq_(['FEATURE_FLAG'], settings_reload.restart_required_setting_names)
+
+    def test_option_merged_with_original_value(self):
+        global_conf = get_global_conf('mergeable_module')
+        get_configured_django_wsgi_app(
+            global_conf,
+            **get_local_conf(FEATURES={'beta': True})
+            )
+        load_context = get_load_context(global_conf)
+        load_context.reload_settings(get_local_conf(FEATURES={'new_ui': True}))
+
+        from tests.mock_django_settings import mergeable_module
+
+        eq_({'new_ui': True, 'beta': False}, mergeable_module.FEATURES)
+
+    def test_django_settings_object(self):
+        global_conf = get_global_conf('empty_module2')
+        get_configured_django_wsgi_app(
+            global_conf,
+            **get_local_conf(FEATURE_FLAG=False, lower_case_option=1)
+            )
+
+        from django.conf import settings
+        assert_false(settings.FEATURE_FLAG)
+
+        changed_setting_names = []
+
+        def record_setting_change(setting, **kwargs):
+            changed_setting_names.append(setting)
+
+        setting_reloaded.connect(record_setting_change)
+        try:
+            load_context = get_load_context(global_conf)
+            load_context.reload_settings(
+                get_local_conf(FEATURE_FLAG=True, lower_case_option=2),
+                )
+        finally:
+            setting_reloaded.disconnect(record_setting_change)
+
+        ok_(settings.FEATURE_FLAG)
+        eq_(['FEATURE_FLAG'], changed_setting_names)
+
+
+class TestConfigFileReload(BaseDjangoTestCase):
+
+    setup_fixture = False
+
+    def setup(self):
+        super(TestConfigFileReload, self).setup()
+
+        self.config_directory = mkdtemp()
+        self.config_file_path = \
+            os.path.join(self.config_directory, 'config.ini')
+        self.config_uri = 'config:' + self.config_file_path
+        self._write_config_file('false')
+        loadapp(self.config_uri)
+
+        self.original_signal_handler = signal.getsignal(signal.SIGUSR1)
+
+    def teardown(self):
+        signal.signal(signal.SIGUSR1, self.original_signal_handler)
+        rmtree(self.config_directory)
+
+        super(TestConfigFileReload, self).teardown()
+
+    def test_reload(self):
+        self._write_config_file('true')
+        settings_reload = reload_settings(self.config_uri)
+
+        from tests.mock_django_settings import empty_module2
+
+        ok_(empty_module2.FEATURE_FLAG)
+        eq_(['FEATURE_FLAG'], settings_reload.reloaded_setting_names)
+
+    def test_signal(self):
+        install_reload_signal_handler(
+            self.config_uri,
+            signal_number=signal.SIGUSR1,
+            )
+        self._write_config_file('true')
+        os.kill(os.getpid(), signal.SIGUSR1)
+
+        from tests.mock_django_settings import empty_module2
+
+        ok_(empty_module2.FEATURE_FLAG)
+
+    def test_signal_during_reload(self):
+        install_reload_signal_handler(
+            self.config_uri,
+            signal_number=signal.SIGUSR1,
+            )
+        self._write_config_file('true')
+
+        with reloading._RELOAD_LOCK:
+            os.kill(os.getpid(), signal.SIGUSR1)
+
+        from tests.mock_django_settings import empty_module2
+
+        assert_false(empty_module2.FEATURE_FLAG)
+        eq_(1, len(self.logs['warning']))
+        ok_(self.logs['warning'][0].startswith('Ignoring reload signal'))
+
+    def test_signal_with_invalid_config(self):
+        install_reload_signal_handler(
+            self.config_uri,
+            signal_number=signal.SIGUSR1,
+            )
+        self._write_config_file('invalid')
+        os.kill(os.getpid(), signal.SIGUSR1)
+
+        from tests.mock_django_settings import empty_module2
+
+        assert_false(empty_module2.FEATURE_FLAG)
+        eq_(1, len(self.logs['error']))
+        ok_(self.logs['error'][0].startswith('Could not reload settings'))
+
+    def _write_config_file(self, feature_flag_value):
+        with open(self.config_file_path, 'w') as config_file:
+            config_file.write(_CONFIG_TEMPLATE % feature_flag_value)
+
+
+def _reload_settings(settings_module_name, original_options, new_options):
+    global_conf = get_global_conf(settings_module_name)
+    get_configured_django_wsgi_app(
+        global_conf,
+        **get_local_conf(**original_options)
+        )
+    load_context = get_load_context(global_conf)
+    settings_reload = \
+        load_context.reload_settings(get_local_conf(**new_options))
+    return settings_reload
@@ -226,6 +226,97 @@ class TestCustomStringSubstitution(object):
 
         eq_(1, local_conf_resolved[local_option_name])
 
+    def test_substituting_local_option(self):
+        global_conf = get_global_conf('read_only_empty_module')
+
+        local_conf = get_local_conf()
+        local_conf['HOSTS'] = '["a.example.com", "b.example.com"]'
+        local_conf['SETTING1'] = '{"hosts": ${HOSTS}}'
+
+        local_conf_resolved = \
+            resolve_local_conf_options(global_conf, local_conf)
+
+        eq_(
+            {'hosts': ['a.example.com', 'b.example.com']},
+            local_conf_resolved['SETTING1'],
+            )
+
+    def test_substituting_nested_local_options(self):
+        global_conf = get_global_conf(
+            'read_only_empty_module',
+            root='/srv',
+            )
+
+        local_conf = get_local_conf()
+        local_conf['SETTING1'] = '[${SETTING2}, ${SETTING3}]'
+        local_conf['SETTING2'] = '${SETTING3}'
+        local_conf['SETTING3'] = '"${root}"'
+
+        local_conf_resolved = \
+            resolve_local_conf_options(global_conf, local_conf)
+
+        eq_(['/srv', '/srv'], local_conf_resolved['SETTING1'])
+        eq_('/srv', local_conf_resolved['SETTING2'])
+        eq_('/srv', local_conf_resolved['SETTING3'])
+
+    def test_global_option_precedence(self):
+        global_conf = get_global_conf(
+            'read_only_empty_module',
+            SETTING2='2',
+            )
+
+        local_conf = get_local_conf()
+        local_conf['SETTING1'] = '${SETTING2}'
+        local_conf['SETTING2'] = '3'
+
+        local_conf_resolved = \
+            resolve_local_conf_options(global_conf, local_conf)
+
+        eq_(2, local_conf_resolved['SETTING1'])
+
+    def test_circular_references(self):
+        global_conf = get_global_conf('read_only_empty_module')
+
+        local_conf = get_local_conf()
+        local_conf['SETTING1'] = '${SETTING2}'
+        local_conf['SETTING2'] = '[${SETTING3}]'
+        local_conf['SETTING3'] = '${SETTING1}'
+
+        assert_raises_regexp(
+            InvalidSettingValueError,
+            r'circular fashion: "SETTING(\d)" -> "SETTING\d" -> '
+                r'"SETTING\d" -> "SETTING\1"$',
+            resolve_local_conf_options,
+            global_conf,
+            local_conf,
+            )
+
+    def test_self_reference(self):
+        global_conf = get_global_conf('read_only_empty_module')
+
+        local_conf = get_local_conf()
+        local_conf['SETTING1'] = '[${SETTING1}]'
+
+        assert_raises_regexp(
+            InvalidSettingValueError,
+            'circular fashion: "SETTING1" -> "SETTING1"$',
+            resolve_local_conf_options,
+            global_conf,
+            local_conf,
+            )
+
+    def test_escaping_local_option(self):
+        global_conf = get_global_conf('read_only_empty_module')
+
+        local_conf = get_local_conf()
+        local_conf['SETTING1'] = '"$${SETTING2} ${SETTING2}"'
+        local_conf['SETTING2'] = '1'
+
+        local_conf_resolved = \
+            resolve_local_conf_options(global_conf, local_conf)
+
+        eq_('${SETTING2} 1', local_conf_resolved['SETTING1'])
+
 
 def test_unsupported_settings():
     global_conf = get_global_conf('read_only_empty_module')
@@ -0,0 +1,221 @@
+##############################################################################
+#
+# Copyright (c) 2016, 2degrees Limited.
+# All Rights Reserved.
+#
+# This file is part of django-pastedeploy-settings
+# <https://github.com/2degrees/django-pastedeploy-settings>, which is subject
+# to the provisions of the BSD at
+# <http://dev.2degreesnetwork.com/p/2degrees-license.html>. A copy of the
+# license should accompany this distribution. THIS SOFTWARE IS PROVIDED "AS IS"
+# AND ANY AND ALL EXPRESS OR IMPLIED WARRANTIES ARE DISCLAIMED, INCLUDING, BUT
+# NOT LIMITED TO, THE IMPLIED WARRANTIES OF TITLE, MERCHANTABILITY, AGAINST
+# INFRINGEMENT, AND FITNESS FOR A PARTICULAR PURPOSE.
+#
+##############################################################################
+from nose.tools import assert_in
+from nose.tools import eq_
+from nose.tools import ok_
+
+from django_pastedeploy_settings import get_configured_django_wsgi_app
+from django_pastedeploy_settings.instrumentation import \
+    get_last_startup_report
+from django_pastedeploy_settings.warmup import WARM_UP_ENVIRON_KEY
+from django_pastedeploy_settings.warmup import warm_up
+
+from tests.utils import BaseDjangoTestCase
+from tests.utils import get_global_conf
+from tests.utils import get_local_conf
+from tests.utils import MOCK_WSGI_APP
+
+
+class TestWarmUp(BaseDjangoTestCase):
+
+    setup_fixture = False
+
+    def setup(self):
+        super(TestWarmUp, self).setup()
+
+        self.app = _RecordingApp()
+
+    def test_requests(self):
+        warm_up(self.app, ['/', '/about/'], host='example.com')
+
+        eq_(['/', '/about/'], self.app.paths)
+        eq_('GET', self.app.environs[0]['REQUEST_METHOD'])
+        eq_('example.com', self.app.environs[0]['HTTP_HOST'])
+        ok_(self.app.environs[0][WARM_UP_ENVIRON_KEY])
+
+    def test_query_string(self):
+        warm_up(self.app, ['/search/?q=term'], host='example.com')
+
+        eq_(['/search/'], self.app.paths)
+        eq_('q=term', self.app.environs[0]['QUERY_STRING'])
+
+    def test_response_consumed(self):
+        warm_up(self.app, ['/'], host='example.com')
+
+        eq_([True], self.app.closed_responses)
+
+    def test_default_host(self):
+        _set_up_settings(ALLOWED_HOSTS=['.example.org', 'example.com'])
+
+        warm_up(self.app, ['/'])
+
+        eq_('example.com', self.app.environs[0]['HTTP_HOST'])
+
+    def test_default_host_without_allowed_hosts(self):
+        _set_up_settings(ALLOWED_HOSTS=['*'])
+
+        warm_up(self.app, ['/'])
+
+        eq_('localhost', self.app.environs[0]['HTTP_HOST'])
+
+    def test_error_response(self):
+        app = _RecordingApp('500 Internal Server Error')
+
+        warm_up(app, ['/', '/about/'], host='example.com')
+
+        eq_(['/', '/about/'], app.paths)
+        eq_(
+            'Warm-up request to / responded with 500 Internal Server Error',
+            self.logs['warning'][0],
+            )
+
+    def test_exception(self):
+        def app(environ, start_response):
+            raise ValueError()
+
+        warm_up(app, ['/'], host='example.com')
+
+        eq_(['Warm-up request to / failed'], self.logs['warning'])
+
+    def test_phases(self):
+        warm_up(self.app, ['/', '/about/'], host='example.com')
+
+        phase_measurements = get_last_startup_report().phase_measurements
+        eq_(
+            [('/', 'warm_up'), ('/about/', 'warm_up'), ('warm_up', None)],
+            [
+                (phase_measurement.name, phase_measurement.parent_name)
+                for phase_measurement in phase_measurements
+                ],
+            )
+
+    def test_connections(self):
+        _set_up_settings(
+            DATABASES={
+                'default': {
+                    'ENGINE': 'django.db.backends.sqlite3',
+                    'NAME': ':memory:',
+                    },
+                },
+            )
+        # Django's connection handler keeps using the settings object of
+        # the first test which configured the databases
+        from django import db
+        from django.conf import settings
+        original_connections = db.connections
+        db.connections = connections = \
+            db.ConnectionHandler(settings.DATABASES)
+        try:
+            warm_up(self.app, open_connections=True)
+
+            ok_(connections['default'].connection is not None)
+        finally:
+            connections['default'].close()
+            db.connections = original_connections
+
+        eq_([], self.app.paths)
+        phase_names = [
+            phase_measurement.name
+            for phase_measurement in
+            get_last_startup_report().phase_measurements
+            ]
+        assert_in('connections', phase_names)
+
+
+class TestWarmUpOptions(BaseDjangoTestCase):
+
+    setup_fixture = False
+
+    def test_paths(self):
+        global_conf = get_global_conf(
+            'settings5',
+            django_warm_up_paths='/ /about/',
+            django_warm_up_host='example.com',
+            )
+        local_conf = get_local_conf(
+            WSGI_APPLICATION='tests.utils.MOCK_WSGI_APP',
+            )
+        get_configured_django_wsgi_app(global_conf, **local_conf)
+
+        eq_('/about/', MOCK_WSGI_APP.environ['PATH_INFO'])
+        eq_('example.com', MOCK_WSGI_APP.environ['HTTP_HOST'])
+        ok_(MOCK_WSGI_APP.environ[WARM_UP_ENVIRON_KEY])
+
+    def test_phase_within_startup(self):
+        global_conf = get_global_conf(
+            'settings5',
+            django_warm_up_paths='/',
+            )
+        local_conf = get_local_conf(
+            WSGI_APPLICATION='tests.utils.MOCK_WSGI_APP',
+            )
+        get_configured_django_wsgi_app(global_conf, **local_conf)
+
+        phase_names = [
+            phase_measurement.name
+            for phase_measurement in
+            get_last_startup_report().phase_measurements
+            ]
+        assert_in('wsgi_application', phase_names)
+        assert_in('warm_up', phase_names)
+
+    def test_unset(self):
+        MOCK_WSGI_APP.environ = None
+        global_conf = get_global_conf('settings5')
+        local_conf = get_local_conf(
+            WSGI_APPLICATION='tests.utils.MOCK_WSGI_APP',
+            )
+        get_configured_django_wsgi_app(global_conf, **local_conf)
+
+        eq_(None, MOCK_WSGI_APP.environ)
+
+
+class _RecordingApp(object):
+
+    def __init__(self, status='200 OK'):
+        super(_RecordingApp, self).__init__()
+
+        self.status = status
+        self.environs = []
+        self.closed_responses = []
+
+    @property
+    def paths(self):
+        return [environ['PATH_INFO'] for environ in self.environs]
+
+    def __call__(self, environ, start_response):
+        self.environs.append(environ)
+        start_response(self.status, [])
+        return _ResponseBody(self.closed_responses)
+
+
+class _ResponseBody(object):
+
+    def __init__(self, closed_responses):
+        super(_ResponseBody, self).__init__()
+
+        self._closed_responses = closed_responses
+
+    def __iter__(self):
+        yield b'body'
+
+    def close(self):
+        self._closed_responses.append(True)
+
+
+def _set_up_settings(**settings):
+    global_conf = get_global_conf('settings5')
+    get_configured_django_wsgi_app(global_conf, **get_local_conf(**settings))
@@ -0,0 +1,258 @@
+##############################################################################
+#
+# Copyright (c) 2016, 2degrees Limited.
+# All Rights Reserved.
+#
+# This file is part of django-pastedeploy-settings
+# <https://github.com/2degrees/django-pastedeploy-settings>, which is subject
+# to the provisions of the BSD at
+# <http://dev.2degreesnetwork.com/p/2degrees-license.html>. A copy of the
+# license should accompany this distribution. THIS SOFTWARE IS PROVIDED "AS IS"
+# AND ANY AND ALL EXPRESS OR IMPLIED WARRANTIES ARE DISCLAIMED, INCLUDING, BUT
+# NOT LIMITED TO, THE IMPLIED WARRANTIES OF TITLE, MERCHANTABILITY, AGAINST
+# INFRINGEMENT, AND FITNESS FOR A PARTICULAR PURPOSE.
+#
+##############################################################################
+import os
+from shutil import rmtree
+from tempfile import mkdtemp
+import time
+
+from nose.plugins.skip import SkipTest
+from nose.tools import assert_false
+from nose.tools import eq_
+from nose.tools import ok_
+
+from django_pastedeploy_settings import reloading
+from django_pastedeploy_settings import watching
+from django_pastedeploy_settings.loading import loadapp
+from django_pastedeploy_settings.watching import start_config_watcher
+
+from tests.utils import BaseDjangoTestCase
+
+
+_BASE_CONFIG_TEMPLATE = """\
+[DEFAULT]
+debug = true
+django_settings_module = tests.mock_django_settings.empty_module2
+
+[app:base]
+paste.app_factory = django_pastedeploy_settings:get_configured_django_wsgi_app
+SECRET_KEY = "secret"
+FEATURE_FLAG = %s
+"""
+
+
+_MAIN_CONFIG = """\
+[app:main]
+use = config:base.ini#base
+"""
+
+
+class _BaseFileMonitorTestCase(object):
+
+    def setup(self):
+        self.directory = mkdtemp()
+        self.file_path = os.path.join(self.directory, 'config.ini')
+        _write_file(self.file_path, 'original')
+
+        self.file_monitor = self._get_file_monitor()
+        self.file_monitor.set_file_paths([self.file_path])
+
+    def teardown(self):
+        self.file_monitor.close()
+        rmtree(self.directory)
+
+    def test_unchanged_file(self):
+        assert_false(self.file_monitor.wait_for_changes(0.01))
+
+    def test_changed_file(self):
+        _write_file(self.file_path, 'changed')
+
+        ok_(self.file_monitor.wait_for_changes(0.01))
+        assert_false(self.file_monitor.wait_for_changes(0.01))
+
+    def test_replaced_file(self):
+        new_file_path = os.path.join(self.directory, 'new-config.ini')
+        _write_file(new_file_path, 'replaced')
+        os.rename(new_file_path, self.file_path)
+
+        ok_(self.file_monitor.wait_for_changes(0.01))
+
+    def test_removed_file(self):
+        os.remove(self.file_path)
+
+        ok_(self.file_monitor.wait_for_changes(0.01))
+
+    def test_unwatched_file(self):
+        _write_file(os.path.join(self.directory, 'other.ini'), 'other')
+
+        assert_false(self.file_monitor.wait_for_changes(0.01))
+
+    def test_missing_directory(self):
+        missing_file_path = \
+            os.path.join(self.directory, 'missing', 'config.ini')
+        self.file_monitor.set_file_paths([self.file_path, missing_file_path])
+        _write_file(self.file_path, 'changed')
+
+        ok_(self.file_monitor.wait_for_changes(0.01))
+
+    def _get_file_monitor(self):
+        raise NotImplementedError()
+
+
+class TestPollingFileMonitor(_BaseFileMonitorTestCase):
+
+    def _get_file_monitor(self):
+        return watching._PollingFileMonitor()
+
+
+class TestInotifyFileMonitor(_BaseFileMonitorTestCase):
+
+    def setup(self):
+        if not watching._InotifyFileMonitor.is_supported():
+            raise SkipTest('inotify is not available')
+
+        super(TestInotifyFileMonitor, self).setup()
+
+    def _get_file_monitor(self):
+        return watching._InotifyFileMonitor()
+
+
+class TestConfigWatcher(BaseDjangoTestCase):
+
+    setup_fixture = False
+
+    use_inotify = True
+
+    def setup(self):
+        super(TestConfigWatcher, self).setup()
+
+        self.original_inotify_support_checker = \
+            watching._InotifyFileMonitor.is_supported
+        if not self.use_inotify:
+            watching._InotifyFileMonitor.is_supported = \
+                classmethod(lambda cls: False)
+
+        self.reload_count = 0
+        self.original_reloader = reloading._reload_settings_logging_outcome
+        reloading._reload_settings_logging_outcome = self._reload_settings
+
+        self.config_directory = mkdtemp()
+        self.base_config_file_path = \
+            os.path.join(self.config_directory, 'base.ini')
+        _write_file(self.base_config_file_path, _BASE_CONFIG_TEMPLATE % 'false')
+        main_config_file_path = os.path.join(self.config_directory, 'main.ini')
+        _write_file(main_config_file_path, _MAIN_CONFIG)
+
+        config_uri = 'config:' + main_config_file_path
+        loadapp(config_uri)
+        self.config_watcher = start_config_watcher(
+            config_uri,
+            debounce_delay=0.05,
+            poll_interval=0.05,
+            )
+
+    def teardown(self):
+        self.config_watcher.stop()
+        reloading._reload_settings_logging_outcome = self.original_reloader
+        watching._InotifyFileMonitor.is_supported = \
+            self.original_inotify_support_checker
+        rmtree(self.config_directory)
+
+        super(TestConfigWatcher, self).teardown()
+
+    def test_changed_config(self):
+        _write_file(self.base_config_file_path, _BASE_CONFIG_TEMPLATE % 'true')
+
+        from tests.mock_django_settings import empty_module2
+
+        _wait_for(lambda: empty_module2.FEATURE_FLAG)
+        ok_(empty_module2.FEATURE_FLAG)
+
+    def test_invalid_config(self):
+        _write_file(
+            self.base_config_file_path,
+            _BASE_CONFIG_TEMPLATE % 'invalid',
+            )
+
+        from tests.mock_django_settings import empty_module2
+
+        _wait_for(lambda: self.logs['error'])
+        assert_false(empty_module2.FEATURE_FLAG)
+        eq_(1, len(self.logs['error']))
+
+    def test_stop(self):
+        self.config_watcher.stop()
+        _write_file(self.base_config_file_path, _BASE_CONFIG_TEMPLATE % 'true')
+        time.sleep(0.2)
+
+        from tests.mock_django_settings import empty_module2
+
+        assert_false(empty_module2.FEATURE_FLAG)
+
+    def test_change_during_reload(self):
+        """
+        Changes made whilst the settings are being reloaded, before the
+        files are watched again, trigger another reload.
+
+        """
+        def change_config():
+            _write_file(
+                self.base_config_file_path,
+                _BASE_CONFIG_TEMPLATE % 'true',
+                )
+        self.post_reload_callback = change_config
+
+        _write_file(
+            self.base_config_file_path,
+            _BASE_CONFIG_TEMPLATE % 'false' + '\n',
+            )
+
+        from tests.mock_django_settings import empty_module2
+
+        _wait_for(lambda: empty_module2.FEATURE_FLAG)
+        ok_(empty_module2.FEATURE_FLAG)
+        eq_(2, self.reload_count)
+
+    def test_other_config_not_watched(self):
+        other_config_file_path = \
+            os.path.join(self.config_directory, 'other.ini')
+        _write_file(other_config_file_path, _MAIN_CONFIG)
+        loadapp('config:' + other_config_file_path)
+
+        _write_file(self.base_config_file_path, _BASE_CONFIG_TEMPLATE % 'true')
+        _wait_for(lambda: self.reload_count)
+        # Let the files be watched again after the reload
+        time.sleep(0.1)
+        _write_file(other_config_file_path, _MAIN_CONFIG + '\n')
+        time.sleep(0.2)
+
+        eq_(1, self.reload_count)
+
+    post_reload_callback = None
+
+    def _reload_settings(self, *args, **kwargs):
+        self.original_reloader(*args, **kwargs)
+        self.reload_count += 1
+
+        post_reload_callback = self.post_reload_callback
+        self.post_reload_callback = None
+        if post_reload_callback:
+            post_reload_callback()
+
+
+class TestPollingConfigWatcher(TestConfigWatcher):
+
+    use_inotify = False
+
+
+def _write_file(file_path, contents):
+    with open(file_path, 'w') as file_:
+        file_.write(contents)
+
+
+def _wait_for(condition, timeout=5):
+    deadline = time.time() + timeout
+    while not condition() and time.time() < deadline:
+        time.sleep(0.01)
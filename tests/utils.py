@@ -16,9 +16,14 @@
 from json import dumps as convert_to_json
 import logging
 import os
+import sys
 
 import django.conf
 
+from django_pastedeploy_settings.loading import uninstall_loader_cache
+
+from tests import mock_django_settings
+
 
 class BaseDjangoTestCase(object):
     """
@@ -42,6 +47,24 @@ class BaseDjangoTestCase(object):
         django.conf.settings = django.conf.LazySettings()
         if "DJANGO_SETTINGS_MODULE" in os.environ:
             del os.environ['DJANGO_SETTINGS_MODULE']
+        _forget_mock_django_settings_modules()
+        uninstall_loader_cache()
+
+
+def _forget_mock_django_settings_modules():
+    """
+    Make the next import of each mock settings module return a pristine copy,
+    given that the settings are stored in the modules themselves.
+
+    """
+    package_name = mock_django_settings.__name__
+    for module_name in list(sys.modules):
+        if module_name.startswith(package_name + '.'):
+            del sys.modules[module_name]
+
+            module_short_name = module_name[len(package_name) + 1:]
+            if hasattr(mock_django_settings, module_short_name):
+                delattr(mock_django_settings, module_short_name)
 
 
 class MockLoggingHandler(logging.Handler):